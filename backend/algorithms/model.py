@@ -36,6 +36,9 @@ def run_anomaly_detection(df: pd.DataFrame):
 
     FEATURES = ['B4', 'B8', 'B11', 'NDVI', 'NBR']
 
+    # Registry pixel_id when assigned, raw coordinates otherwise
+    pixel_key = ['pixel_id'] if 'pixel_id' in df.columns else ['latitude', 'longitude']
+
     results = []
 
     # -----------------------------------------
@@ -65,13 +68,13 @@ def run_anomaly_detection(df: pd.DataFrame):
     # PHASE 3: Temporal excavation logic
     # -----------------------------------------
     df_anomaly = df_anomaly.sort_values(
-        by=['mine_id', 'latitude', 'longitude', 'date']
+        by=['mine_id'] + pixel_key + ['date']
     )
 
     df_anomaly['excavated_flag'] = 0
 
-    for (mine, lat, lon), pixel_df in df_anomaly.groupby(
-        ['mine_id', 'latitude', 'longitude']
+    for _, pixel_df in df_anomaly.groupby(
+        ['mine_id'] + pixel_key
     ):
         pixel_df = pixel_df.sort_values('date')
 
@@ -90,9 +93,11 @@ def run_anomaly_detection(df: pd.DataFrame):
     # -----------------------------------------
     # PHASE 4: Synthetic vegetation zone
     # -----------------------------------------
-    veg_pixels = df.groupby(
-        ['latitude', 'longitude']
-    )['NDVI'].mean().reset_index()
+    veg_pixels = df.groupby(pixel_key).agg(
+        latitude=('latitude', 'first'),
+        longitude=('longitude', 'first'),
+        NDVI=('NDVI', 'mean')
+    ).reset_index(drop=True)
 
     veg_pixels = veg_pixels[
         veg_pixels['NDVI'] > veg_pixels['NDVI'].quantile(0.9)
@@ -122,9 +127,12 @@ def run_anomaly_detection(df: pd.DataFrame):
     # -----------------------------------------
     # PHASE 5: Synthetic water zone
     # -----------------------------------------
-    water_pixels = df.groupby(
-        ['latitude', 'longitude']
-    )[['B8', 'B11']].mean().reset_index()
+    water_pixels = df.groupby(pixel_key).agg(
+        latitude=('latitude', 'first'),
+        longitude=('longitude', 'first'),
+        B8=('B8', 'mean'),
+        B11=('B11', 'mean')
+    ).reset_index(drop=True)
 
     water_pixels = water_pixels[
         (water_pixels['B8'] < water_pixels['B8'].quantile(0.1)) &
@@ -52,8 +52,12 @@ def preprocess_pixel_timeseries(data):
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
     df = df.dropna(subset=["date"])
 
+    # Pixels are keyed by registry pixel_id when assigned (ingest),
+    # by raw coordinates otherwise (e.g. CSV input)
+    pixel_key = ["pixel_id"] if "pixel_id" in df.columns else ["latitude", "longitude"]
+
     df = df.sort_values(
-        by=["mine_id", "latitude", "longitude", "date"]
+        by=["mine_id"] + pixel_key + ["date"]
     ).reset_index(drop=True)
 
     print("✅ Date conversion & sorting completed")
@@ -92,7 +96,7 @@ def preprocess_pixel_timeseries(data):
 
     df_scaled["time_index"] = (
         df_scaled
-        .groupby(["mine_id", "latitude", "longitude"])
+        .groupby(["mine_id"] + pixel_key)
         .cumcount()
     )
 
@@ -103,9 +107,11 @@ def preprocess_pixel_timeseries(data):
     # -----------------------------------------
     X = df_scaled[numeric_cols].values
 
-    metadata = df_scaled[
-        ["mine_id", "date", "latitude", "longitude", "month", "time_index"]
-    ]
+    metadata_cols = ["mine_id", "date", "latitude", "longitude", "month", "time_index"]
+    if "pixel_id" in df_scaled.columns:
+        metadata_cols.insert(1, "pixel_id")
+
+    metadata = df_scaled[metadata_cols]
 
     print("✅ Preprocessing completed")
     print("ML Feature Matrix Shape:", X.shape)
@@ -2,7 +2,10 @@
 
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
-from processing.admin_processor import run_admin_pipeline
+from processing.admin_processor import run_admin_pipeline, PipelineAborted
+from api.task_queue import get_mine_lock
+from db.connection import get_pool_metrics
+from services.cache import get_cache_metrics
 
 
 router = APIRouter()
@@ -27,11 +30,13 @@ def run_pipeline(
                 content={"error": "mine_id must be a non-negative integer"}
             )
         
-        result = run_admin_pipeline(
-            mine_id=mine_id,
-            start_date=start_date,
-            end_date=end_date
-        )
+        # Serialize with queued jobs touching the same mine
+        with get_mine_lock(mine_id):
+            result = run_admin_pipeline(
+                mine_id=mine_id,
+                start_date=start_date,
+                end_date=end_date
+            )
         return JSONResponse(
             status_code=200,
             content=result
@@ -42,6 +47,12 @@ def run_pipeline(
             status_code=400,
             content={"error": f"Invalid input: {str(e)}"}
         )
+    except PipelineAborted as e:
+        print(f"Pipeline Aborted: {str(e)}")
+        return JSONResponse(
+            status_code=504,
+            content={"error": str(e), "reason": e.reason, "committed": e.committed}
+        )
     except RuntimeError as e:
         print(f"Runtime Error: {str(e)}")
         return JSONResponse(
@@ -57,6 +68,16 @@ def run_pipeline(
             content={"error": f"Pipeline failed: {str(e)}"}
         )
 
+@router.get("/metrics/db")
+def get_db_pool_metrics():
+    """Connection pool occupancy, saturation and checkout wait times"""
+    return get_pool_metrics()
+
+@router.get("/metrics/cache")
+def get_response_cache_metrics():
+    """Response cache size, hit ratio and evictions"""
+    return get_cache_metrics()
+
 def _is_valid_date(date_str: str) -> bool:
     """Validate date string format YYYY-MM-DD"""
     try:
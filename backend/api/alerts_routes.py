@@ -0,0 +1,134 @@
+# backend/api/alerts_routes.py
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import json
+import time
+
+from services.alert_feed import fetch_alerts_async, subscribe, unsubscribe
+from config.settings import (
+    ALERTS_FEED_MAX_LIMIT,
+    ALERTS_LONG_POLL_MAX_SECONDS,
+    ALERTS_POLL_SECONDS
+)
+
+router = APIRouter()
+
+
+def _feed_filters(mine_ids, zone_type, alert_type):
+    """
+    Keyword filters for fetch_alerts_async. A mine_ids value that is not
+    integers, or lists none (e.g. ","), is a 400; it never means all mines.
+    """
+    ids = None
+    if mine_ids is not None:
+        try:
+            ids = list(dict.fromkeys(int(i) for i in mine_ids.split(",") if i.strip()))
+        except ValueError:
+            raise HTTPException(400, "mine_ids must be comma separated integers")
+        if not ids:
+            raise HTTPException(400, "mine_ids must list at least one mine")
+    return {"mine_ids": ids, "zone_type": zone_type, "alert_type": alert_type}
+
+
+async def _wait_for_alerts(wakeup, timeout):
+    """Sleep until notify_alerts() or timeout, whichever comes first"""
+    try:
+        await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+@router.get("")
+async def get_alerts(
+    since_id: int = 0,
+    mine_ids: str = None,
+    zone_type: str = None,
+    alert_type: str = None,
+    limit: int = 100,
+    wait: float = 0
+):
+    """
+    Alerts with id > since_id, oldest first, across all mines.
+    Pass the returned next_since_id on the following poll.
+    New alerts only: re-ingested alerts keep their id and are not resent.
+    wait: long-poll up to this many seconds when nothing new is available
+    """
+    if since_id < 0:
+        return JSONResponse({"error": "since_id must be >= 0"}, status_code=400)
+    if not 1 <= limit <= ALERTS_FEED_MAX_LIMIT:
+        return JSONResponse({"error": f"limit must be between 1 and {ALERTS_FEED_MAX_LIMIT}"}, status_code=400)
+    filters = _feed_filters(mine_ids, zone_type, alert_type)
+
+    deadline = time.monotonic() + min(max(wait, 0), ALERTS_LONG_POLL_MAX_SECONDS)
+    wakeup = subscribe()
+    try:
+        while True:
+            # Cleared before querying so a write landing mid-query still wakes us
+            wakeup.clear()
+            alerts = await fetch_alerts_async(since_id, limit, **filters)
+
+            remaining = deadline - time.monotonic()
+            if alerts or remaining <= 0:
+                break
+            await _wait_for_alerts(wakeup, min(remaining, ALERTS_POLL_SECONDS))
+    except Exception as e:
+        print(f"Error in get_alerts: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+    finally:
+        unsubscribe(wakeup)
+
+    return {
+        "alerts": alerts,
+        "next_since_id": alerts[-1]["id"] if alerts else since_id
+    }
+
+
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    since_id: int = 0,
+    mine_ids: str = None,
+    zone_type: str = None,
+    alert_type: str = None
+):
+    """
+    Server-Sent Events stream of new alerts (event id = alert id).
+    Resumes after the Last-Event-ID header (or ?since_id=) if given.
+    """
+    filters = _feed_filters(mine_ids, zone_type, alert_type)
+
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        since_id = int(header_id)
+
+    async def event_source():
+        last_id = since_id
+        wakeup = subscribe()
+        try:
+            while not await request.is_disconnected():
+                wakeup.clear()
+                try:
+                    alerts = await fetch_alerts_async(last_id, ALERTS_FEED_MAX_LIMIT, **filters)
+                except Exception as e:
+                    print(f"Error in stream_alerts: {e}")
+                    alerts = []
+
+                for alert in alerts:
+                    last_id = alert["id"]
+                    yield f"id: {last_id}\nevent: alert\ndata: {json.dumps(alert)}\n\n"
+
+                # A full page means more are waiting; fetch again right away
+                if len(alerts) == ALERTS_FEED_MAX_LIMIT:
+                    continue
+                if not alerts:
+                    yield ": keep-alive\n\n"
+                await _wait_for_alerts(wakeup, ALERTS_POLL_SECONDS)
+        finally:
+            unsubscribe(wakeup)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,71 @@
+# backend/api/http_cache.py
+
+"""
+HTTP conditional caching for the /mine endpoints.
+
+ETags are derived from the mine's data version (services/cache.py) and
+the request's endpoint + range, so they change exactly when a pipeline
+write touches the mine. A matching If-None-Match (or an If-Modified-Since
+not older than the last write) gets a 304 before any data query runs.
+"""
+
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+from config.settings import HTTP_CACHE_MAX_AGE_SECONDS
+
+
+def make_etag(endpoint, mine_id, version, *parts):
+    digest = hashlib.blake2b(
+        ":".join([endpoint, *map(str, parts)]).encode("utf-8"),
+        digest_size=8
+    ).hexdigest()
+    # Weak: the body may be re-encoded (gzip) on the way out
+    return f'W/"m{mine_id}-v{version}-{digest}"'
+
+
+def cache_headers(etag, updated_at=None):
+    headers = {
+        "ETag": etag,
+        # Revalidate after max-age; data changes whenever the pipeline runs
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE_SECONDS}, must-revalidate"
+    }
+    if updated_at is not None:
+        # format_datetime(usegmt=True) only accepts UTC datetimes
+        headers["Last-Modified"] = format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def _etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 §13.1.2): ignore W/ prefixes
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def is_not_modified(request: Request, etag, updated_at=None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and updated_at is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        # HTTP dates have 1 s resolution
+        return updated_at.replace(microsecond=0) <= since
+
+    return False
+
+
+def not_modified_response(headers):
+    return Response(status_code=304, headers=headers)
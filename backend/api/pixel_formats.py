@@ -0,0 +1,142 @@
+# backend/api/pixel_formats.py
+
+"""
+Response encodings for /mine/pixels.
+
+records  : JSON array of row objects (default, frontend compatible)
+columnar : JSON object of column arrays, {"date": [...], "b4": [...], ...}
+arrow    : Apache Arrow IPC stream
+parquet  : Parquet file (zstd)
+
+Each encoder takes the DataFrame from fetch_pixels_async and returns bytes.
+
+Streamed (stream_pixels_async batches, constant memory):
+ndjson   : one JSON object per line
+arrow    : Arrow IPC stream, one record batch per cursor batch
+"""
+
+import io
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def _records(df):
+    # orjson encodes dates and NaN (as null) natively
+    return orjson.dumps(df.to_dict(orient="records") if not df.empty else [])
+
+
+def _columnar(df):
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == object:
+            # dates (and anything else non-numeric) as ISO strings
+            columns[col] = values.map(lambda v: v.isoformat() if hasattr(v, "isoformat") else v).tolist()
+        else:
+            columns[col] = values.to_numpy()
+    return orjson.dumps(columns, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _arrow_table(df):
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _arrow_ipc(df):
+    table = _arrow_table(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _parquet(df):
+    buffer = io.BytesIO()
+    pq.write_table(_arrow_table(df), buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+# name -> media type and encoder
+PIXEL_FORMATS = {
+    "records": {"media_type": "application/json", "encode": _records},
+    "columnar": {"media_type": "application/json", "encode": _columnar},
+    "arrow": {"media_type": "application/vnd.apache.arrow.stream", "encode": _arrow_ipc},
+    "parquet": {"media_type": "application/vnd.apache.parquet", "encode": _parquet},
+}
+
+# Column types of pixels_sql(), as from_pandas infers them for _arrow_ipc
+PIXEL_ARROW_SCHEMA = pa.schema([
+    ("mine_id", pa.int64()),
+    ("pixel_id", pa.int64()),
+    ("date", pa.date32()),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("b4", pa.float64()),
+    ("b8", pa.float64()),
+    ("b11", pa.float64()),
+    ("ndvi", pa.float64()),
+    ("nbr", pa.float64()),
+    ("anomaly_label", pa.int64()),
+    ("anomaly_score", pa.float64()),
+    ("excavated_flag", pa.int64()),
+])
+
+
+async def _ndjson_stream(batches):
+    async for columns, rows in batches:
+        yield b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+async def _arrow_stream(batches):
+    buffer = io.BytesIO()
+
+    def drain():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer = pa.ipc.new_stream(buffer, PIXEL_ARROW_SCHEMA)
+    async for columns, rows in batches:
+        arrays = [
+            pa.array([row[columns.index(field.name)] for row in rows], type=field.type)
+            for field in PIXEL_ARROW_SCHEMA
+        ]
+        writer.write_batch(pa.record_batch(arrays, schema=PIXEL_ARROW_SCHEMA))
+        yield drain()
+
+    writer.close()
+    yield drain()
+
+
+# name -> media type and async encoder over (columns, rows) batches
+PIXEL_STREAM_FORMATS = {
+    "ndjson": {"media_type": "application/x-ndjson", "encode": _ndjson_stream},
+    "arrow": {"media_type": "application/vnd.apache.arrow.stream", "encode": _arrow_stream},
+}
+
+# Accept header media types that select a non-default format
+_ACCEPT_FORMATS = {
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/x-ndjson": "ndjson",
+}
+
+
+def negotiate_pixel_format(format_param, accept_header):
+    """
+    Format name from ?format= (wins) or the Accept header; "records" by
+    default. Returns None for an unknown ?format= value.
+    """
+    if format_param:
+        known = format_param in PIXEL_FORMATS or format_param in PIXEL_STREAM_FORMATS
+        return format_param if known else None
+
+    for media_range in (accept_header or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type in _ACCEPT_FORMATS:
+            return _ACCEPT_FORMATS[media_type]
+
+    return "records"
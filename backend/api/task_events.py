@@ -0,0 +1,77 @@
+# backend/api/task_events.py
+# In-process progress event log for pipeline tasks.
+# Pipelines publish from worker threads; SSE/WebSocket subscribers wait on
+# asyncio events that are set thread-safely on their own loop.
+
+import asyncio
+import threading
+
+from config.settings import TASK_EVENTS_MAX_PER_TASK
+
+# task_id -> list of (event_id, payload), oldest first
+TASK_EVENTS = {}
+
+# task_id -> set of (loop, asyncio.Event)
+_SUBSCRIBERS = {}
+
+_EVENTS_LOCK = threading.Lock()
+
+
+def publish_event(task_id: str, payload: dict) -> int:
+    """Append an event for a task and wake its subscribers. Returns the event id."""
+    with _EVENTS_LOCK:
+        events = TASK_EVENTS.setdefault(task_id, [])
+        event_id = events[-1][0] + 1 if events else 1
+        events.append((event_id, dict(payload)))
+
+        # Keep ids monotonic but only the most recent events in memory
+        if len(events) > TASK_EVENTS_MAX_PER_TASK:
+            del events[:len(events) - TASK_EVENTS_MAX_PER_TASK]
+
+        subscribers = list(_SUBSCRIBERS.get(task_id, ()))
+
+    for loop, wakeup in subscribers:
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            # Subscriber's loop already closed; it will be dropped on unsubscribe
+            pass
+
+    return event_id
+
+
+def events_since(task_id: str, last_event_id: int = 0):
+    """Return events with id greater than last_event_id"""
+    with _EVENTS_LOCK:
+        return [
+            (event_id, payload)
+            for event_id, payload in TASK_EVENTS.get(task_id, [])
+            if event_id > last_event_id
+        ]
+
+
+def subscribe(task_id: str) -> asyncio.Event:
+    """Register a subscriber on the running loop and return its wakeup event"""
+    wakeup = asyncio.Event()
+    entry = (asyncio.get_running_loop(), wakeup)
+    with _EVENTS_LOCK:
+        _SUBSCRIBERS.setdefault(task_id, set()).add(entry)
+    return wakeup
+
+
+def unsubscribe(task_id: str, wakeup: asyncio.Event):
+    """Remove a subscriber registered with subscribe()"""
+    with _EVENTS_LOCK:
+        subscribers = _SUBSCRIBERS.get(task_id)
+        if not subscribers:
+            return
+        for entry in [e for e in subscribers if e[1] is wakeup]:
+            subscribers.discard(entry)
+        if not subscribers:
+            _SUBSCRIBERS.pop(task_id, None)
+
+
+def drop_events(task_id: str):
+    """Forget a task's event log (used when the task is evicted)"""
+    with _EVENTS_LOCK:
+        TASK_EVENTS.pop(task_id, None)
@@ -1,43 +1,262 @@
 # backend/api/task_queue.py
-from fastapi import APIRouter, BackgroundTasks
-from fastapi.responses import JSONResponse
-from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime, timedelta
+import asyncio
+import json
+import os
+import threading
+import time
 import uuid
 
+from api.task_events import (
+    TASK_EVENTS,
+    publish_event,
+    events_since,
+    subscribe,
+    unsubscribe,
+    drop_events
+)
+from config.settings import (
+    TASK_STREAM_KEEPALIVE_SECONDS,
+    TASK_STORE_MAX_TASKS,
+    TASK_TTL_SECONDS,
+    TASK_RESULT_SPILL_BYTES,
+    TASK_RESULT_DIR
+)
+
 router = APIRouter()
 
-# Simple in-memory task store
+# In-memory task store, bounded by TASK_STORE_MAX_TASKS and TASK_TTL_SECONDS.
+# Insertion order doubles as age order for eviction.
 TASKS = {}
 
+# One lock per mine so two pipelines never fetch/insert the same mine at once
+MINE_LOCKS = {}
+
+# task_id -> threading.Event checked by the pipeline at stage/range boundaries
+CANCEL_EVENTS = {}
+
+# Guards TASKS bookkeeping and MINE_LOCKS creation across request threads
+_REGISTRY_LOCK = threading.Lock()
+
+ACTIVE_STATUSES = ("queued", "processing")
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "timed_out")
+
+
+def _task_snapshot(task_id: str, load_result: bool = True) -> dict:
+    """
+    Public view of a task, shared by the polling and streaming endpoints.
+    Spilled results are read back from disk only when load_result is set.
+    """
+    task = TASKS[task_id]
+
+    result = task.get("result")
+    if result is None and task.get("result_path") and load_result:
+        result = _load_spilled_result(task["result_path"])
+
+    return {
+        "task_id": task_id,
+        "status": task["status"],
+        "progress": task.get("progress", 0),
+        "message": task.get("message", ""),
+        "requested_range": task.get("requested_range"),
+        "range": task.get("range"),
+        "coalesced_requests": task.get("coalesced_requests", 1),
+        "result": result,
+        "result_spilled": bool(task.get("result_path")),
+        "error": task.get("error")
+    }
+
+
+def _update_task(task_id: str, **fields):
+    """Update a task and push the new state to stream subscribers"""
+    TASKS[task_id].update(fields)
+    # Events stay small: spilled results are fetched via /status instead
+    publish_event(task_id, _task_snapshot(task_id, load_result=False))
+
+
+def _spill_result(task_id: str, result):
+    """
+    Keep small results inline; write large ones to TASK_RESULT_DIR.
+    Returns the task fields to store.
+    """
+    payload = json.dumps(result, default=str)
+    if len(payload) <= TASK_RESULT_SPILL_BYTES:
+        return {"result": result}
+
+    os.makedirs(TASK_RESULT_DIR, exist_ok=True)
+    path = os.path.join(TASK_RESULT_DIR, f"{task_id}.json")
+    with open(path, "w") as f:
+        f.write(payload)
+
+    return {"result": None, "result_path": path, "result_bytes": len(payload)}
+
+
+def _load_spilled_result(path: str):
+    """Read a spilled result back; None if the file is gone"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Could not load spilled result {path}: {e}")
+        return None
+
+
+def _forget_task(task_id: str):
+    """Drop a task, its event log and any spilled result (caller holds _REGISTRY_LOCK)"""
+    task = TASKS.pop(task_id, None)
+    CANCEL_EVENTS.pop(task_id, None)
+    drop_events(task_id)
+    if task and task.get("result_path"):
+        try:
+            os.remove(task["result_path"])
+        except OSError:
+            pass
+
+
+def _evict_tasks(reserve: int = 0):
+    """
+    Evict finished tasks older than TASK_TTL_SECONDS, then the oldest
+    finished tasks until the store (plus `reserve` new slots) fits
+    TASK_STORE_MAX_TASKS. Active tasks are never evicted.
+    Caller holds _REGISTRY_LOCK.
+    """
+    now = time.time()
+    finished = [
+        task_id for task_id, task in TASKS.items()
+        if task["status"] in TERMINAL_STATUSES
+    ]
+
+    evicted = 0
+    for task_id in finished:
+        expired = now - TASKS[task_id].get("finished_at", now) > TASK_TTL_SECONDS
+        over_cap = len(TASKS) + reserve > TASK_STORE_MAX_TASKS
+        if expired or over_cap:
+            _forget_task(task_id)
+            evicted += 1
+
+    if evicted:
+        print(f"[DEBUG] Evicted {evicted} finished task(s); {len(TASKS)} remain")
+
+
+def get_mine_lock(mine_id: int) -> threading.Lock:
+    """Return the lock that serializes pipeline work for a mine"""
+    with _REGISTRY_LOCK:
+        if mine_id not in MINE_LOCKS:
+            MINE_LOCKS[mine_id] = threading.Lock()
+        return MINE_LOCKS[mine_id]
+
+
+def _active_tasks_for_mine(mine_id: int):
+    """Tasks for this mine that are queued or running (caller holds _REGISTRY_LOCK)"""
+    return [
+        (task_id, task)
+        for task_id, task in TASKS.items()
+        if task["mine_id"] == mine_id and task["status"] in ACTIVE_STATUSES
+    ]
+
+
+def _trim_against_inflight(start, end, active):
+    """
+    Dates of [start, end] not covered by in-flight tasks, trimmed at the
+    edges (a gap in the middle is kept). Used to detect fully covered
+    requests and for reporting only: a new task still runs its requested
+    range, since an overlapping task may fail or be cancelled, and the
+    pipeline skips dates already written once it holds the mine lock.
+    Returns (start, end, overlapping_task_ids).
+    """
+    overlapping = []
+    changed = True
+
+    while changed and start <= end:
+        changed = False
+        for task_id, task in active:
+            t_start = datetime.strptime(task["requested_range"]["start"], "%Y-%m-%d").date()
+            t_end = datetime.strptime(task["requested_range"]["end"], "%Y-%m-%d").date()
+
+            if t_end < start or t_start > end:
+                continue
+
+            if task_id not in overlapping:
+                overlapping.append(task_id)
+
+            if t_start <= start <= t_end:
+                start = t_end + timedelta(days=1)
+                changed = True
+            if start <= end and t_start <= end <= t_end:
+                end = t_start - timedelta(days=1)
+                changed = True
+
+    return start, end, overlapping
+
+
 def run_pipeline_background(task_id: str, mine_id: int, start_date: str, end_date: str):
     """Run pipeline in background with progress tracking"""
-    from processing.admin_processor import run_admin_pipeline
-    
+    from processing.admin_processor import run_admin_pipeline, PipelineAborted
+
+    cancel_event = CANCEL_EVENTS[task_id]
+
     try:
-        TASKS[task_id]["status"] = "processing"
-        TASKS[task_id]["progress"] = 5
-        
-        # Pass callback to update progress
-        def update_progress(progress_pct, message=""):
-            TASKS[task_id]["progress"] = progress_pct
-            if message:
-                TASKS[task_id]["message"] = message
-        
-        result = run_admin_pipeline(
-            mine_id=mine_id,
-            start_date=start_date,
-            end_date=end_date,
-            progress_callback=update_progress
+        lock = get_mine_lock(mine_id)
+        if lock.locked():
+            _update_task(task_id, message="Waiting for another job on this mine...")
+
+        # Poll so a cancel while queued behind another job ends the task at once
+        while not lock.acquire(timeout=1):
+            if cancel_event.is_set():
+                raise PipelineAborted("cancelled", "Cancelled while waiting for the mine lock", None)
+
+        try:
+            if cancel_event.is_set():
+                raise PipelineAborted("cancelled", "Cancelled before start", None)
+
+            _update_task(task_id, status="processing", progress=5)
+
+            # Pass callback to update progress
+            def update_progress(progress_pct, message=""):
+                if message:
+                    _update_task(task_id, progress=progress_pct, message=message)
+                else:
+                    _update_task(task_id, progress=progress_pct)
+
+            result = run_admin_pipeline(
+                mine_id=mine_id,
+                start_date=start_date,
+                end_date=end_date,
+                progress_callback=update_progress,
+                cancel_event=cancel_event
+            )
+        finally:
+            lock.release()
+
+        _update_task(
+            task_id,
+            status="completed",
+            progress=100,
+            message="Completed!",
+            finished_at=time.time(),
+            **_spill_result(task_id, result)
         )
-        
-        TASKS[task_id]["status"] = "completed"
-        TASKS[task_id]["progress"] = 100
-        TASKS[task_id]["message"] = "Completed!"
-        TASKS[task_id]["result"] = result
+    except PipelineAborted as e:
+        # Committed ranges stay in the database; report them as the result
+        _update_task(
+            task_id,
+            status=e.reason,
+            message=str(e),
+            error=str(e),
+            finished_at=time.time(),
+            **_spill_result(task_id, e.committed)
+        )
+        print(f"[DEBUG] Task {task_id} {e.reason}: {e}")
     except Exception as e:
-        TASKS[task_id]["status"] = "failed"
-        TASKS[task_id]["progress"] = 0
-        TASKS[task_id]["error"] = str(e)
+        _update_task(
+            task_id,
+            status="failed",
+            progress=0,
+            error=str(e),
+            finished_at=time.time()
+        )
         print(f"[ERROR] Task {task_id} failed: {e}")
 
 @router.post("/submit")
@@ -47,17 +266,74 @@ def submit_pipeline(
     end_date: str,
     background_tasks: BackgroundTasks
 ):
-    """Submit pipeline task and return immediately with task ID"""
-    task_id = str(uuid.uuid4())
-    
-    TASKS[task_id] = {
-        "status": "queued",
-        "mine_id": mine_id,
-        "progress": 0,
-        "message": "Queued for processing",
-        "created_at": datetime.now().isoformat()
-    }
-    
+    """
+    Submit pipeline task and return immediately with task ID.
+
+    Requests already covered by queued/running tasks for the same mine
+    are coalesced onto those tasks (task_ids). Otherwise a new task runs
+    the full requested range; `range` reports the part not covered by
+    in-flight tasks (depends_on).
+    """
+    try:
+        req_start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        req_end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        return JSONResponse(
+            {"error": "Invalid date format. Use YYYY-MM-DD"},
+            status_code=400
+        )
+
+    with _REGISTRY_LOCK:
+        _evict_tasks(reserve=1)
+
+        active = _active_tasks_for_mine(mine_id)
+        eff_start, eff_end, overlapping = _trim_against_inflight(
+            req_start, req_end, active
+        )
+
+        if overlapping and eff_start > eff_end:
+            # Fully covered by in-flight work → observe every covering task.
+            # task_id is set only when one task covers the whole request.
+            single = []
+            for task_id in overlapping:
+                s, e, _ = _trim_against_inflight(req_start, req_end, [(task_id, TASKS[task_id])])
+                if s > e:
+                    single.append(task_id)
+            covering = single[-1:] or overlapping
+            for task_id in covering:
+                TASKS[task_id]["coalesced_requests"] += 1
+            print(f"[DEBUG] Coalesced request for mine {mine_id} onto tasks {covering}")
+            return {
+                "task_id": covering[0] if len(covering) == 1 else None,
+                "task_ids": covering,
+                "status": TASKS[covering[-1]]["status"],
+                "coalesced": True,
+                "coalesced_with": covering
+            }
+
+        if len(TASKS) >= TASK_STORE_MAX_TASKS:
+            return JSONResponse(
+                {"error": "Too many active tasks, try again later"},
+                status_code=429
+            )
+
+        task_id = str(uuid.uuid4())
+
+        TASKS[task_id] = {
+            "status": "queued",
+            "mine_id": mine_id,
+            "progress": 0,
+            "message": "Queued for processing",
+            "created_at": datetime.now().isoformat(),
+            "requested_range": {"start": start_date, "end": end_date},
+            # Part not already covered by in-flight tasks (informational)
+            "range": {"start": str(eff_start), "end": str(eff_end)},
+            "depends_on": overlapping,
+            "coalesced_requests": 1
+        }
+        CANCEL_EVENTS[task_id] = threading.Event()
+        publish_event(task_id, _task_snapshot(task_id))
+
     # Add background task
     background_tasks.add_task(
         run_pipeline_background,
@@ -66,27 +342,172 @@ def submit_pipeline(
         start_date,
         end_date
     )
-    
+
     return {
         "task_id": task_id,
-        "status": "queued"
+        "task_ids": [task_id],
+        "status": "queued",
+        "coalesced": False,
+        "requested_range": {"start": start_date, "end": end_date},
+        "range": {"start": str(eff_start), "end": str(eff_end)},
+        "depends_on": overlapping
     }
 
 @router.get("/status/{task_id}")
 def get_task_status(task_id: str):
     """Get status of a submitted task"""
+    with _REGISTRY_LOCK:
+        _evict_tasks()
+
     if task_id not in TASKS:
         return JSONResponse(
             {"error": "Task not found"},
             status_code=404
         )
-    
-    task = TASKS[task_id]
+
+    return _task_snapshot(task_id)
+
+@router.post("/cancel/{task_id}")
+def cancel_task(task_id: str):
+    """
+    Request cancellation of a queued or running task. The pipeline stops
+    at its next stage/range boundary; ranges already written are kept and
+    reported in the task result. Coalesced callers share the cancellation.
+    """
+    with _REGISTRY_LOCK:
+        if task_id not in TASKS:
+            return JSONResponse(
+                {"error": "Task not found"},
+                status_code=404
+            )
+
+        task = TASKS[task_id]
+        if task["status"] in TERMINAL_STATUSES:
+            return JSONResponse(
+                {"error": f"Task already {task['status']}"},
+                status_code=409
+            )
+
+        CANCEL_EVENTS[task_id].set()
+
+    _update_task(task_id, message="Cancellation requested...")
+
     return {
         "task_id": task_id,
         "status": task["status"],
-        "progress": task.get("progress", 0),
-        "message": task.get("message", ""),
-        "result": task.get("result"),
-        "error": task.get("error")
+        "cancel_requested": True,
+        "coalesced_requests": task.get("coalesced_requests", 1)
     }
+
+@router.get("/metrics/tasks")
+def get_task_store_metrics():
+    """Size and approximate memory use of the in-memory task store"""
+    with _REGISTRY_LOCK:
+        _evict_tasks()
+        tasks = list(TASKS.values())
+        task_bytes = sum(len(json.dumps(t, default=str)) for t in tasks)
+        event_logs = [list(TASK_EVENTS.get(task_id, [])) for task_id in TASKS]
+
+    event_bytes = sum(
+        len(json.dumps(payload, default=str))
+        for events in event_logs
+        for _, payload in events
+    )
+
+    return {
+        "tasks": len(tasks),
+        "active": sum(1 for t in tasks if t["status"] in ACTIVE_STATUSES),
+        "finished": sum(1 for t in tasks if t["status"] in TERMINAL_STATUSES),
+        "spilled_results": sum(1 for t in tasks if t.get("result_path")),
+        "spilled_bytes": sum(t.get("result_bytes", 0) for t in tasks),
+        "events": sum(len(events) for events in event_logs),
+        "approx_memory_bytes": task_bytes + event_bytes,
+        "max_tasks": TASK_STORE_MAX_TASKS,
+        "ttl_seconds": TASK_TTL_SECONDS
+    }
+
+
+async def _iter_task_events(task_id: str, last_event_id: int):
+    """
+    Yield (event_id, payload) for a task, starting after last_event_id,
+    until the task reaches a terminal state. Yields None on idle timeouts
+    so callers can send keep-alives and check for disconnects.
+    """
+    wakeup = subscribe(task_id)
+    try:
+        while True:
+            wakeup.clear()
+            pending = events_since(task_id, last_event_id)
+
+            for event_id, payload in pending:
+                last_event_id = event_id
+                yield event_id, payload
+                if payload["status"] in TERMINAL_STATUSES:
+                    return
+
+            # Resumed after the final event, or the task was evicted
+            task = TASKS.get(task_id)
+            if task is None or (not pending and task["status"] in TERMINAL_STATUSES):
+                return
+
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=TASK_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+    finally:
+        unsubscribe(task_id, wakeup)
+
+
+@router.get("/stream/{task_id}")
+async def stream_task_status(task_id: str, request: Request, last_event_id: int = 0):
+    """
+    Server-Sent Events stream of task progress.
+    Resumes after the Last-Event-ID header (or ?last_event_id=) if given.
+    """
+    if task_id not in TASKS:
+        return JSONResponse(
+            {"error": "Task not found"},
+            status_code=404
+        )
+
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+
+    async def event_source():
+        async for item in _iter_task_events(task_id, last_event_id):
+            if await request.is_disconnected():
+                return
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            event_id, payload = item
+            yield f"id: {event_id}\nevent: progress\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws/{task_id}")
+async def websocket_task_status(websocket: WebSocket, task_id: str, last_event_id: int = 0):
+    """WebSocket stream of task progress; each message carries its event id"""
+    await websocket.accept()
+
+    if task_id not in TASKS:
+        await websocket.send_json({"error": "Task not found"})
+        await websocket.close(code=4404)
+        return
+
+    try:
+        async for item in _iter_task_events(task_id, last_event_id):
+            if item is None:
+                await websocket.send_json({"type": "keep-alive"})
+                continue
+            event_id, payload = item
+            await websocket.send_text(json.dumps({"id": event_id, **payload}, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
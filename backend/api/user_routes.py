@@ -1,15 +1,152 @@
 # backend/api/user_routes.py
 
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
-from services.db_reader import fetch_pixels, fetch_mine_details, fetch_mine_kpi, get_violation_statistics, get_excavation_compliance
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from services.db_reader_async import (
+    fetch_pixels_async,
+    stream_pixels_async,
+    fetch_mine_details_async,
+    fetch_mine_kpi_async,
+    fetch_mines_kpi_async,
+    get_violation_statistics_async,
+    get_excavation_compliance_async,
+    get_spectral_signature_async,
+    get_pixel_grid_async,
+    get_pixel_history_async,
+    get_mine_catalog_async,
+    search_mines_async
+)
+from services.cache import (
+    cache_key,
+    cache_get,
+    cache_set,
+    get_mine_state_async,
+    to_json_bytes
+)
+from api.http_cache import (
+    make_etag,
+    cache_headers,
+    is_not_modified,
+    not_modified_response
+)
+from services.db_reader import format_pixel_cursor, parse_pixel_cursor, parse_bbox, KPI_SORT_COLUMNS
+from api.pixel_formats import (
+    PIXEL_FORMATS,
+    PIXEL_STREAM_FORMATS,
+    negotiate_pixel_format
+)
+from services.tiles import TILE_LAYERS, get_tile_async
+from config.settings import (
+    PIXEL_PAGE_MAX_ROWS,
+    GRID_DEFAULT_ZOOM,
+    CATALOG_MAX_LIMIT,
+    KPI_BULK_MAX_LIMIT,
+    PIXEL_HISTORY_MAX_DISTANCE_M
+)
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
+
+async def _cached(
+    request,
+    endpoint,
+    mine_id,
+    parts,
+    produce,
+    cacheable=bool,
+    not_found=None,
+    encode=to_json_bytes,
+    media_type="application/json",
+    extra_headers=None,
+    headers_for=None
+):
+    """
+    Serve a body keyed by the mine's current data version: 304 when the
+    client's validators still match, else from the response cache, else
+    `encode(await produce())`. Results failing `cacheable` (e.g. empty
+    fallbacks after a DB error) are neither stored nor given validators.
+    `produce()` returning None with `not_found` set → 404.
+    `headers_for(value)` adds value-dependent headers; such responses
+    get validators but skip the response cache.
+    """
+    state = await get_mine_state_async(mine_id)
+    if state is None:
+        # Version unknown → cannot tell fresh from stale, bypass caching
+        value = await produce()
+        if value is None and not_found:
+            return JSONResponse({"error": not_found}, status_code=404)
+        return Response(content=encode(value), media_type=media_type, headers=extra_headers)
+
+    version, updated_at = state
+    headers = cache_headers(make_etag(endpoint, mine_id, version, *parts), updated_at)
+    headers.update(extra_headers or {})
+    if is_not_modified(request, headers["ETag"], updated_at):
+        return not_modified_response(headers)
+
+    key = cache_key(endpoint, mine_id, version, *parts)
+
+    body = await cache_get(key) if headers_for is None else None
+    if body is None:
+        value = await produce()
+        if value is None and not_found:
+            return JSONResponse({"error": not_found}, status_code=404)
+        body = encode(value)
+        if not cacheable(value):
+            return Response(content=body, media_type=media_type, headers=extra_headers)
+        if headers_for is None:
+            await cache_set(key, body)
+        else:
+            headers.update(headers_for(value))
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+async def _stream_pixels(mine_id, start, end, cursor, fmt):
+    """
+    StreamingResponse over a server-side cursor. The first batch is read
+    before responding, so connection/query errors still get a 500.
+    """
+    batches = stream_pixels_async(mine_id, start, end, cursor=cursor)
+    first = await anext(batches, None)
+
+    async def all_batches():
+        # Closing `batches` closes its cursor and returns the connection,
+        # also when the client disconnects mid-stream
+        try:
+            if first is not None:
+                yield first
+                async for batch in batches:
+                    yield batch
+        finally:
+            await batches.aclose()
+
+    return StreamingResponse(
+        PIXEL_STREAM_FORMATS[fmt]["encode"](all_batches()),
+        media_type=PIXEL_STREAM_FORMATS[fmt]["media_type"],
+        headers={"Vary": "Accept"}
+    )
+
+
 @router.get("/pixels")
-def get_pixels(mine_id: str, start: str = None, end: str = None):
-    """Fetch pixel-level spectral data for a mine"""
+async def get_pixels(
+    request: Request,
+    mine_id: str,
+    start: str = None,
+    end: str = None,
+    format: str = None,
+    limit: int = None,
+    cursor: str = None,
+    stream: bool = False
+):
+    """
+    Fetch pixel-level spectral data for a mine.
+    format: records (default) | columnar | arrow | parquet | ndjson, or
+    negotiated from the Accept header (see api/pixel_formats.py)
+    limit/cursor: keyset pages in (date, pixel_id) order; the next page's
+    cursor is returned in X-Next-Cursor
+    stream: send ndjson/arrow as it is read from a server-side cursor
+    """
     try:
         # Convert mine_id to int
         try:
@@ -22,31 +159,140 @@ def get_pixels(mine_id: str, start: str = None, end: str = None):
         if not end:
             end = datetime.now().strftime("%Y-%m-%d")
         
-        df = fetch_pixels(mine_id, start, end)
-        
-        # Always return array directly for frontend compatibility
-        if df.empty:
-            return []
-        
-        return df.to_dict(orient="records")
+        fmt = negotiate_pixel_format(format, request.headers.get("accept"))
+        if fmt is None:
+            expected = list(PIXEL_FORMATS) + ["ndjson"]
+            return JSONResponse(
+                {"error": f"Unsupported format '{format}', expected one of {expected}"},
+                status_code=400
+            )
+
+        if cursor:
+            try:
+                parse_pixel_cursor(cursor)
+            except ValueError:
+                return JSONResponse({"error": "Invalid cursor"}, status_code=400)
+
+        # ndjson only exists as a stream
+        if stream or fmt == "ndjson":
+            if fmt not in PIXEL_STREAM_FORMATS:
+                return JSONResponse(
+                    {"error": f"Streaming supports {list(PIXEL_STREAM_FORMATS)}"},
+                    status_code=400
+                )
+            if limit:
+                return JSONResponse({"error": "limit cannot be combined with stream"}, status_code=400)
+            return await _stream_pixels(mine_id, start, end, cursor, fmt)
+
+        if limit is not None and not 1 <= limit <= PIXEL_PAGE_MAX_ROWS:
+            return JSONResponse(
+                {"error": f"limit must be between 1 and {PIXEL_PAGE_MAX_ROWS}"},
+                status_code=400
+            )
+
+        def next_cursor(df):
+            # A full page may have more rows after it
+            if not limit or len(df) < limit:
+                return {}
+            last = df.iloc[-1]
+            return {"X-Next-Cursor": format_pixel_cursor(last["date"], last["pixel_id"])}
+
+        return await _cached(
+            request, "pixels", mine_id, (start, end, fmt, cursor, limit),
+            lambda: fetch_pixels_async(mine_id, start, end, cursor=cursor, limit=limit),
+            cacheable=lambda df: not df.empty,
+            encode=PIXEL_FORMATS[fmt]["encode"],
+            media_type=PIXEL_FORMATS[fmt]["media_type"],
+            extra_headers={"Vary": "Accept"},
+            headers_for=next_cursor if limit else None
+        )
     except Exception as e:
         print(f"Error in get_pixels: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
 
+@router.get("/pixel-history/{mine_id}")
+async def get_pixel_history(request: Request, mine_id: int, lat: float, lon: float):
+    """
+    Spectral and anomaly history (all dates, columnar) of the pixel
+    nearest to a clicked map point
+    """
+    try:
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return JSONResponse({"error": "lat/lon out of range"}, status_code=400)
+
+        return await _cached(
+            request, "pixel-history", mine_id, (lat, lon),
+            lambda: get_pixel_history_async(mine_id, lat, lon),
+            not_found=f"No pixel of mine {mine_id} within {PIXEL_HISTORY_MAX_DISTANCE_M:g} m of ({lat}, {lon})"
+        )
+    except Exception as e:
+        print(f"Error in get_pixel_history: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
 @router.get("/details/{mine_id}")
-def get_mine_details(mine_id: int):
+async def get_mine_details(request: Request, mine_id: int):
     """Fetch mine details including geometry and properties"""
     try:
-        details = fetch_mine_details(mine_id)
-        if details is None:
-            return JSONResponse({"error": f"Mine {mine_id} not found"}, status_code=404)
-        return details
+        return await _cached(
+            request, "details", mine_id, (),
+            lambda: fetch_mine_details_async(mine_id),
+            not_found=f"Mine {mine_id} not found"
+        )
     except Exception as e:
         print(f"Error in get_mine_details: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
 
+@router.get("/kpi")
+async def get_mines_kpi(
+    mine_ids: str = None,
+    start: str = None,
+    end: str = None,
+    sort: str = "excavated_percentage",
+    order: str = "desc",
+    limit: int = None
+):
+    """
+    KPI metrics for many mines in one request (summary dashboard).
+    mine_ids: comma separated; omitted means every mine with data
+    sort: excavated_percentage | excavated_area | violation_area |
+          max_anomaly_score | mine_id
+    """
+    try:
+        if not start:
+            start = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        if not end:
+            end = datetime.now().strftime("%Y-%m-%d")
+
+        if sort not in KPI_SORT_COLUMNS:
+            return JSONResponse(
+                {"error": f"Unsupported sort '{sort}', expected one of {list(KPI_SORT_COLUMNS)}"},
+                status_code=400
+            )
+        if order not in ("asc", "desc"):
+            return JSONResponse({"error": "order must be asc or desc"}, status_code=400)
+        if limit is not None and not 1 <= limit <= KPI_BULK_MAX_LIMIT:
+            return JSONResponse({"error": f"limit must be between 1 and {KPI_BULK_MAX_LIMIT}"}, status_code=400)
+
+        ids = None
+        if mine_ids is not None:
+            try:
+                ids = list(dict.fromkeys(int(i) for i in mine_ids.split(",") if i.strip()))
+            except ValueError:
+                return JSONResponse({"error": "mine_ids must be comma separated integers"}, status_code=400)
+            # An empty selection is not "every mine"
+            if not ids:
+                return JSONResponse({"error": "mine_ids must list at least one mine"}, status_code=400)
+
+        kpis = await fetch_mines_kpi_async(start, end, ids, sort, order == "desc", limit)
+        if kpis is None:
+            return JSONResponse({"error": "Failed to fetch KPIs"}, status_code=500)
+        return kpis
+    except Exception as e:
+        print(f"Error in get_mines_kpi: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
 @router.get("/kpi/{mine_id}")
-def get_mine_kpi(mine_id: int, start: str = None, end: str = None):
+async def get_mine_kpi(request: Request, mine_id: int, start: str = None, end: str = None):
     """Fetch KPI metrics for a mine"""
     try:
         if not start:
@@ -54,13 +300,17 @@ def get_mine_kpi(mine_id: int, start: str = None, end: str = None):
         if not end:
             end = datetime.now().strftime("%Y-%m-%d")
         
-        return fetch_mine_kpi(mine_id, start, end)
+        return await _cached(
+            request, "kpi", mine_id, (start, end),
+            lambda: fetch_mine_kpi_async(mine_id, start, end),
+            cacheable=lambda kpi: kpi.get("total_pixels", 0) > 0
+        )
     except Exception as e:
         print(f"Error in get_mine_kpi: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @router.get("/spectral-signature/{mine_id}")
-def get_spectral_signature(mine_id: int, start: str = None, end: str = None):
+async def get_spectral_signature(request: Request, mine_id: int, start: str = None, end: str = None):
     """Fetch aggregated spectral data for radar chart"""
     try:
         if not start:
@@ -68,29 +318,17 @@ def get_spectral_signature(mine_id: int, start: str = None, end: str = None):
         if not end:
             end = datetime.now().strftime("%Y-%m-%d")
         
-        df = fetch_pixels(mine_id, start, end)
-        if df.empty:
-            return {"normal": {}, "anomalous": {}}
-        
-        # Separate normal and anomalous pixels
-        normal = df[df['anomaly_label'] == -1]
-        anomalous = df[df['anomaly_label'] == 1]
-        
-        # Compute mean values
-        bands = ['b4', 'b8', 'b11', 'ndvi', 'nbr']
-        
-        result = {
-            "normal": {band: float(normal[band].mean()) if len(normal) > 0 else 0 for band in bands},
-            "anomalous": {band: float(anomalous[band].mean()) if len(anomalous) > 0 else 0 for band in bands}
-        }
-        
-        return result
+        return await _cached(
+            request, "spectral-signature", mine_id, (start, end),
+            lambda: get_spectral_signature_async(mine_id, start, end),
+            cacheable=lambda sig: bool(sig["normal"] or sig["anomalous"])
+        )
     except Exception as e:
         print(f"Error in get_spectral_signature: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @router.get("/violations/{mine_id}")
-def get_violations(mine_id: int, start: str = None, end: str = None):
+async def get_violations(request: Request, mine_id: int, start: str = None, end: str = None):
     """Fetch violation statistics for a mine"""
     try:
         if not start:
@@ -98,13 +336,16 @@ def get_violations(mine_id: int, start: str = None, end: str = None):
         if not end:
             end = datetime.now().strftime("%Y-%m-%d")
         
-        return get_violation_statistics(mine_id, start, end)
+        return await _cached(
+            request, "violations", mine_id, (start, end),
+            lambda: get_violation_statistics_async(mine_id, start, end)
+        )
     except Exception as e:
         print(f"Error in get_violations: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @router.get("/compliance/{mine_id}")
-def get_compliance(mine_id: int, start: str = None, end: str = None):
+async def get_compliance(request: Request, mine_id: int, start: str = None, end: str = None):
     """Fetch excavation compliance data for a mine"""
     try:
         if not start:
@@ -112,6 +353,132 @@ def get_compliance(mine_id: int, start: str = None, end: str = None):
         if not end:
             end = datetime.now().strftime("%Y-%m-%d")
         
-        return get_excavation_compliance(mine_id, start, end)
+        return await _cached(
+            request, "compliance", mine_id, (start, end),
+            lambda: get_excavation_compliance_async(mine_id, start, end)
+        )
     except Exception as e:
         print(f"Error in get_compliance: {e}")
+
+@router.get("/grid/{mine_id}")
+async def get_pixel_grid(
+    request: Request,
+    mine_id: int,
+    start: str = None,
+    end: str = None,
+    zoom: int = GRID_DEFAULT_ZOOM,
+    bbox: str = None
+):
+    """
+    Pixels binned onto a zoom-dependent grid for the map views: mean NDVI,
+    mean anomaly score, anomaly fraction and excavated count per cell.
+    bbox: "min_lon,min_lat,max_lon,max_lat" (the visible map extent)
+    """
+    try:
+        if not start:
+            start = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        if not end:
+            end = datetime.now().strftime("%Y-%m-%d")
+
+        if not 0 <= zoom <= 24:
+            return JSONResponse({"error": "zoom must be between 0 and 24"}, status_code=400)
+
+        if bbox:
+            try:
+                parse_bbox(bbox)
+            except ValueError:
+                return JSONResponse(
+                    {"error": "bbox must be min_lon,min_lat,max_lon,max_lat"},
+                    status_code=400
+                )
+
+        return await _cached(
+            request, "grid", mine_id, (start, end, zoom, bbox),
+            lambda: get_pixel_grid_async(mine_id, start, end, zoom, bbox),
+            cacheable=lambda grid: bool(grid["cells"])
+        )
+    except Exception as e:
+        print(f"Error in get_pixel_grid: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.get("/tiles/{mine_id}/{layer}/{z}/{x}/{y}.png")
+async def get_tile(
+    request: Request,
+    mine_id: int,
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    start: str = None,
+    end: str = None
+):
+    """
+    XYZ map tile (PNG) of a pixel layer: ndvi | anomaly | excavated.
+    Without start/end the tile covers the mine's full history.
+    """
+    try:
+        if bool(start) != bool(end):
+            return JSONResponse({"error": "start and end must be given together"}, status_code=400)
+        if layer not in TILE_LAYERS:
+            return JSONResponse(
+                {"error": f"Unknown layer '{layer}', expected one of {list(TILE_LAYERS)}"},
+                status_code=400
+            )
+        if not 0 <= z <= 24 or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            return JSONResponse({"error": "Tile out of range"}, status_code=400)
+
+        return await _cached(
+            request, "tiles", mine_id, (layer, z, x, y, start, end),
+            lambda: get_tile_async(mine_id, layer, z, x, y, start, end),
+            encode=lambda png: png,
+            media_type="image/png"
+        )
+    except Exception as e:
+        print(f"Error in get_tile: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.get("/catalog")
+async def get_mine_catalog(
+    zoom: int = 5,
+    bbox: str = None,
+    limit: int = 100,
+    offset: int = 0
+):
+    """
+    Mine catalog (GeoJSON), paginated with limit/offset. Geometries are
+    precomputed per zoom level (centroids when zoomed out).
+    bbox: "min_lon,min_lat,max_lon,max_lat" (the visible map extent)
+    """
+    if not 0 <= zoom <= 24:
+        return JSONResponse({"error": "zoom must be between 0 and 24"}, status_code=400)
+    if not 1 <= limit <= CATALOG_MAX_LIMIT or offset < 0:
+        return JSONResponse(
+            {"error": f"limit must be between 1 and {CATALOG_MAX_LIMIT}, offset >= 0"},
+            status_code=400
+        )
+    if bbox:
+        try:
+            parse_bbox(bbox)
+        except ValueError:
+            return JSONResponse(
+                {"error": "bbox must be min_lon,min_lat,max_lon,max_lat"},
+                status_code=400
+            )
+
+    catalog = await get_mine_catalog_async(zoom, bbox, limit, offset)
+    if catalog is None:
+        return JSONResponse({"error": "Failed to fetch mine catalog"}, status_code=500)
+    return catalog
+
+@router.get("/catalog/search")
+async def search_mines(q: str, limit: int = 20):
+    """Search mines by name, state, district or subdistrict (search bar)"""
+    if not q.strip():
+        return []
+    if not 1 <= limit <= CATALOG_MAX_LIMIT:
+        return JSONResponse({"error": f"limit must be between 1 and {CATALOG_MAX_LIMIT}"}, status_code=400)
+
+    results = await search_mines_async(q, limit)
+    if results is None:
+        return JSONResponse({"error": "Failed to search mines"}, status_code=500)
+    return results
@@ -1,10 +1,14 @@
 # app.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from api.admin_routes import router as admin_router
 from api.user_routes import router as user_router
 from api.task_queue import router as task_router
-from db.connection import initialize_db
+from api.alerts_routes import router as alerts_router
+from db.connection import initialize_db, get_engine, dispose_async_engine
+from db.schema import migrate, pending_migrations
+from config.settings import DB_AUTO_MIGRATE, GZIP_MINIMUM_SIZE
 
 
 app = FastAPI(title="Adaptive Mining Monitoring")
@@ -15,6 +19,34 @@ def startup_event():
     print("🚀 Starting up backend...")
     initialize_db()
 
+    engine = get_engine()
+    if engine is None:
+        return
+
+    if DB_AUTO_MIGRATE:
+        try:
+            migrate(engine)
+        except Exception as e:
+            # Serving against a half-migrated schema is worse than not starting
+            print(f"❌ Schema migration failed: {e}")
+            raise
+        return
+
+    try:
+        pending = pending_migrations(engine)
+    except Exception as e:
+        print(f"⚠️  Could not check schema migrations: {e}")
+        return
+    if pending:
+        print(
+            f"⚠️  {len(pending)} schema migration(s) pending "
+            f"({', '.join(str(m[0]) for m in pending)}); run: python -m db.schema"
+        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await dispose_async_engine()
+
 # Enable CORS for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -22,11 +54,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # /mine/pixels keyset pagination
 )
 
+# Compress large responses (e.g. /mine/pixels) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
 app.include_router(admin_router, prefix="/admin")
 app.include_router(user_router, prefix="/mine")
 app.include_router(task_router, prefix="/admin")  # Task endpoints at /admin/submit and /admin/status
+app.include_router(alerts_router, prefix="/alerts")
 
 @app.get("/health")
 def health():
@@ -0,0 +1,114 @@
+# backend/benchmarks/bench_db_write.py
+#
+# Compare the legacy to_postgis INSERT path with COPY + staging-table upsert
+# for pixel_timeseries writes.
+#
+# Usage (from backend/, against a scratch database):
+#   python -m benchmarks.bench_db_write
+#   python -m benchmarks.bench_db_write --sizes 10000 100000 --methods copy
+#
+# Rows are written under negative mine_ids and deleted afterwards.
+
+import argparse
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from db.connection import get_engine
+from services.db_write import insert_pixels
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+PIXELS_PER_DATE = 5_000
+
+
+def make_pixels(n_rows: int, mine_id: int) -> gpd.GeoDataFrame:
+    """Synthetic pixel rows shaped like normalize_df() output"""
+    rng = np.random.default_rng(42)
+    n_dates = max(1, n_rows // PIXELS_PER_DATE)
+    pixel_idx = np.arange(n_rows) % PIXELS_PER_DATE
+    date_idx = np.arange(n_rows) // PIXELS_PER_DATE
+
+    lat = 23.0 + (pixel_idx // 100) * 0.0001
+    lon = 82.0 + (pixel_idx % 100) * 0.0001
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(date_idx * 21, unit="D")
+
+    df = pd.DataFrame({
+        "mine_id": mine_id,
+        # Synthetic ids; the registry is not involved in the write path
+        "pixel_id": pixel_idx + 1,
+        "date": dates.date,
+        "latitude": lat,
+        "longitude": lon,
+        "b4": rng.normal(size=n_rows),
+        "b8": rng.normal(size=n_rows),
+        "b11": rng.normal(size=n_rows),
+        "ndvi": rng.normal(size=n_rows),
+        "nbr": rng.normal(size=n_rows),
+        "anomaly_label": rng.choice([-1, 1], size=n_rows),
+        "anomaly_score": rng.normal(size=n_rows),
+        "excavated_flag": rng.integers(0, 2, size=n_rows),
+    })
+
+    print(f"  generated {n_rows} rows over {n_dates} dates")
+    return gpd.GeoDataFrame(
+        df,
+        geometry=gpd.points_from_xy(df.longitude, df.latitude),
+        crs="EPSG:4326"
+    )
+
+
+def _cleanup(mine_id: int):
+    with get_engine().begin() as conn:
+        conn.execute(
+            text("DELETE FROM pixel_timeseries WHERE mine_id = :mine_id"),
+            {"mine_id": mine_id}
+        )
+
+
+def run(sizes, methods):
+    results = []
+
+    for size_idx, n_rows in enumerate(sizes):
+        print(f"\n[BENCH] {n_rows} rows")
+        gdf = make_pixels(n_rows, mine_id=-1)
+
+        for method_idx, method in enumerate(methods):
+            mine_id = -(1 + size_idx * len(methods) + method_idx)
+            gdf["mine_id"] = mine_id
+            _cleanup(mine_id)
+
+            started = time.perf_counter()
+            insert_pixels(gdf, method=method)
+            elapsed = time.perf_counter() - started
+
+            # Second write of the same rows exercises the conflict path
+            # (the ORM path has no upsert and fails on the unique constraint)
+            rewrite = None
+            if method == "copy":
+                started = time.perf_counter()
+                insert_pixels(gdf, method=method)
+                rewrite = time.perf_counter() - started
+
+            _cleanup(mine_id)
+
+            results.append((n_rows, method, elapsed, rewrite))
+            print(
+                f"  {method:>5}: {elapsed:8.2f}s  ({n_rows / elapsed:,.0f} rows/s)"
+                + (f"  re-upsert {rewrite:.2f}s" if rewrite is not None else "")
+            )
+
+    print("\nrows       method   seconds   rows/s")
+    for n_rows, method, elapsed, _ in results:
+        print(f"{n_rows:<10} {method:<8} {elapsed:8.2f}  {n_rows / elapsed:10,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pixel_timeseries write benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--methods", nargs="+", default=["orm", "copy"], choices=["orm", "copy"])
+    args = parser.parse_args()
+
+    run(args.sizes, args.methods)
@@ -0,0 +1,124 @@
+# backend/benchmarks/bench_mine_reads.py
+#
+# Load test: sync (threadpool + psycopg2) vs async (asyncpg) read path for
+# the /mine KPI and pixel endpoints.
+#
+# Builds a small in-process app exposing both variants of each reader and
+# fires concurrent requests at it through httpx's ASGI transport, so the
+# threadpool (40 workers by default) and both DB pools are exercised as in
+# the real server.
+#
+# Usage (from backend/, against a database with pipeline output):
+#   python -m benchmarks.bench_mine_reads --mine-id 3 --start 2024-01-01 --end 2024-06-30
+#   python -m benchmarks.bench_mine_reads --mine-id 3 --concurrency 10 50 200 --requests 500
+#
+# Requires httpx (pip install httpx).
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from db.connection import get_pool_metrics, dispose_async_engine
+from services.db_reader import fetch_mine_kpi, fetch_pixels
+from services.db_reader_async import fetch_mine_kpi_async, fetch_pixels_async
+
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/sync/kpi")
+    def sync_kpi(mine_id: int, start: str, end: str):
+        return fetch_mine_kpi(mine_id, start, end)
+
+    @app.get("/async/kpi")
+    async def async_kpi(mine_id: int, start: str, end: str):
+        return await fetch_mine_kpi_async(mine_id, start, end)
+
+    @app.get("/sync/pixels")
+    def sync_pixels(mine_id: int, start: str, end: str):
+        return {"rows": len(fetch_pixels(mine_id, start, end))}
+
+    @app.get("/async/pixels")
+    async def async_pixels(mine_id: int, start: str, end: str):
+        return {"rows": len(await fetch_pixels_async(mine_id, start, end))}
+
+    return app
+
+
+async def _load(client, path, params, n_requests, concurrency):
+    """Run n_requests with at most `concurrency` in flight; return latencies"""
+    latencies = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            resp = await client.get(path, params=params)
+            latencies.append(time.perf_counter() - started)
+            if resp.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n_requests)))
+    return time.perf_counter() - started, sorted(latencies), errors
+
+
+def _pct(samples, p):
+    return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+
+async def run(mine_id, start, end, endpoints, concurrencies, n_requests):
+    transport = httpx.ASGITransport(app=build_app())
+    params = {"mine_id": mine_id, "start": start, "end": end}
+    results = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for endpoint in endpoints:
+            for concurrency in concurrencies:
+                for variant in ("sync", "async"):
+                    path = f"/{variant}/{endpoint}"
+                    # Warm up pools and plans
+                    await _load(client, path, params, min(concurrency, 10), min(concurrency, 10))
+
+                    elapsed, lat, errors = await _load(client, path, params, n_requests, concurrency)
+                    results.append((endpoint, concurrency, variant, n_requests / elapsed, lat, errors))
+                    print(
+                        f"  {path:<14} c={concurrency:<4} {n_requests / elapsed:8.1f} req/s  "
+                        f"p50 {_pct(lat, 0.5):7.1f} ms  p95 {_pct(lat, 0.95):7.1f} ms  errors {errors}"
+                    )
+
+    pools = get_pool_metrics()
+    await dispose_async_engine()
+
+    print("\nendpoint  conc  variant   req/s     p50 ms    p95 ms")
+    for endpoint, concurrency, variant, rps, lat, _ in results:
+        print(
+            f"{endpoint:<9} {concurrency:<5} {variant:<7} {rps:8.1f} "
+            f"{_pct(lat, 0.5):9.1f} {_pct(lat, 0.95):9.1f}"
+        )
+
+    print(
+        f"\nsync pool : p95 wait {pools['wait_ms_p95']} ms, timeouts {pools['timeouts']}"
+        f"\nasync pool: p95 wait {pools['async']['wait_ms_p95']} ms, timeouts {pools['async']['timeouts']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/mine read path load test")
+    parser.add_argument("--mine-id", type=int, required=True)
+    parser.add_argument("--start", default="2020-01-01")
+    parser.add_argument("--end", default="2030-12-31")
+    parser.add_argument("--endpoints", nargs="+", default=["kpi", "pixels"], choices=["kpi", "pixels"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    asyncio.run(run(
+        args.mine_id, args.start, args.end,
+        args.endpoints, args.concurrency, args.requests
+    ))
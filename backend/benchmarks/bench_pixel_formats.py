@@ -0,0 +1,53 @@
+# backend/benchmarks/bench_pixel_formats.py
+#
+# Serialization cost and payload size of the /mine/pixels formats.
+#
+# "fastapi" is the previous path: df.to_dict(orient="records") returned
+# from the handler, i.e. jsonable_encoder + json.dumps. The others are the
+# encoders in api/pixel_formats.py. No database needed.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_pixel_formats
+#   python -m benchmarks.bench_pixel_formats --sizes 100000 1000000
+
+import argparse
+import gzip
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from api.pixel_formats import PIXEL_FORMATS
+from benchmarks.bench_db_write import make_pixels
+
+DEFAULT_SIZES = [10_000, 100_000, 500_000]
+
+
+def _fastapi_records(df):
+    return json.dumps(jsonable_encoder(df.to_dict(orient="records"))).encode("utf-8")
+
+
+def run(sizes):
+    encoders = {"fastapi": _fastapi_records}
+    encoders.update({name: fmt["encode"] for name, fmt in PIXEL_FORMATS.items()})
+
+    print("rows       format     seconds      bytes    gzipped")
+    for n_rows in sizes:
+        # Same columns/dtypes as fetch_pixels_async
+        df = make_pixels(n_rows, mine_id=1).drop(columns="geometry")
+        df = df.rename(columns=str.lower)
+
+        for name, encode in encoders.items():
+            started = time.perf_counter()
+            body = encode(df)
+            elapsed = time.perf_counter() - started
+            zipped = len(gzip.compress(body, compresslevel=6))
+            print(f"{n_rows:<10} {name:<9} {elapsed:8.3f}  {len(body):10,}  {zipped:10,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/mine/pixels format benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    args = parser.parse_args()
+
+    run(args.sizes)
@@ -22,6 +22,12 @@ SHAPEFILE_PATH = os.getenv(
     str(BASE_DIR / "backend" / "data" / "mines_cil_polygon" / "mines_cils.shp")
 )
 
+# Mine names / admin areas loaded into the mines catalog (python -m db.mine_catalog)
+MINES_JSON_PATH = os.getenv(
+    "MINES_JSON_PATH",
+    str(BASE_DIR / "frontend" / "src" / "data" / "mines.json")
+)
+
 # ----------------------------------
 # Database Configuration
 # ----------------------------------
@@ -32,8 +38,202 @@ DB_USER = os.getenv("DB_USER", "aurora")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "aurora")
 
 DATABASE_URL = (
-    f"postgresql://{DB_USER}:{DB_PASSWORD}"
+    f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}"
+    f"@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# Async driver for the /mine read path
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}"
     f"@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
+# Connection pool shared by the API and the pipeline. Size it for
+# concurrent pipeline runs (one connection each while writing) plus
+# dashboard traffic; /admin/metrics/db shows wait times and saturation.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Pool for the async /mine readers. Concurrent dashboard requests wait
+# on this pool instead of occupying threadpool workers.
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "10"))
+# Seconds to wait for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+# Server-side statement_timeout per connection; 0 disables
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
 GEOGRAPHIC_CRS = "EPSG:4326"
+
+# ----------------------------------
+# Task Queue Configuration
+# ----------------------------------
+# Progress events kept per task for SSE/WebSocket resume (Last-Event-ID)
+TASK_EVENTS_MAX_PER_TASK = int(os.getenv("TASK_EVENTS_MAX_PER_TASK", "200"))
+
+# Seconds between keep-alive comments on idle progress streams
+TASK_STREAM_KEEPALIVE_SECONDS = float(os.getenv("TASK_STREAM_KEEPALIVE_SECONDS", "15"))
+
+# Upper bound on tasks kept in memory; oldest finished tasks are evicted first
+TASK_STORE_MAX_TASKS = int(os.getenv("TASK_STORE_MAX_TASKS", "1000"))
+
+# Finished tasks are evicted this many seconds after completion
+TASK_TTL_SECONDS = int(os.getenv("TASK_TTL_SECONDS", "3600"))
+
+# Results larger than this (serialized JSON bytes) are written to disk
+TASK_RESULT_SPILL_BYTES = int(os.getenv("TASK_RESULT_SPILL_BYTES", "16384"))
+
+TASK_RESULT_DIR = os.getenv(
+    "TASK_RESULT_DIR",
+    str(BASE_DIR / "backend" / ".cache" / "task_results")
+)
+
+# ----------------------------------
+# Pipeline Stage Budgets
+# ----------------------------------
+# Cumulative seconds each stage may use across all ranges of one run.
+# Checked at stage and range boundaries; 0 disables the budget.
+PIPELINE_FETCH_TIMEOUT_SECONDS = float(os.getenv("PIPELINE_FETCH_TIMEOUT_SECONDS", "3600"))
+PIPELINE_DETECT_TIMEOUT_SECONDS = float(os.getenv("PIPELINE_DETECT_TIMEOUT_SECONDS", "1800"))
+PIPELINE_WRITE_TIMEOUT_SECONDS = float(os.getenv("PIPELINE_WRITE_TIMEOUT_SECONDS", "1800"))
+
+# ----------------------------------
+# Pipeline Checkpoints
+# ----------------------------------
+# Parquet snapshots of each range's intermediate outputs, so a failed
+# run resumes at the first incomplete stage
+PIPELINE_CHECKPOINTS = os.getenv("PIPELINE_CHECKPOINTS", "true").lower() == "true"
+
+CHECKPOINT_DIR = os.getenv(
+    "CHECKPOINT_DIR",
+    str(BASE_DIR / "backend" / ".cache" / "checkpoints")
+)
+
+# Checkpoints not touched for this long are removed (0 keeps them until
+# their range is ingested)
+CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# ----------------------------------
+# Database Write Path
+# ----------------------------------
+# "copy": COPY into a staging table + INSERT ... ON CONFLICT (upsert)
+# "orm" : legacy GeoDataFrame.to_postgis / DataFrame.to_sql appends
+DB_WRITE_METHOD = os.getenv("DB_WRITE_METHOD", "copy").lower()
+
+# "sql"   : send only numeric columns; PostGIS builds POINT geometry from
+#           longitude/latitude during the merge (no Python geometry objects)
+# "client": build geometry in GeoPandas and send it as hex EWKB
+PIXEL_GEOMETRY_MODE = os.getenv("PIXEL_GEOMETRY_MODE", "sql").lower()
+
+# ----------------------------------
+# Database Schema
+# ----------------------------------
+# Apply pending db/schema.py migrations when the API starts (startup fails
+# if one fails). Off by default: several migrations rewrite whole tables,
+# so run them explicitly with `python -m db.schema`.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() == "true"
+
+# Hash partitions for pixel_timeseries (fixed once the migration has run)
+PIXEL_TIMESERIES_PARTITIONS = int(os.getenv("PIXEL_TIMESERIES_PARTITIONS", "16"))
+
+# "rows"  : pixel_timeseries, one row per (pixel, date)
+# "arrays": pixel_series, one row per pixel per ingested range with real[]
+#           band vectors aligned to that range's pixel_date_axis
+PIXEL_STORAGE_LAYOUT = os.getenv("PIXEL_STORAGE_LAYOUT", "rows").lower()
+
+# Pixel registry cell size in degrees: lat/lon are snapped to this grid to
+# get a pixel's (grid_row, grid_col). Finer than the 10 m Sentinel-2 pixel
+# spacing (~9e-5 deg), coarse enough to absorb float noise in coordinates.
+PIXEL_GRID_DEG = float(os.getenv("PIXEL_GRID_DEG", "1e-5"))
+
+# ----------------------------------
+# Response Cache (/mine endpoints)
+# ----------------------------------
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+
+# In-process LRU budget (serialized response bytes)
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Larger responses (e.g. wide /mine/pixels ranges) are not cached
+CACHE_MAX_ENTRY_BYTES = int(os.getenv("CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+
+# Optional shared tier, e.g. redis://localhost:6379/0 (requires `redis`)
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+CACHE_REDIS_TTL_SECONDS = int(os.getenv("CACHE_REDIS_TTL_SECONDS", "86400"))
+
+# How long a mine's data version is trusted before re-reading it from
+# mine_data_versions (only matters for writes made by other processes)
+CACHE_VERSION_TTL_SECONDS = float(os.getenv("CACHE_VERSION_TTL_SECONDS", "2"))
+
+# ----------------------------------
+# HTTP Caching (/mine endpoints)
+# ----------------------------------
+# Browsers may reuse a response this long before revalidating with
+# If-None-Match; revalidation is cheap (304 from the data version)
+HTTP_CACHE_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "0"))
+
+# Responses smaller than this (bytes) are sent uncompressed
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "4096"))
+
+# ----------------------------------
+# Pixel Paging / Streaming (/mine/pixels)
+# ----------------------------------
+# Largest ?limit= accepted for keyset-paginated reads
+PIXEL_PAGE_MAX_ROWS = int(os.getenv("PIXEL_PAGE_MAX_ROWS", "100000"))
+
+# Rows fetched per server-side cursor round trip when streaming
+PIXEL_STREAM_BATCH_ROWS = int(os.getenv("PIXEL_STREAM_BATCH_ROWS", "5000"))
+
+# ----------------------------------
+# Pixel History (/mine/pixel-history)
+# ----------------------------------
+# A click snaps to the nearest pixel only within this many meters
+# (a Sentinel-2 pixel is 10 m)
+PIXEL_HISTORY_MAX_DISTANCE_M = float(os.getenv("PIXEL_HISTORY_MAX_DISTANCE_M", "30"))
+
+# ----------------------------------
+# Pixel Grid (/mine/grid)
+# ----------------------------------
+# Grid cell edge in screen pixels; the cell size in degrees follows the zoom
+GRID_CELL_PX = int(os.getenv("GRID_CELL_PX", "4"))
+GRID_DEFAULT_ZOOM = int(os.getenv("GRID_DEFAULT_ZOOM", "15"))
+
+# ----------------------------------
+# Map Tiles (/mine/tiles)
+# ----------------------------------
+# Rendered PNG tiles, keyed by mine data version
+TILE_CACHE_DIR = os.getenv(
+    "TILE_CACHE_DIR",
+    str(BASE_DIR / "backend" / ".cache" / "tiles")
+)
+
+# Zoom levels rendered for the whole mine after each pipeline run
+# (comma separated; empty disables pre-warming)
+TILE_PREWARM_ZOOMS = [
+    int(z) for z in os.getenv("TILE_PREWARM_ZOOMS", "12,13,14,15").split(",") if z.strip()
+]
+
+# ----------------------------------
+# Portfolio KPIs (/mine/kpi)
+# ----------------------------------
+# Largest ?limit= (top-N mines) per request
+KPI_BULK_MAX_LIMIT = int(os.getenv("KPI_BULK_MAX_LIMIT", "1000"))
+
+# ----------------------------------
+# Mine Catalog (/mine/catalog)
+# ----------------------------------
+CATALOG_MAX_LIMIT = int(os.getenv("CATALOG_MAX_LIMIT", "1000"))
+
+# ----------------------------------
+# Alerts Feed (/alerts)
+# ----------------------------------
+# Largest ?limit= per poll
+ALERTS_FEED_MAX_LIMIT = int(os.getenv("ALERTS_FEED_MAX_LIMIT", "1000"))
+
+# Longest ?wait= a long-poll may hold the request open
+ALERTS_LONG_POLL_MAX_SECONDS = float(os.getenv("ALERTS_LONG_POLL_MAX_SECONDS", "30"))
+
+# Idle waiters re-query this often, picking up alerts written by other
+# processes (in-process writes wake them at once); SSE keep-alives are
+# sent at the same interval
+ALERTS_POLL_SECONDS = float(os.getenv("ALERTS_POLL_SECONDS", "5"))
@@ -1,59 +1,227 @@
 # backend/db/connection.py
 
+import threading
+import time
+from collections import deque
+
 from sqlalchemy import create_engine, text
-from config.settings import DATABASE_URL
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from config.settings import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_ASYNC_POOL_SIZE,
+    DB_ASYNC_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_STATEMENT_TIMEOUT_MS
+)
+
+# One engine (and pool) for readers, writers and the pipeline.
+# Created on first use, not at import time.
+_engine = None
+_ENGINE_LOCK = threading.Lock()
+
+# Async engine for the /mine read path (asyncpg), created on first use
+# inside the server's event loop
+_async_engine = None
+
+_STATS_LOCK = threading.Lock()
+
+
+def _new_pool_stats():
+    return {
+        "checkouts": 0,
+        "timeouts": 0,
+        "wait_seconds_total": 0.0,
+        "wait_seconds_max": 0.0,
+        # Checkout wait samples (seconds) for latency percentiles
+        "samples": deque(maxlen=1000)
+    }
+
+
+_POOL_STATS = {
+    "sync": _new_pool_stats(),
+    "async": _new_pool_stats()
+}
+
+
+class _TimedPoolMixin:
+    """Records how long each checkout waited for a connection"""
 
-# Create SQLAlchemy engine
-# Set pool_pre_ping to avoid stale connection errors
-engine = None
+    _stats_key = "sync"
 
-# Auto-initialize on import
-try:
-    engine = create_engine(
+    def _do_get(self):
+        stats = _POOL_STATS[self._stats_key]
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            with _STATS_LOCK:
+                stats["timeouts"] += 1
+            raise
+
+        waited = time.perf_counter() - started
+        with _STATS_LOCK:
+            stats["checkouts"] += 1
+            stats["wait_seconds_total"] += waited
+            stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+            stats["samples"].append(waited)
+        return conn
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    _stats_key = "sync"
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    _stats_key = "async"
+
+
+def _create_engine():
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    return create_engine(
         DATABASE_URL,
-        echo=False,
+        echo=False,              # set True only for debugging
         future=True,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
-        pool_recycle=3600,
+        poolclass=TimedQueuePool,
+        pool_pre_ping=True,      # Test connections before using them
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        connect_args=connect_args,
     )
-    # Test the connection
-    with engine.connect() as conn:
-        conn.execute(text("SELECT 1"))
-    print("✅ Database connection successful")
-except Exception as e:
-    print(f"⚠️  Database will be initialized on first use: {e}")
-    engine = None
+
+
+def get_engine():
+    """Get the shared database engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _ENGINE_LOCK:
+            if _engine is None:
+                try:
+                    _engine = _create_engine()
+                except Exception as e:
+                    print(f"❌ Database engine could not be created: {e}")
+                    return None
+    return _engine
+
+
+def get_async_engine():
+    """
+    Get the asyncpg engine used by the async readers, creating it on
+    first use. Call from the event loop that will use it.
+    """
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        connect_args = {}
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)
+            }
+
+        try:
+            _async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                echo=False,
+                poolclass=TimedAsyncQueuePool,
+                pool_pre_ping=True,
+                pool_size=DB_ASYNC_POOL_SIZE,
+                max_overflow=DB_ASYNC_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                connect_args=connect_args,
+            )
+        except Exception as e:
+            print(f"❌ Async database engine could not be created: {e}")
+            return None
+    return _async_engine
+
+
+async def dispose_async_engine():
+    """Close the async pool (on shutdown)"""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
 
 def initialize_db():
-    """Initialize database connection."""
-    global engine
+    """Create the engine and check connectivity (called on startup)."""
+    engine = get_engine()
+    if engine is None:
+        return False
+
     try:
-        engine = create_engine(
-            DATABASE_URL,
-            echo=False,          # set True only for debugging
-            future=True,
-            pool_pre_ping=True,  # Test connections before using them
-            pool_size=5,
-            max_overflow=10,
-            pool_recycle=3600,   # Recycle connections every hour
-        )
-        # Test the connection
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         print("✅ Database connection successful")
         return True
     except Exception as e:
+        # The engine stays; connections are retried on the next checkout
         print(f"❌ Database Connection Error: {e}")
-        print(f"DATABASE_URL: {DATABASE_URL}")
-        engine = None
+        print(f"DATABASE_URL host: {DATABASE_URL.rsplit('@', 1)[-1]}")
         return False
 
-def get_engine():
-    """Get the database engine, initializing if needed."""
-    global engine
-    if engine is None:
-        initialize_db()
-    return engine
 
+def _pool_metrics(key, engine, pool_size, max_overflow):
+    with _STATS_LOCK:
+        stats = dict(_POOL_STATS[key])
+        samples = sorted(stats.pop("samples"))
+
+    def percentile(p):
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    capacity = pool_size + max(max_overflow, 0)
+    metrics = {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout_seconds": DB_POOL_TIMEOUT,
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+        "checkouts": stats["checkouts"],
+        "timeouts": stats["timeouts"],
+        "wait_ms_avg": round(
+            stats["wait_seconds_total"] / stats["checkouts"] * 1000, 3
+        ) if stats["checkouts"] else 0.0,
+        "wait_ms_p50": round(percentile(0.50) * 1000, 3),
+        "wait_ms_p95": round(percentile(0.95) * 1000, 3),
+        "wait_ms_max": round(stats["wait_seconds_max"] * 1000, 3),
+        "checked_out": 0,
+        "checked_in": 0,
+        "overflow": 0,
+        "saturation": 0.0
+    }
+
+    if engine is not None:
+        pool = engine.pool
+        metrics["checked_out"] = pool.checkedout()
+        metrics["checked_in"] = pool.checkedin()
+        metrics["overflow"] = max(pool.overflow(), 0)
+        metrics["saturation"] = round(pool.checkedout() / capacity, 3) if capacity else 0.0
+
+    return metrics
+
+
+def get_pool_metrics():
+    """
+    Pool occupancy plus checkout wait statistics since startup for the
+    shared engine; the async read pool is reported under "async".
+    """
+    metrics = _pool_metrics("sync", _engine, DB_POOL_SIZE, DB_MAX_OVERFLOW)
+    metrics["async"] = _pool_metrics(
+        "async",
+        _async_engine.sync_engine if _async_engine is not None else None,
+        DB_ASYNC_POOL_SIZE,
+        DB_ASYNC_MAX_OVERFLOW
+    )
+    return metrics
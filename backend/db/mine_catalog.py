@@ -0,0 +1,133 @@
+# backend/db/mine_catalog.py
+
+"""
+The mines table as a catalog: zoom-dependent geometry levels and the
+loader that fills it.
+
+Geometries are precomputed per zoom band by the mines_derive_geometries
+trigger (schema migration 8), so catalog queries only pick a column:
+
+    zoom  0-9  : centroid  (ST_PointOnSurface)
+    zoom 10-12 : geom_low  (simplified to MINE_SIMPLIFY_LOW_DEG)
+    zoom 13-14 : geom_mid  (simplified to MINE_SIMPLIFY_MID_DEG)
+    zoom 15+   : geometry  (as loaded)
+
+Loader (from backend/):
+    python -m db.mine_catalog
+
+Polygons come from SHAPEFILE_PATH; mine_id is the shapefile row index, as
+in algorithms/data_script.py. Names, admin areas and the pinned flag
+come from MINES_JSON_PATH (the frontend's mines.json).
+"""
+
+import json
+
+import geopandas as gpd
+from sqlalchemy import text
+
+from config.settings import SHAPEFILE_PATH, MINES_JSON_PATH
+
+# ~110 m and ~11 m at the equator
+MINE_SIMPLIFY_LOW_DEG = 0.001
+MINE_SIMPLIFY_MID_DEG = 0.0001
+
+# (min_zoom, column), ascending
+MINE_GEOMETRY_LEVELS = [
+    (0, "centroid"),
+    (10, "geom_low"),
+    (13, "geom_mid"),
+    (15, "geometry"),
+]
+
+
+def geometry_column(zoom):
+    """mines column holding the geometry to serve at `zoom`"""
+    column = MINE_GEOMETRY_LEVELS[0][1]
+    for min_zoom, level in MINE_GEOMETRY_LEVELS:
+        if zoom >= min_zoom:
+            column = level
+    return column
+
+
+UPSERT_MINE_SQL = """
+    INSERT INTO mines
+        (mine_id, display_name, state, district, subdistrict, pinned, area, perimeter, geometry)
+    VALUES
+        (:mine_id, :display_name, :state, :district, :subdistrict, :pinned, :area, :perimeter,
+         ST_GeomFromText(:wkt, 4326))
+    ON CONFLICT (mine_id) DO UPDATE SET
+        display_name = EXCLUDED.display_name,
+        state = EXCLUDED.state,
+        district = EXCLUDED.district,
+        subdistrict = EXCLUDED.subdistrict,
+        pinned = EXCLUDED.pinned,
+        area = EXCLUDED.area,
+        perimeter = EXCLUDED.perimeter,
+        geometry = EXCLUDED.geometry
+"""
+
+# Cached /mine/details responses are keyed by the mine's data version
+BUMP_VERSIONS_SQL = """
+    INSERT INTO mine_data_versions (mine_id, version)
+    SELECT mine_id, 1 FROM mines
+    ON CONFLICT (mine_id) DO UPDATE SET
+        version = mine_data_versions.version + 1,
+        updated_at = now()
+"""
+
+
+def mine_records(shapefile_path=SHAPEFILE_PATH, mines_json_path=MINES_JSON_PATH):
+    """One insert row per shapefile polygon, with mines.json properties"""
+    gdf = gpd.read_file(shapefile_path).to_crs(epsg=4326)
+
+    with open(mines_json_path) as f:
+        properties = {
+            feature["properties"]["mine_id"]: feature["properties"]
+            for feature in json.load(f).get("features", [])
+        }
+
+    records = []
+    for mine_id, row in enumerate(gdf.itertuples(index=False)):
+        props = properties.get(mine_id, {})
+        records.append({
+            "mine_id": mine_id,
+            "display_name": props.get("display_name", f"Mine {mine_id}"),
+            "state": props.get("state"),
+            "district": props.get("district"),
+            "subdistrict": props.get("subdistrict"),
+            "pinned": bool(props.get("pinned", False)),
+            "area": getattr(row, "area", None),
+            "perimeter": getattr(row, "perimeter", None),
+            "wkt": row.geometry.wkt
+        })
+
+    missing = set(properties) - set(range(len(gdf)))
+    if missing:
+        print(f"⚠️  {len(missing)} mines.json entries have no polygon: {sorted(missing)[:10]}")
+
+    return records
+
+
+def load_mines(engine):
+    """Upsert every mine into the catalog; returns the number loaded"""
+    records = mine_records()
+    with engine.begin() as conn:
+        conn.execute(text(UPSERT_MINE_SQL), records)
+        conn.execute(text(BUMP_VERSIONS_SQL))
+
+    print(f"✅ Loaded {len(records)} mines into the catalog")
+    return len(records)
+
+
+def main():
+    from db.connection import get_engine
+
+    engine = get_engine()
+    if engine is None:
+        raise SystemExit("❌ Database engine not initialized")
+
+    load_mines(engine)
+
+
+if __name__ == "__main__":
+    main()
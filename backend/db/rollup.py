@@ -0,0 +1,131 @@
+# backend/db/rollup.py
+
+"""
+mine_daily_summary: one row per (mine_id, date) with the aggregates the
+KPI and chart endpoints need.
+
+Band sums are kept per anomaly group (normal = anomaly_label -1,
+anomalous = 1) so means over any date range are exact:
+SUM(<group>_<band>_sum) / SUM(<group>_count).
+
+The same INSERT ... SELECT is used by the schema backfill and by
+RangeWriter, which refreshes a range's days in its write transaction.
+"""
+
+SUMMARY_BANDS = ["b4", "b8", "b11", "ndvi", "nbr"]
+SUMMARY_GROUPS = (("normal", -1), ("anomalous", 1))
+
+# m^2 per pixel (10 m Sentinel-2)
+PIXEL_AREA_M2 = 100
+
+
+def summary_columns_ddl():
+    """Column definitions for CREATE TABLE mine_daily_summary"""
+    cols = [
+        "mine_id INTEGER NOT NULL",
+        "date DATE NOT NULL",
+        "pixel_count INTEGER NOT NULL DEFAULT 0",
+        "normal_count INTEGER NOT NULL DEFAULT 0",
+        "anomalous_count INTEGER NOT NULL DEFAULT 0",
+        "excavated_count INTEGER NOT NULL DEFAULT 0",
+    ]
+    cols += [f"{band}_sum DOUBLE PRECISION" for band in SUMMARY_BANDS]
+    cols += [
+        f"{group}_{band}_sum DOUBLE PRECISION"
+        for group, _ in SUMMARY_GROUPS
+        for band in SUMMARY_BANDS
+    ]
+    cols += [
+        "max_anomaly_score DOUBLE PRECISION",
+        # Pixel area (m^2) classified excavated
+        "excavated_area DOUBLE PRECISION NOT NULL DEFAULT 0",
+        # Distinct pixels inside any no-go zone, total and per-zone area (m^2)
+        "violation_pixels INTEGER NOT NULL DEFAULT 0",
+        "violation_area DOUBLE PRECISION NOT NULL DEFAULT 0",
+        "violation_area_by_zone JSONB NOT NULL DEFAULT '{}'::jsonb",
+        "updated_at TIMESTAMPTZ DEFAULT now()",
+        "PRIMARY KEY (mine_id, date)",
+    ]
+    return ",\n            ".join(cols)
+
+
+def summary_upsert_sql(pixel_source, violation_filter, pixel_area=PIXEL_AREA_M2):
+    """
+    INSERT ... SELECT refreshing mine_daily_summary from the base tables.
+
+    pixel_source     : FROM relation with the pixel_timeseries row shape
+    violation_filter : WHERE condition on violation_pixels matching the same
+                       mines/dates
+    pixel_area       : m^2 per pixel
+    """
+    band_sums = [f"SUM({band}) as {band}_sum" for band in SUMMARY_BANDS]
+    group_sums = [
+        f"SUM({band}) FILTER (WHERE anomaly_label = {label}) as {group}_{band}_sum"
+        for group, label in SUMMARY_GROUPS
+        for band in SUMMARY_BANDS
+    ]
+    sum_cols = [expr.rsplit(" as ", 1)[1] for expr in band_sums + group_sums]
+
+    insert_cols = [
+        "mine_id", "date", "pixel_count", "normal_count", "anomalous_count",
+        "excavated_count", *sum_cols, "max_anomaly_score", "excavated_area",
+        "violation_pixels", "violation_area", "violation_area_by_zone", "updated_at"
+    ]
+    updates = ",\n                ".join(
+        f"{col} = EXCLUDED.{col}" for col in insert_cols[2:]
+    )
+    pixel_aggs = ",\n                    ".join(band_sums + group_sums)
+
+    return f"""
+        INSERT INTO mine_daily_summary ({", ".join(insert_cols)})
+        SELECT
+            p.mine_id,
+            p.date,
+            p.pixel_count,
+            p.normal_count,
+            p.anomalous_count,
+            p.excavated_count,
+            {", ".join(f"p.{col}" for col in sum_cols)},
+            p.max_anomaly_score,
+            p.excavated_count * {pixel_area},
+            COALESCE(vp.violation_pixels, 0),
+            COALESCE(vz.violation_area, 0),
+            COALESCE(vz.violation_area_by_zone, '{{}}'::jsonb),
+            now()
+        FROM (
+            SELECT
+                mine_id,
+                date,
+                COUNT(*) as pixel_count,
+                COUNT(*) FILTER (WHERE anomaly_label = -1) as normal_count,
+                COUNT(*) FILTER (WHERE anomaly_label = 1) as anomalous_count,
+                COUNT(*) FILTER (WHERE excavated_flag = 1) as excavated_count,
+                    {pixel_aggs},
+                MAX(anomaly_score) as max_anomaly_score
+            FROM {pixel_source}
+            GROUP BY mine_id, date
+        ) p
+        LEFT JOIN (
+            SELECT mine_id, date, COUNT(DISTINCT pixel_id) as violation_pixels
+            FROM violation_pixels
+            WHERE {violation_filter}
+            GROUP BY mine_id, date
+        ) vp ON vp.mine_id = p.mine_id AND vp.date = p.date
+        LEFT JOIN (
+            SELECT
+                mine_id,
+                date,
+                SUM(zone_area) as violation_area,
+                jsonb_object_agg(zone_type, zone_area) as violation_area_by_zone
+            FROM (
+                SELECT mine_id, date, zone_type, SUM(pixel_area) as zone_area
+                FROM violation_pixels
+                WHERE {violation_filter}
+                  AND zone_type IS NOT NULL
+                GROUP BY mine_id, date, zone_type
+            ) z
+            GROUP BY mine_id, date
+        ) vz ON vz.mine_id = p.mine_id AND vz.date = p.date
+        ON CONFLICT (mine_id, date) DO UPDATE SET
+                {updates}
+    """
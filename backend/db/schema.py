@@ -0,0 +1,686 @@
+# backend/db/schema.py
+
+"""
+Versioned database schema.
+
+Migrations are applied in order and recorded in schema_migrations, so
+running this repeatedly is safe:
+
+    python -m db.schema            # apply pending migrations
+    python -m db.schema --status   # show applied / pending versions
+    python -m db.schema --sql      # print pending SQL without running it
+
+On an empty database, --sql prints the full DDL.
+
+Several migrations rewrite whole tables, so the API only applies them on
+startup when DB_AUTO_MIGRATE=true; otherwise it warns about pending ones.
+
+Version 1 matches the hand-made tables from DATABASE_SETUP.md
+(CREATE ... IF NOT EXISTS), so existing databases adopt the managed schema
+without data loss. Later versions evolve it from there.
+"""
+
+import argparse
+
+from sqlalchemy import text
+
+from config.settings import PIXEL_GRID_DEG, PIXEL_TIMESERIES_PARTITIONS
+from db.rollup import summary_columns_ddl, summary_upsert_sql
+from db.mine_catalog import MINE_SIMPLIFY_LOW_DEG, MINE_SIMPLIFY_MID_DEG
+
+# Arbitrary constant: serializes concurrent migrators (e.g. several workers)
+_MIGRATION_LOCK_ID = 4242001
+
+
+def _baseline():
+    return [
+        "CREATE EXTENSION IF NOT EXISTS postgis",
+        """
+        CREATE TABLE IF NOT EXISTS mines (
+            mine_id INTEGER PRIMARY KEY,
+            display_name TEXT,
+            state TEXT,
+            district TEXT,
+            subdistrict TEXT,
+            geometry GEOMETRY(Geometry, 4326)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_mines_geometry ON mines USING GIST (geometry)",
+        """
+        CREATE TABLE IF NOT EXISTS pixel_timeseries (
+            id SERIAL PRIMARY KEY,
+            mine_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            latitude DOUBLE PRECISION,
+            longitude DOUBLE PRECISION,
+            geometry GEOMETRY(Point, 4326),
+            b4 DOUBLE PRECISION,
+            b8 DOUBLE PRECISION,
+            b11 DOUBLE PRECISION,
+            ndvi DOUBLE PRECISION,
+            nbr DOUBLE PRECISION,
+            anomaly_label INTEGER,
+            anomaly_score DOUBLE PRECISION,
+            excavated_flag INTEGER,
+            CONSTRAINT uq_pixel_unique
+                UNIQUE (mine_id, date, latitude, longitude)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS violation_pixels (
+            id SERIAL PRIMARY KEY,
+            mine_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            latitude DOUBLE PRECISION,
+            longitude DOUBLE PRECISION,
+            zone_type TEXT,
+            pixel_area DOUBLE PRECISION,
+            anomaly_score DOUBLE PRECISION,
+            geometry GEOMETRY(Point, 4326),
+            CONSTRAINT uq_violation_pixel_unique
+                UNIQUE (mine_id, date, latitude, longitude, zone_type)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_violation_pixels_mine_date ON violation_pixels (mine_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_violation_pixels_zone ON violation_pixels (zone_type)",
+        "CREATE INDEX IF NOT EXISTS idx_violation_pixels_geometry ON violation_pixels USING GIST (geometry)",
+        """
+        CREATE TABLE IF NOT EXISTS violation_alerts (
+            id SERIAL PRIMARY KEY,
+            mine_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            zone_type TEXT,
+            alert_type TEXT,
+            affected_area DOUBLE PRECISION
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_violation_alerts_mine_date ON violation_alerts (mine_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_violation_alerts_type ON violation_alerts (alert_type)",
+        # Merge key for the COPY/upsert write path (missing on hand-made tables).
+        # Legacy to_sql appends may have duplicated alerts; the newest is kept.
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'uq_violation_alert_unique'
+            ) THEN
+                DELETE FROM violation_alerts a
+                USING violation_alerts b
+                WHERE a.mine_id = b.mine_id
+                  AND a.date = b.date
+                  AND a.zone_type IS NOT DISTINCT FROM b.zone_type
+                  AND a.alert_type IS NOT DISTINCT FROM b.alert_type
+                  AND a.id < b.id;
+
+                ALTER TABLE violation_alerts
+                    ADD CONSTRAINT uq_violation_alert_unique
+                    UNIQUE (mine_id, date, zone_type, alert_type);
+            END IF;
+        END $$
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ingest_coverage (
+            mine_id INTEGER NOT NULL,
+            range_start DATE NOT NULL,
+            range_end DATE NOT NULL,
+            pixels INTEGER,
+            violations INTEGER,
+            alerts INTEGER,
+            ingested_at TIMESTAMPTZ DEFAULT now(),
+            PRIMARY KEY (mine_id, range_start, range_end)
+        )
+        """,
+    ]
+
+
+def _partition_pixel_timeseries():
+    """
+    Rebuild pixel_timeseries as a table hash-partitioned on mine_id.
+
+    Every reader filters on one mine_id, so each query touches a single
+    partition. Within a partition:
+      - uq_pixel_unique (mine_id, date, latitude, longitude) is the merge key
+      - idx_pixel_mine_date (mine_id, date) INCLUDE (...) lets the KPI and
+        chart aggregates run as index-only scans
+      - BRIN on date stays tiny for cross-mine date scans
+      - GiST on geometry for spatial lookups
+    Existing rows are copied across in the same transaction.
+    """
+    statements = [
+        "ALTER TABLE pixel_timeseries RENAME TO pixel_timeseries_legacy",
+        # Free the names the new table will use
+        "ALTER TABLE pixel_timeseries_legacy DROP CONSTRAINT IF EXISTS pixel_timeseries_pkey",
+        "ALTER TABLE pixel_timeseries_legacy DROP CONSTRAINT IF EXISTS uq_pixel_unique",
+        "DROP INDEX IF EXISTS idx_pixel_mine_date",
+        "DROP INDEX IF EXISTS idx_pixel_geometry",
+        """
+        CREATE TABLE pixel_timeseries (
+            id BIGSERIAL,
+            mine_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            latitude DOUBLE PRECISION,
+            longitude DOUBLE PRECISION,
+            geometry GEOMETRY(Point, 4326),
+            b4 DOUBLE PRECISION,
+            b8 DOUBLE PRECISION,
+            b11 DOUBLE PRECISION,
+            ndvi DOUBLE PRECISION,
+            nbr DOUBLE PRECISION,
+            anomaly_label INTEGER,
+            anomaly_score DOUBLE PRECISION,
+            excavated_flag INTEGER,
+            PRIMARY KEY (mine_id, id),
+            CONSTRAINT uq_pixel_unique
+                UNIQUE (mine_id, date, latitude, longitude)
+        ) PARTITION BY HASH (mine_id)
+        """,
+    ]
+
+    for remainder in range(PIXEL_TIMESERIES_PARTITIONS):
+        statements.append(
+            f"CREATE TABLE pixel_timeseries_p{remainder:02d} "
+            f"PARTITION OF pixel_timeseries "
+            f"FOR VALUES WITH (MODULUS {PIXEL_TIMESERIES_PARTITIONS}, REMAINDER {remainder})"
+        )
+
+    statements += [
+        """
+        CREATE INDEX idx_pixel_mine_date ON pixel_timeseries (mine_id, date)
+        INCLUDE (anomaly_label, excavated_flag, anomaly_score, ndvi)
+        """,
+        "CREATE INDEX idx_pixel_date_brin ON pixel_timeseries USING BRIN (date)",
+        "CREATE INDEX idx_pixel_geometry ON pixel_timeseries USING GIST (geometry)",
+        """
+        INSERT INTO pixel_timeseries (
+            mine_id, date, latitude, longitude, geometry,
+            b4, b8, b11, ndvi, nbr,
+            anomaly_label, anomaly_score, excavated_flag
+        )
+        SELECT
+            mine_id, date, latitude, longitude, geometry,
+            b4, b8, b11, ndvi, nbr,
+            anomaly_label, anomaly_score, excavated_flag
+        FROM pixel_timeseries_legacy
+        ON CONFLICT DO NOTHING
+        """,
+        "DROP TABLE pixel_timeseries_legacy",
+        "ANALYZE pixel_timeseries",
+    ]
+
+    return statements
+
+
+def _pixel_arrays():
+    """
+    Array-per-pixel layout (PIXEL_STORAGE_LAYOUT=arrays).
+
+    Each ingested range is a chunk: pixel_date_axis holds its sorted dates
+    once, and pixel_series holds one row per pixel with band vectors aligned
+    to that axis (NULL where the pixel had no observation). mine_id,
+    lat/lon and geometry are no longer repeated per acquisition.
+
+    pixel_rows(mine_id, start, end) unnests the chunks back into the
+    pixel_timeseries row shape, so readers can select from either layout.
+    """
+    return [
+        """
+        CREATE TABLE IF NOT EXISTS pixel_date_axis (
+            mine_id INTEGER NOT NULL,
+            chunk_start DATE NOT NULL,
+            chunk_end DATE NOT NULL,
+            dates DATE[] NOT NULL,
+            PRIMARY KEY (mine_id, chunk_start)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pixel_series (
+            mine_id INTEGER NOT NULL,
+            chunk_start DATE NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            b4 REAL[],
+            b8 REAL[],
+            b11 REAL[],
+            ndvi REAL[],
+            nbr REAL[],
+            anomaly_label SMALLINT[],
+            anomaly_score REAL[],
+            excavated_flag SMALLINT[],
+            PRIMARY KEY (mine_id, chunk_start, latitude, longitude)
+        )
+        """,
+        # Whole history of one pixel: one row per chunk
+        """
+        CREATE INDEX IF NOT EXISTS idx_pixel_series_location
+        ON pixel_series (mine_id, latitude, longitude)
+        """,
+        """
+        CREATE OR REPLACE FUNCTION pixel_rows(p_mine_id INTEGER, p_start DATE, p_end DATE)
+        RETURNS TABLE (
+            mine_id INTEGER,
+            date DATE,
+            latitude DOUBLE PRECISION,
+            longitude DOUBLE PRECISION,
+            b4 DOUBLE PRECISION,
+            b8 DOUBLE PRECISION,
+            b11 DOUBLE PRECISION,
+            ndvi DOUBLE PRECISION,
+            nbr DOUBLE PRECISION,
+            anomaly_label INTEGER,
+            anomaly_score DOUBLE PRECISION,
+            excavated_flag INTEGER
+        )
+        LANGUAGE sql STABLE AS $$
+            SELECT
+                s.mine_id,
+                u.date,
+                s.latitude,
+                s.longitude,
+                u.b4::double precision,
+                u.b8::double precision,
+                u.b11::double precision,
+                u.ndvi::double precision,
+                u.nbr::double precision,
+                u.anomaly_label::integer,
+                u.anomaly_score::double precision,
+                u.excavated_flag::integer
+            FROM pixel_date_axis a
+            JOIN pixel_series s
+              ON s.mine_id = a.mine_id
+             AND s.chunk_start = a.chunk_start
+            CROSS JOIN LATERAL unnest(
+                a.dates, s.b4, s.b8, s.b11, s.ndvi, s.nbr,
+                s.anomaly_label, s.anomaly_score, s.excavated_flag
+            ) AS u(date, b4, b8, b11, ndvi, nbr, anomaly_label, anomaly_score, excavated_flag)
+            WHERE a.mine_id = p_mine_id
+              AND a.chunk_start <= p_end
+              AND a.chunk_end >= p_start
+              AND u.date BETWEEN p_start AND p_end
+              -- slots where the pixel had no observation
+              AND COALESCE(u.b4, u.b8, u.b11, u.ndvi, u.nbr, u.anomaly_score) IS NOT NULL
+        $$
+        """,
+    ]
+
+
+def _pixel_registry():
+    """
+    Stable integer pixel identity.
+
+    pixel_registry maps each mine's snapped grid cell (lat/lon divided by
+    PIXEL_GRID_DEG, rounded) to a pixel_id. Existing rows are registered,
+    tagged with their pixel_id, and the unique keys move from float
+    (latitude, longitude) to pixel_id. Rows that differed only by float
+    noise collapse onto one pixel; the most recently written one is kept.
+    """
+    cell_match = (
+        "r.mine_id = t.mine_id "
+        f"AND r.grid_row = round(t.latitude / {PIXEL_GRID_DEG!r})::integer "
+        f"AND r.grid_col = round(t.longitude / {PIXEL_GRID_DEG!r})::integer"
+    )
+
+    return [
+        """
+        CREATE TABLE IF NOT EXISTS pixel_registry (
+            pixel_id SERIAL PRIMARY KEY,
+            mine_id INTEGER NOT NULL,
+            grid_row INTEGER NOT NULL,
+            grid_col INTEGER NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            geometry GEOMETRY(Point, 4326),
+            CONSTRAINT uq_pixel_registry_cell
+                UNIQUE (mine_id, grid_row, grid_col)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_pixel_registry_geometry ON pixel_registry USING GIST (geometry)",
+        f"""
+        INSERT INTO pixel_registry (mine_id, grid_row, grid_col, latitude, longitude, geometry)
+        SELECT DISTINCT ON (mine_id, grid_row, grid_col)
+            mine_id, grid_row, grid_col, latitude, longitude,
+            ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
+        FROM (
+            SELECT
+                mine_id, latitude, longitude,
+                round(latitude / {PIXEL_GRID_DEG!r})::integer AS grid_row,
+                round(longitude / {PIXEL_GRID_DEG!r})::integer AS grid_col
+            FROM (
+                SELECT mine_id, latitude, longitude FROM pixel_timeseries
+                UNION
+                SELECT mine_id, latitude, longitude FROM violation_pixels
+                UNION
+                SELECT mine_id, latitude, longitude FROM pixel_series
+            ) seen
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        ) cells
+        ORDER BY mine_id, grid_row, grid_col
+        ON CONFLICT (mine_id, grid_row, grid_col) DO NOTHING
+        """,
+
+        # pixel_timeseries: key (mine_id, pixel_id, date)
+        "ALTER TABLE pixel_timeseries ADD COLUMN pixel_id INTEGER",
+        f"UPDATE pixel_timeseries t SET pixel_id = r.pixel_id FROM pixel_registry r WHERE {cell_match}",
+        "DELETE FROM pixel_timeseries WHERE pixel_id IS NULL",
+        """
+        DELETE FROM pixel_timeseries a
+        USING pixel_timeseries b
+        WHERE a.mine_id = b.mine_id
+          AND a.pixel_id = b.pixel_id
+          AND a.date = b.date
+          AND a.id < b.id
+        """,
+        "ALTER TABLE pixel_timeseries ALTER COLUMN pixel_id SET NOT NULL",
+        "ALTER TABLE pixel_timeseries DROP CONSTRAINT uq_pixel_unique",
+        """
+        ALTER TABLE pixel_timeseries
+            ADD CONSTRAINT uq_pixel_unique UNIQUE (mine_id, pixel_id, date)
+        """,
+
+        # violation_pixels: key (pixel_id, date, zone_type)
+        "ALTER TABLE violation_pixels ADD COLUMN pixel_id INTEGER",
+        f"UPDATE violation_pixels t SET pixel_id = r.pixel_id FROM pixel_registry r WHERE {cell_match}",
+        "DELETE FROM violation_pixels WHERE pixel_id IS NULL",
+        """
+        DELETE FROM violation_pixels a
+        USING violation_pixels b
+        WHERE a.pixel_id = b.pixel_id
+          AND a.date = b.date
+          AND a.zone_type IS NOT DISTINCT FROM b.zone_type
+          AND a.id < b.id
+        """,
+        "ALTER TABLE violation_pixels ALTER COLUMN pixel_id SET NOT NULL",
+        "ALTER TABLE violation_pixels DROP CONSTRAINT uq_violation_pixel_unique",
+        """
+        ALTER TABLE violation_pixels
+            ADD CONSTRAINT uq_violation_pixel_unique UNIQUE (pixel_id, date, zone_type)
+        """,
+
+        # pixel_series: key (mine_id, chunk_start, pixel_id)
+        "ALTER TABLE pixel_series ADD COLUMN pixel_id INTEGER",
+        f"UPDATE pixel_series t SET pixel_id = r.pixel_id FROM pixel_registry r WHERE {cell_match}",
+        """
+        DELETE FROM pixel_series a
+        USING pixel_series b
+        WHERE a.mine_id = b.mine_id
+          AND a.chunk_start = b.chunk_start
+          AND a.pixel_id = b.pixel_id
+          AND a.ctid < b.ctid
+        """,
+        "ALTER TABLE pixel_series ALTER COLUMN pixel_id SET NOT NULL",
+        "ALTER TABLE pixel_series DROP CONSTRAINT pixel_series_pkey",
+        "ALTER TABLE pixel_series ADD PRIMARY KEY (mine_id, chunk_start, pixel_id)",
+        "DROP INDEX IF EXISTS idx_pixel_series_location",
+        "CREATE INDEX idx_pixel_series_pixel ON pixel_series (pixel_id)",
+
+        # pixel_rows() now also returns pixel_id
+        "DROP FUNCTION IF EXISTS pixel_rows(INTEGER, DATE, DATE)",
+        """
+        CREATE FUNCTION pixel_rows(p_mine_id INTEGER, p_start DATE, p_end DATE)
+        RETURNS TABLE (
+            mine_id INTEGER,
+            pixel_id INTEGER,
+            date DATE,
+            latitude DOUBLE PRECISION,
+            longitude DOUBLE PRECISION,
+            b4 DOUBLE PRECISION,
+            b8 DOUBLE PRECISION,
+            b11 DOUBLE PRECISION,
+            ndvi DOUBLE PRECISION,
+            nbr DOUBLE PRECISION,
+            anomaly_label INTEGER,
+            anomaly_score DOUBLE PRECISION,
+            excavated_flag INTEGER
+        )
+        LANGUAGE sql STABLE AS $$
+            SELECT
+                s.mine_id,
+                s.pixel_id,
+                u.date,
+                s.latitude,
+                s.longitude,
+                u.b4::double precision,
+                u.b8::double precision,
+                u.b11::double precision,
+                u.ndvi::double precision,
+                u.nbr::double precision,
+                u.anomaly_label::integer,
+                u.anomaly_score::double precision,
+                u.excavated_flag::integer
+            FROM pixel_date_axis a
+            JOIN pixel_series s
+              ON s.mine_id = a.mine_id
+             AND s.chunk_start = a.chunk_start
+            CROSS JOIN LATERAL unnest(
+                a.dates, s.b4, s.b8, s.b11, s.ndvi, s.nbr,
+                s.anomaly_label, s.anomaly_score, s.excavated_flag
+            ) AS u(date, b4, b8, b11, ndvi, nbr, anomaly_label, anomaly_score, excavated_flag)
+            WHERE a.mine_id = p_mine_id
+              AND a.chunk_start <= p_end
+              AND a.chunk_end >= p_start
+              AND u.date BETWEEN p_start AND p_end
+              -- slots where the pixel had no observation
+              AND COALESCE(u.b4, u.b8, u.b11, u.ndvi, u.nbr, u.anomaly_score) IS NOT NULL
+        $$
+        """,
+    ]
+
+
+def _daily_summary():
+    """
+    mine_daily_summary rollup (see db/rollup.py), backfilled from both
+    pixel layouts. RangeWriter keeps it current from here on.
+    """
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS mine_daily_summary (
+            {summary_columns_ddl()}
+        )
+        """,
+        summary_upsert_sql("pixel_timeseries", "TRUE"),
+        summary_upsert_sql(
+            """(
+                SELECT r.*
+                FROM (SELECT DISTINCT mine_id FROM pixel_date_axis) m
+                CROSS JOIN LATERAL pixel_rows(m.mine_id, '-infinity'::date, 'infinity'::date) r
+            ) src""",
+            "TRUE"
+        ),
+    ]
+
+
+def _data_versions():
+    """
+    Per-mine data version, bumped by RangeWriter in every write
+    transaction; keys the /mine response cache (services/cache.py).
+    """
+    return [
+        """
+        CREATE TABLE IF NOT EXISTS mine_data_versions (
+            mine_id INTEGER PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ DEFAULT now()
+        )
+        """,
+        # Mines with data already start at version 1
+        """
+        INSERT INTO mine_data_versions (mine_id, version)
+        SELECT DISTINCT mine_id, 1 FROM ingest_coverage
+        ON CONFLICT (mine_id) DO NOTHING
+        """,
+    ]
+
+
+def _pixel_keyset_index():
+    """
+    (mine_id, date, pixel_id) replaces idx_pixel_mine_date so keyset pages
+    of /mine/pixels, ordered by (date, pixel_id), are index range scans.
+    Same INCLUDE columns, so the range aggregates keep index-only scans.
+    """
+    return [
+        """
+        CREATE INDEX IF NOT EXISTS idx_pixel_mine_date_pixel
+        ON pixel_timeseries (mine_id, date, pixel_id)
+        INCLUDE (anomaly_label, excavated_flag, anomaly_score, ndvi)
+        """,
+        "DROP INDEX IF EXISTS idx_pixel_mine_date",
+    ]
+
+
+def _mine_catalog():
+    """
+    Catalog columns on mines: pinned flag, shapefile area/perimeter, a
+    lower-cased search_text (pg_trgm GIN index) and geometries precomputed
+    per zoom band (see MINE_GEOMETRY_LEVELS in db/mine_catalog.py) by a
+    trigger on every insert/geometry update. Existing rows are backfilled.
+    """
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        """
+        ALTER TABLE mines
+            ADD COLUMN IF NOT EXISTS pinned BOOLEAN NOT NULL DEFAULT false,
+            ADD COLUMN IF NOT EXISTS area DOUBLE PRECISION,
+            ADD COLUMN IF NOT EXISTS perimeter DOUBLE PRECISION,
+            ADD COLUMN IF NOT EXISTS centroid GEOMETRY(Point, 4326),
+            ADD COLUMN IF NOT EXISTS geom_low GEOMETRY(Geometry, 4326),
+            ADD COLUMN IF NOT EXISTS geom_mid GEOMETRY(Geometry, 4326),
+            ADD COLUMN IF NOT EXISTS search_text TEXT GENERATED ALWAYS AS (
+                lower(
+                    coalesce(display_name, '') || ' ' || coalesce(state, '') || ' ' ||
+                    coalesce(district, '') || ' ' || coalesce(subdistrict, '')
+                )
+            ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_mines_search_trgm ON mines USING GIN (search_text gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS idx_mines_centroid ON mines USING GIST (centroid)",
+        f"""
+        CREATE OR REPLACE FUNCTION mines_derive_geometries() RETURNS trigger AS $$
+        BEGIN
+            NEW.centroid := ST_PointOnSurface(NEW.geometry);
+            NEW.geom_low := ST_SimplifyPreserveTopology(NEW.geometry, {MINE_SIMPLIFY_LOW_DEG});
+            NEW.geom_mid := ST_SimplifyPreserveTopology(NEW.geometry, {MINE_SIMPLIFY_MID_DEG});
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS trg_mines_derive_geometries ON mines",
+        """
+        CREATE TRIGGER trg_mines_derive_geometries
+        BEFORE INSERT OR UPDATE OF geometry ON mines
+        FOR EACH ROW EXECUTE FUNCTION mines_derive_geometries()
+        """,
+        "UPDATE mines SET geometry = geometry WHERE geometry IS NOT NULL",
+    ]
+
+
+def _alerts_feed():
+    """
+    Alerts feed (/alerts): created_at for consumers, and (mine_id, id) so
+    per-mine since_id polls are index range scans. Unfiltered polls use
+    the primary key; date queries keep idx_violation_alerts_mine_date.
+    Existing alerts get the migration time as created_at.
+    """
+    return [
+        "ALTER TABLE violation_alerts ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ DEFAULT now()",
+        "CREATE INDEX IF NOT EXISTS idx_violation_alerts_mine_id ON violation_alerts (mine_id, id)",
+    ]
+
+
+# (version, description, statements)
+MIGRATIONS = [
+    (1, "baseline tables", _baseline),
+    (2, "hash-partition pixel_timeseries by mine_id with covering/BRIN/GiST indexes", _partition_pixel_timeseries),
+    (3, "array-per-pixel layout: pixel_date_axis, pixel_series, pixel_rows()", _pixel_arrays),
+    (4, "pixel_registry and integer pixel_id keys", _pixel_registry),
+    (5, "mine_daily_summary rollup", _daily_summary),
+    (6, "mine_data_versions for response cache invalidation", _data_versions),
+    (7, "keyset index on pixel_timeseries (mine_id, date, pixel_id)", _pixel_keyset_index),
+    (8, "mine catalog: search_text (pg_trgm), per-zoom simplified geometries", _mine_catalog),
+    (9, "alerts feed: violation_alerts.created_at, (mine_id, id) index", _alerts_feed),
+]
+
+
+def _ensure_migrations_table(conn):
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMPTZ DEFAULT now()
+        )
+    """)
+
+
+def applied_versions(engine):
+    """Set of migration versions already applied"""
+    with engine.begin() as conn:
+        _ensure_migrations_table(conn)
+        rows = conn.execute(text("SELECT version FROM schema_migrations")).fetchall()
+    return {row[0] for row in rows}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def migrate(engine):
+    """
+    Apply pending migrations, each in its own transaction.
+    Returns the list of versions applied.
+    """
+    applied = []
+
+    for version, description, build in MIGRATIONS:
+        with engine.begin() as conn:
+            _ensure_migrations_table(conn)
+            # Held until commit; a second migrator waits, then sees the version
+            conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_MIGRATION_LOCK_ID})")
+
+            done = conn.execute(
+                text("SELECT 1 FROM schema_migrations WHERE version = :v"),
+                {"v": version}
+            ).first()
+            if done:
+                continue
+
+            print(f"🛠️  Applying schema migration {version}: {description}")
+            for statement in build():
+                conn.exec_driver_sql(statement)
+
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+                {"v": version, "d": description}
+            )
+            applied.append(version)
+
+    if applied:
+        print(f"✅ Schema migrated to version {MIGRATIONS[-1][0]}")
+    return applied
+
+
+def main():
+    from db.connection import get_engine
+
+    parser = argparse.ArgumentParser(description="Manage the database schema")
+    parser.add_argument("--status", action="store_true", help="show applied and pending migrations")
+    parser.add_argument("--sql", action="store_true", help="print pending SQL without applying it")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if engine is None:
+        raise SystemExit("❌ Database engine not initialized")
+
+    if args.status or args.sql:
+        applied = applied_versions(engine)
+        for version, description, build in MIGRATIONS:
+            state = "applied" if version in applied else "pending"
+            print(f"{version:>3}  {state:<8} {description}")
+            if args.sql and version not in applied:
+                for statement in build():
+                    print(statement.strip().rstrip(";") + ";\n")
+        return
+
+    migrate(engine)
+
+
+if __name__ == "__main__":
+    main()
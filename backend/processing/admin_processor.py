@@ -1,6 +1,7 @@
 # backend/processing/admin_processor.py
 
 from datetime import timedelta
+import time
 import pandas as pd
 
 from algorithms.data_script import fetch_mine_pixel_timeseries_df
@@ -8,13 +9,58 @@ from algorithms.preprocess import preprocess_pixel_timeseries
 from algorithms.model import run_anomaly_detection
 from services.normalize import normalize_df, normalize_alerts
 from services.geo import to_geodf
-from services.db_write import (
-    insert_pixels,
-    insert_violations,
-    insert_alerts
-)
+from services.db_write import RangeWriter
 from services.db_reader import fetch_existing_date_range
-from config.settings import GEE_PROJECT, SHAPEFILE_PATH
+from services.pixel_registry import assign_pixel_ids
+from services.tiles import prewarm_tiles
+from processing.checkpoint import (
+    load_manifest,
+    stage_done,
+    mark_stage,
+    save_frame,
+    load_frame,
+    clear_range,
+    find_checkpoint,
+    prune_checkpoints
+)
+from config.settings import (
+    GEE_PROJECT,
+    SHAPEFILE_PATH,
+    PIXEL_GEOMETRY_MODE,
+    PIPELINE_FETCH_TIMEOUT_SECONDS,
+    PIPELINE_DETECT_TIMEOUT_SECONDS,
+    PIPELINE_WRITE_TIMEOUT_SECONDS
+)
+
+
+class PipelineAborted(RuntimeError):
+    """
+    Raised when a run is cancelled or a stage exceeds its time budget.
+    `reason` is "cancelled" or "timed_out"; `committed` describes the
+    work already written to the database.
+    """
+
+    def __init__(self, reason, message, committed):
+        super().__init__(message)
+        self.reason = reason
+        self.committed = committed
+
+
+def _with_geometry(df):
+    """
+    GeoDataFrame for "client" geometry mode; in "sql" mode the database
+    builds the points from latitude/longitude, so rows go out as-is.
+    """
+    if PIXEL_GEOMETRY_MODE == "client":
+        return to_geodf(df)
+    return df
+
+
+def _with_pixel_ids(df, mine_id):
+    """Registry pixel ids for frames that lack them (older checkpoints)"""
+    if df.empty or "pixel_id" in df.columns:
+        return df
+    return assign_pixel_ids(df, mine_id)
 
 
 def _compute_missing_ranges(
@@ -72,7 +118,8 @@ def run_admin_pipeline(
     mine_id: int,
     start_date: str,
     end_date: str,
-    progress_callback=None
+    progress_callback=None,
+    cancel_event=None
 ):
     """
     Admin ingestion pipeline with range-awareness.
@@ -82,12 +129,63 @@ def run_admin_pipeline(
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
         progress_callback: Optional callback function to report progress (progress_pct, message)
+        cancel_event: Optional threading.Event; when set, the run stops at the
+            next stage or range boundary and raises PipelineAborted
+
+    Raises:
+        PipelineAborted: on cancellation or when the fetch/detect/write stage
+            budget is exhausted. Ranges written before that stay committed.
     """
     
     def update_progress(pct, msg=""):
         """Helper to call progress callback if provided"""
         if progress_callback:
             progress_callback(pct, msg)
+
+    stage_budgets = {
+        "fetch": PIPELINE_FETCH_TIMEOUT_SECONDS,
+        "detect": PIPELINE_DETECT_TIMEOUT_SECONDS,
+        "write": PIPELINE_WRITE_TIMEOUT_SECONDS
+    }
+    stage_elapsed = {stage: 0.0 for stage in stage_budgets}
+    completed_ranges = []
+
+    def committed_summary():
+        """Work that is already in the database"""
+        return {
+            "mine_id": mine_id,
+            "pixels_inserted": total_pixels,
+            "violations_inserted": total_violations,
+            "alerts_inserted": total_alerts,
+            "processed_ranges": [
+                {"start": str(s), "end": str(e)}
+                for s, e in completed_ranges
+            ],
+            "stage_seconds": {k: round(v, 1) for k, v in stage_elapsed.items()}
+        }
+
+    def record_stage(stage, started):
+        stage_elapsed[stage] += time.monotonic() - started
+
+    def check_abort():
+        """Stop if cancelled or any stage is over its budget"""
+        for stage, budget in stage_budgets.items():
+            if budget and stage_elapsed[stage] > budget:
+                raise PipelineAborted(
+                    "timed_out",
+                    f"{stage} stage exceeded its {budget:.0f}s budget",
+                    committed_summary()
+                )
+        if cancel_event is not None and cancel_event.is_set():
+            raise PipelineAborted(
+                "cancelled",
+                "Pipeline cancelled by request",
+                committed_summary()
+            )
+
+    total_pixels = 0
+    total_violations = 0
+    total_alerts = 0
     
     print("\n================ ADMIN PIPELINE START ================")
     print(f"[DEBUG] Mine ID   : {mine_id}")
@@ -106,7 +204,13 @@ def run_admin_pipeline(
         existing_end
     )
 
-    if not missing_ranges:
+    # Checkpoints of already ingested ranges are never resumed
+    prune_checkpoints(mine_id, existing_start, existing_end)
+    resumed = []
+
+    ranges_to_process = missing_ranges
+
+    if not ranges_to_process:
         print("[DEBUG] No missing ranges → pipeline skipped")
         update_progress(100, "No new data to process")
         return {
@@ -119,73 +223,148 @@ def run_admin_pipeline(
             }
         }
 
-    total_pixels = 0
-    total_violations = 0
-    total_alerts = 0
+    # One transaction per range; a connection is held only while writing
+    writer = RangeWriter()
+    for idx, (range_start, range_end) in enumerate(ranges_to_process):
+
+        check_abort()
 
-    for idx, (range_start, range_end) in enumerate(missing_ranges):
+        # Ranges an earlier run fetched/scored but never wrote resume from
+        # their checkpoint (or a wider one) instead of a new GEE fetch
+        source = find_checkpoint(mine_id, range_start, range_end)
+        step = idx * 70 // len(ranges_to_process)
+        df_raw = None
 
         print(f"\n[DEBUG] Processing range {range_start} → {range_end}")
-        update_progress(15 + (idx * 70 // len(missing_ranges)), f"Fetching satellite data for {range_start} to {range_end}...")
-
-        df_raw = fetch_mine_pixel_timeseries_df(
-            gee_project=GEE_PROJECT,
-            shapefile_path=SHAPEFILE_PATH,
-            mine_index=mine_id,
-            start_date=str(range_start),
-            end_date=str(range_end)
-        )
+        if source is None:
+            manifest = load_manifest(mine_id, range_start, range_end)
+        elif source["range"] == {"start": str(range_start), "end": str(range_end)}:
+            manifest = source
+            resumed.append((range_start, range_end))
+            print(f"[DEBUG] Resuming from checkpoint, done: {list(manifest['stages'])}")
+        else:
+            # Fetched pixels of a wider range: keep this range's dates
+            manifest = load_manifest(mine_id, range_start, range_end)
+            df_raw = load_frame(source, "raw")
+            dates = pd.to_datetime(df_raw["date"]).dt.date
+            df_raw = df_raw[(dates >= range_start) & (dates <= range_end)].reset_index(drop=True)
+            resumed.append((range_start, range_end))
+            print(f"[DEBUG] Reusing fetched pixels from checkpoint {source['range']}")
+
+        # -------------------------------
+        # Fetch (checkpoint: raw)
+        # -------------------------------
+        started = time.monotonic()
+        if df_raw is not None:
+            update_progress(15 + step, f"Loading checkpointed data for {range_start} to {range_end}...")
+            if not df_raw.empty:
+                save_frame(manifest, "raw", df_raw)
+            mark_stage(manifest, "fetch", rows=len(df_raw), from_range=source["range"])
+        elif stage_done(manifest, "fetch"):
+            update_progress(15 + step, f"Loading checkpointed data for {range_start} to {range_end}...")
+            df_raw = (
+                load_frame(manifest, "raw")
+                if manifest["stages"]["fetch"].get("rows")
+                else pd.DataFrame()
+            )
+        else:
+            update_progress(15 + step, f"Fetching satellite data for {range_start} to {range_end}...")
+            df_raw = fetch_mine_pixel_timeseries_df(
+                gee_project=GEE_PROJECT,
+                shapefile_path=SHAPEFILE_PATH,
+                mine_index=mine_id,
+                start_date=str(range_start),
+                end_date=str(range_end)
+            )
+            if not df_raw.empty:
+                # Stable integer identity for every pixel from here on
+                df_raw = assign_pixel_ids(df_raw, mine_id)
+                save_frame(manifest, "raw", df_raw)
+            mark_stage(manifest, "fetch", rows=len(df_raw))
+
+        record_stage("fetch", started)
+        check_abort()
 
         if df_raw.empty:
             print(f"[DEBUG] No data fetched for range {range_start} → {range_end}")
+            clear_range(mine_id, range_start, range_end)
+            completed_ranges.append((range_start, range_end))
             continue
 
-        update_progress(25 + (idx * 70 // len(missing_ranges)), "Preprocessing pixel data...")
-        _, _, df_scaled = preprocess_pixel_timeseries(df_raw)
+        # -------------------------------
+        # Detect (checkpoint: anomaly, violations, alerts)
+        # -------------------------------
+        started = time.monotonic()
+        if stage_done(manifest, "detect"):
+            df_anomaly = _with_pixel_ids(load_frame(manifest, "anomaly"), mine_id)
+            violations = _with_pixel_ids(load_frame(manifest, "violations"), mine_id)
+            alerts_df = load_frame(manifest, "alerts")
+        else:
+            # Checkpoints written before pixel ids existed
+            df_raw = _with_pixel_ids(df_raw, mine_id)
+
+            update_progress(25 + step, "Preprocessing pixel data...")
+            _, _, df_scaled = preprocess_pixel_timeseries(df_raw)
+
+            # 🔥 Capture all outputs
+            update_progress(40 + step, "Running anomaly detection...")
+            df_anomaly, violations, alerts_df = run_anomaly_detection(df_scaled)
 
-        # 🔥 Capture all outputs
-        update_progress(40 + (idx * 70 // len(missing_ranges)), "Running anomaly detection...")
-        df_anomaly, violations, alerts_df = run_anomaly_detection(df_scaled)
+            save_frame(manifest, "anomaly", df_anomaly)
+            save_frame(manifest, "violations", violations)
+            save_frame(manifest, "alerts", alerts_df)
+            mark_stage(manifest, "detect", rows=len(df_anomaly))
+
+        record_stage("detect", started)
+        check_abort()
+
+        # Writes for a range are not interrupted once started
+        started = time.monotonic()
 
         # -------------------------------
-        # 1️⃣ Store pixel anomaly data
+        # Store pixels, violations and alerts atomically
         # -------------------------------
-        update_progress(55 + (idx * 70 // len(missing_ranges)), "Storing pixel data...")
+        update_progress(55 + step, "Storing pixel, violation and alert data...")
         df_clean = normalize_df(df_anomaly, mine_id)
 
         # 🔑 REMOVE DUPLICATES (matches uq_pixel_unique)
         df_clean = df_clean.drop_duplicates(
-            subset=["mine_id", "date", "latitude", "longitude"]
+            subset=["mine_id", "pixel_id", "date"]
         )
+        gdf_pixels = _with_geometry(df_clean)
 
-        gdf_pixels = to_geodf(df_clean)
-        insert_pixels(gdf_pixels)
-        total_pixels += len(gdf_pixels)
-
-        # -------------------------------
-        # 2️⃣ Store violation pixels
-        # -------------------------------
-        update_progress(70 + (idx * 70 // len(missing_ranges)), "Storing violation data...")
+        gdf_violations = None
         if not violations.empty:
             violations_clean = normalize_df(violations, mine_id)
 
             # 🔑 REMOVE DUPLICATES (matches uq_violation_pixel_unique)
             violations_clean = violations_clean.drop_duplicates(
-                subset=["mine_id", "date", "latitude", "longitude", "zone_type"]
+                subset=["pixel_id", "date", "zone_type"]
             )
+            gdf_violations = _with_geometry(violations_clean)
 
-            gdf_violations = to_geodf(violations_clean)
-            insert_violations(gdf_violations)
-            total_violations += len(gdf_violations)
-
-        # -------------------------------
-        # 3️⃣ Store alerts
-        # -------------------------------
-        update_progress(85 + (idx * 70 // len(missing_ranges)), "Storing alerts...")
+        alerts_clean = None
         if not alerts_df.empty:
             alerts_clean = normalize_alerts(alerts_df, mine_id)
-            insert_alerts(alerts_clean)
-            total_alerts += len(alerts_clean)
+
+        counts = writer.write_range(
+            mine_id,
+            range_start,
+            range_end,
+            gdf_pixels,
+            gdf_violations,
+            alerts_clean
+        )
+        total_pixels += counts["pixels"]
+        total_violations += counts["violations"]
+        total_alerts += counts["alerts"]
+        mark_stage(manifest, "write", **counts)
+
+        # Every stage committed → checkpoint no longer needed
+        clear_range(mine_id, range_start, range_end)
+
+        record_stage("write", started)
+        completed_ranges.append((range_start, range_end))
 
     print("\n================ ADMIN PIPELINE END =================")
     print(
@@ -194,6 +373,14 @@ def run_admin_pipeline(
         f"Alerts: {total_alerts}"
     )
 
+    # Map tiles for the new data version; the data itself is already committed
+    if completed_ranges:
+        update_progress(95, "Pre-rendering map tiles...")
+        try:
+            prewarm_tiles(mine_id)
+        except Exception as e:
+            print(f"⚠️  Tile pre-rendering failed for mine {mine_id}: {e}")
+
     update_progress(100, "Pipeline completed successfully!")
 
     return {
@@ -204,6 +391,10 @@ def run_admin_pipeline(
         "alerts_inserted": total_alerts,
         "processed_ranges": [
             {"start": str(s), "end": str(e)}
-            for s, e in missing_ranges
+            for s, e in ranges_to_process
+        ],
+        "resumed_ranges": [
+            {"start": str(s), "end": str(e)}
+            for s, e in resumed
         ]
     }
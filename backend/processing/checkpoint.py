@@ -0,0 +1,218 @@
+# backend/processing/checkpoint.py
+
+"""
+Per-range checkpoints for the admin pipeline.
+
+Each (mine, range) gets a directory holding Parquet snapshots of the
+intermediate outputs plus a manifest.json recording which stages have
+finished. A rerun of the same range restarts at the first incomplete
+stage instead of refetching from GEE and refitting the model. A different
+range lying inside an unfinished checkpoint reuses its fetched pixels
+(filtered by date); detection is refit, since the model depends on the
+whole range it was fit on.
+
+Checkpoints are pruned once the mine's ingested coverage includes their
+range, and after CHECKPOINT_TTL_SECONDS in any case.
+
+Layout:
+    CHECKPOINT_DIR/mine_<id>/<start>_<end>/
+        manifest.json
+        raw.parquet          (fetch)
+        anomaly.parquet      (detect)
+        violations.parquet   (detect)
+        alerts.parquet       (detect)
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import geopandas as gpd
+import pandas as pd
+
+from config.settings import CHECKPOINT_DIR, CHECKPOINT_TTL_SECONDS, PIPELINE_CHECKPOINTS
+
+# Stages in pipeline order ("write" covers pixels, violations and alerts,
+# which are committed in one transaction)
+STAGES = ("fetch", "detect", "write")
+
+
+def _range_dir(mine_id, range_start, range_end):
+    return os.path.join(
+        CHECKPOINT_DIR,
+        f"mine_{mine_id}",
+        f"{range_start}_{range_end}"
+    )
+
+
+def load_manifest(mine_id, range_start, range_end) -> dict:
+    """Return the stage manifest for a range (empty stages if none yet)"""
+    path = os.path.join(_range_dir(mine_id, range_start, range_end), "manifest.json")
+    if PIPELINE_CHECKPOINTS and os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[DEBUG] Ignoring unreadable checkpoint manifest {path}: {e}")
+
+    return {
+        "mine_id": int(mine_id),
+        "range": {"start": str(range_start), "end": str(range_end)},
+        "stages": {}
+    }
+
+
+def stage_done(manifest: dict, stage: str) -> bool:
+    return stage in manifest["stages"]
+
+
+def mark_stage(manifest: dict, stage: str, **info):
+    """Record a finished stage and persist the manifest"""
+    if not PIPELINE_CHECKPOINTS:
+        return
+
+    manifest["stages"][stage] = {
+        "completed_at": datetime.now().isoformat(),
+        **info
+    }
+
+    range_dir = _range_dir(
+        manifest["mine_id"],
+        manifest["range"]["start"],
+        manifest["range"]["end"]
+    )
+    os.makedirs(range_dir, exist_ok=True)
+
+    # Write-then-rename so a crash never leaves a half-written manifest
+    tmp_path = os.path.join(range_dir, "manifest.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(range_dir, "manifest.json"))
+
+
+def save_frame(manifest: dict, name: str, df: pd.DataFrame):
+    """Snapshot an intermediate DataFrame/GeoDataFrame as Parquet"""
+    if not PIPELINE_CHECKPOINTS:
+        return
+
+    range_dir = _range_dir(
+        manifest["mine_id"],
+        manifest["range"]["start"],
+        manifest["range"]["end"]
+    )
+    os.makedirs(range_dir, exist_ok=True)
+    df.to_parquet(os.path.join(range_dir, f"{name}.parquet"), index=False)
+
+
+def load_frame(manifest: dict, name: str) -> pd.DataFrame:
+    """Load a snapshot written by save_frame (GeoParquet comes back as a GeoDataFrame)"""
+    path = os.path.join(
+        _range_dir(
+            manifest["mine_id"],
+            manifest["range"]["start"],
+            manifest["range"]["end"]
+        ),
+        f"{name}.parquet"
+    )
+
+    try:
+        return gpd.read_parquet(path)
+    except ValueError:
+        # Plain Parquet without geo metadata
+        return pd.read_parquet(path)
+
+
+def clear_range(mine_id, range_start, range_end):
+    """Remove a range's checkpoint once all stages are committed"""
+    shutil.rmtree(_range_dir(mine_id, range_start, range_end), ignore_errors=True)
+
+
+def _parse_range(entry):
+    """(start, end) dates of a range directory name, None if it is not one"""
+    try:
+        start_str, end_str = entry.split("_")
+        return (
+            datetime.strptime(start_str, "%Y-%m-%d").date(),
+            datetime.strptime(end_str, "%Y-%m-%d").date()
+        )
+    except ValueError:
+        return None
+
+
+def list_checkpoints(mine_id):
+    """Checkpointed ranges of a mine as a list of (start_date, end_date, manifest)"""
+    mine_dir = os.path.join(CHECKPOINT_DIR, f"mine_{mine_id}")
+    if not PIPELINE_CHECKPOINTS or not os.path.isdir(mine_dir):
+        return []
+
+    checkpoints = []
+    for entry in sorted(os.listdir(mine_dir)):
+        parsed = _parse_range(entry)
+        if parsed:
+            checkpoints.append((*parsed, load_manifest(mine_id, *parsed)))
+    return checkpoints
+
+
+def find_checkpoint(mine_id, range_start, range_end):
+    """
+    Checkpoint to resume [range_start, range_end] from, or None:
+    the range's own manifest if it has finished stages, else the
+    narrowest unfinished checkpoint whose range contains it and whose
+    fetch stage holds rows (only its raw snapshot is reusable).
+    """
+    best = None
+    for start, end, manifest in list_checkpoints(mine_id):
+        if stage_done(manifest, "write"):
+            continue
+        if (start, end) == (range_start, range_end):
+            if manifest["stages"]:
+                return manifest
+            continue
+        fetched = manifest["stages"].get("fetch", {}).get("rows")
+        if fetched and start <= range_start and range_end <= end:
+            if best is None or end - start < best[1] - best[0]:
+                best = (start, end, manifest)
+    return best[2] if best else None
+
+
+def prune_checkpoints(mine_id, covered_start=None, covered_end=None):
+    """
+    Remove this mine's checkpoints inside [covered_start, covered_end]
+    (already ingested, never fetched again) and any mine's checkpoints
+    older than CHECKPOINT_TTL_SECONDS. Returns the number removed.
+    """
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return 0
+
+    now = time.time()
+    removed = 0
+    for mine_entry in os.listdir(CHECKPOINT_DIR):
+        mine_dir = os.path.join(CHECKPOINT_DIR, mine_entry)
+        if not os.path.isdir(mine_dir):
+            continue
+        own = mine_entry == f"mine_{mine_id}"
+
+        for entry in os.listdir(mine_dir):
+            range_dir = os.path.join(mine_dir, entry)
+            parsed = _parse_range(entry)
+            covered = (
+                own and parsed is not None
+                and covered_start is not None and covered_end is not None
+                and covered_start <= parsed[0] and parsed[1] <= covered_end
+            )
+            try:
+                expired = (
+                    CHECKPOINT_TTL_SECONDS > 0
+                    and now - os.path.getmtime(range_dir) > CHECKPOINT_TTL_SECONDS
+                )
+            except OSError:
+                continue
+            if covered or expired:
+                shutil.rmtree(range_dir, ignore_errors=True)
+                removed += 1
+
+    if removed:
+        print(f"[DEBUG] Pruned {removed} stale checkpoint(s)")
+    return removed
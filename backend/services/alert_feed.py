@@ -0,0 +1,128 @@
+# backend/services/alert_feed.py
+
+"""
+Incremental feed over violation_alerts.
+
+Consumers page with a since_id cursor: alerts with id > since_id, in id
+order. For that to never skip an alert, ids must become visible in order.
+Alert writers therefore take ALERTS_WRITE_LOCK_SQL (a transaction-level
+advisory lock) before merging, so alert transactions commit one at a time.
+
+The feed carries new alerts only. Re-ingesting a range updates existing
+alerts in place (ON CONFLICT keeps the row and its id), so consumers that
+are past that id never see the update.
+
+Writers in this process call notify_alerts() after commit, which wakes
+long-poll and SSE waiters at once. Writes from other processes are picked
+up by the waiters' periodic re-query (ALERTS_POLL_SECONDS).
+"""
+
+import asyncio
+import threading
+
+from sqlalchemy import text
+
+from db.connection import get_async_engine
+
+# Serializes alert writers until commit (see module docstring)
+ALERTS_WRITE_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('violation_alerts'))"
+
+# Set of (loop, asyncio.Event)
+_SUBSCRIBERS = set()
+
+_SUBSCRIBERS_LOCK = threading.Lock()
+
+
+# =====================================================
+# IN-PROCESS NOTIFICATION
+# =====================================================
+def notify_alerts():
+    """Wake every feed waiter (safe to call from pipeline threads)"""
+    with _SUBSCRIBERS_LOCK:
+        subscribers = list(_SUBSCRIBERS)
+
+    for loop, wakeup in subscribers:
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            # Subscriber's loop already closed; it will be dropped on unsubscribe
+            pass
+
+
+def subscribe() -> asyncio.Event:
+    """Register a waiter on the running loop and return its wakeup event"""
+    wakeup = asyncio.Event()
+    with _SUBSCRIBERS_LOCK:
+        _SUBSCRIBERS.add((asyncio.get_running_loop(), wakeup))
+    return wakeup
+
+
+def unsubscribe(wakeup: asyncio.Event):
+    with _SUBSCRIBERS_LOCK:
+        for entry in [e for e in _SUBSCRIBERS if e[1] is wakeup]:
+            _SUBSCRIBERS.discard(entry)
+
+
+# =====================================================
+# FEED QUERY
+# =====================================================
+def alerts_feed_sql(mine_ids=False, zone_type=False, alert_type=False):
+    """
+    Alerts after :since_id in id order, at most :limit.
+    Optional filters: :mine_ids (int[]), :zone_type, :alert_type.
+    """
+    filters = [
+        "a.mine_id = ANY(:mine_ids)" if mine_ids else None,
+        "a.zone_type = :zone_type" if zone_type else None,
+        "a.alert_type = :alert_type" if alert_type else None,
+    ]
+    return f"""
+        SELECT
+            a.id,
+            a.mine_id,
+            m.display_name,
+            a.date,
+            a.zone_type,
+            a.alert_type,
+            a.affected_area,
+            a.created_at
+        FROM violation_alerts a
+        LEFT JOIN mines m ON m.mine_id = a.mine_id
+        WHERE a.id > :since_id
+          {"".join(f"AND {f} " for f in filters if f)}
+        ORDER BY a.id
+        LIMIT :limit
+    """
+
+
+def alert_from_row(row):
+    return {
+        "id": int(row['id']),
+        "mine_id": int(row['mine_id']),
+        "display_name": row['display_name'],
+        "date": str(row['date']),
+        "zone_type": row['zone_type'],
+        "alert_type": row['alert_type'],
+        "affected_area": float(row['affected_area']) if row['affected_area'] is not None else None,
+        "created_at": row['created_at'].isoformat() if row['created_at'] else None
+    }
+
+
+async def fetch_alerts_async(since_id=0, limit=100, mine_ids=None, zone_type=None, alert_type=None):
+    """Alerts after since_id (list of dicts). Errors propagate to the caller."""
+    engine = get_async_engine()
+    if engine is None:
+        raise RuntimeError("Async database engine not initialized")
+
+    params = {"since_id": int(since_id), "limit": int(limit)}
+    if mine_ids:
+        params["mine_ids"] = [int(mine_id) for mine_id in mine_ids]
+    if zone_type:
+        params["zone_type"] = zone_type
+    if alert_type:
+        params["alert_type"] = alert_type
+
+    sql = alerts_feed_sql(bool(mine_ids), bool(zone_type), bool(alert_type))
+    async with engine.connect() as conn:
+        result = await conn.execute(text(sql), params)
+        return [alert_from_row(row) for row in result.mappings().all()]
@@ -0,0 +1,254 @@
+# backend/services/cache.py
+
+"""
+Response cache for the /mine endpoints.
+
+Entries are serialized JSON bodies keyed by endpoint, mine, range, extra
+params and the mine's data version. RangeWriter bumps the version
+(mine_data_versions) in the same transaction as each write, so a new
+pipeline run changes the key and old entries are never served; they age
+out of the LRU.
+
+Local tier: in-process LRU bounded by total bytes (CACHE_MAX_BYTES).
+Shared tier (optional): Redis, when CACHE_REDIS_URL is set and the redis
+package is installed, so several API workers share entries.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+
+from sqlalchemy import text
+from db.connection import get_engine, get_async_engine
+from config.settings import (
+    CACHE_ENABLED,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRY_BYTES,
+    CACHE_REDIS_URL,
+    CACHE_REDIS_TTL_SECONDS,
+    CACHE_VERSION_TTL_SECONDS
+)
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis_asyncio = None
+
+_ENTRIES = OrderedDict()   # key -> bytes, least recently used first
+_CACHE_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0, "shared_hits": 0}
+
+# mine_id -> (version, updated_at, fetched_at monotonic)
+_VERSIONS = {}
+_VERSIONS_LOCK = threading.Lock()
+
+_redis = None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None and CACHE_REDIS_URL and redis_asyncio is not None:
+        _redis = redis_asyncio.from_url(CACHE_REDIS_URL)
+    return _redis
+
+
+# =====================================================
+# DATA VERSIONS
+# =====================================================
+def _as_utc(updated_at):
+    """updated_at arrives in the session TimeZone; HTTP dates need UTC"""
+    if updated_at is None:
+        return None
+    if updated_at.tzinfo is None:
+        return updated_at.replace(tzinfo=timezone.utc)
+    return updated_at.astimezone(timezone.utc)
+
+
+def note_mine_version(mine_id, version, updated_at=None):
+    """Record a version committed by this process (called by RangeWriter)"""
+    with _VERSIONS_LOCK:
+        _VERSIONS[int(mine_id)] = (int(version), _as_utc(updated_at), time.monotonic())
+
+
+_VERSION_SQL = "SELECT version, updated_at FROM mine_data_versions WHERE mine_id = :mine_id"
+
+
+def _known_state(mine_id):
+    with _VERSIONS_LOCK:
+        known = _VERSIONS.get(mine_id)
+    if known and time.monotonic() - known[2] < CACHE_VERSION_TTL_SECONDS:
+        return known[0], known[1]
+    return None
+
+
+def _remember_state(mine_id, row):
+    version, updated_at = (int(row[0]), _as_utc(row[1])) if row else (0, None)
+    with _VERSIONS_LOCK:
+        current = _VERSIONS.get(mine_id)
+        # Never move backwards past a version this process committed
+        if current and current[0] > version:
+            version, updated_at = current[0], current[1]
+        _VERSIONS[mine_id] = (version, updated_at, time.monotonic())
+    return version, updated_at
+
+
+async def get_mine_state_async(mine_id):
+    """
+    (version, updated_at) of a mine's data, (0, None) if never written,
+    or None when it cannot be read. Writes made by this process are seen
+    immediately; writes from other processes within
+    CACHE_VERSION_TTL_SECONDS.
+    """
+    mine_id = int(mine_id)
+    known = _known_state(mine_id)
+    if known:
+        return known
+
+    try:
+        engine = get_async_engine()
+        if engine is None:
+            raise RuntimeError("Async database engine not initialized")
+
+        async with engine.connect() as conn:
+            result = await conn.execute(text(_VERSION_SQL), {"mine_id": mine_id})
+            row = result.first()
+    except Exception as e:
+        print(f"[DEBUG] Could not read data version for mine {mine_id}: {e}")
+        return None
+
+    return _remember_state(mine_id, row)
+
+
+def get_mine_state(mine_id):
+    """Sync get_mine_state_async, for pipeline threads"""
+    mine_id = int(mine_id)
+    known = _known_state(mine_id)
+    if known:
+        return known
+
+    try:
+        engine = get_engine()
+        if engine is None:
+            raise RuntimeError("Database engine not initialized")
+
+        with engine.connect() as conn:
+            row = conn.execute(text(_VERSION_SQL), {"mine_id": mine_id}).first()
+    except Exception as e:
+        print(f"[DEBUG] Could not read data version for mine {mine_id}: {e}")
+        return None
+
+    return _remember_state(mine_id, row)
+
+
+# =====================================================
+# ENTRIES
+# =====================================================
+def cache_key(endpoint, mine_id, version, *parts):
+    return ":".join(["mine", endpoint, str(mine_id), f"v{version}", *map(str, parts)])
+
+
+def _json_default(obj):
+    # numpy scalars -> Python; dates and the rest -> str
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+def to_json_bytes(value) -> bytes:
+    """Serialize like Starlette's JSONResponse"""
+    return json.dumps(
+        value,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_json_default
+    ).encode("utf-8")
+
+
+async def cache_get(key):
+    if not CACHE_ENABLED:
+        return None
+
+    with _CACHE_LOCK:
+        body = _ENTRIES.get(key)
+        if body is not None:
+            _ENTRIES.move_to_end(key)
+            _STATS["hits"] += 1
+            return body
+
+    shared = _get_redis()
+    if shared is not None:
+        try:
+            body = await shared.get(key)
+        except Exception as e:
+            print(f"[DEBUG] Shared cache unavailable: {e}")
+            body = None
+        if body is not None:
+            _store_local(key, body)
+            with _CACHE_LOCK:
+                _STATS["shared_hits"] += 1
+            return body
+
+    with _CACHE_LOCK:
+        _STATS["misses"] += 1
+    return None
+
+
+def _store_local(key, body):
+    if len(body) > CACHE_MAX_ENTRY_BYTES:
+        return
+
+    with _CACHE_LOCK:
+        old = _ENTRIES.pop(key, None)
+        if old is not None:
+            _STATS["bytes"] -= len(old)
+
+        _ENTRIES[key] = body
+        _STATS["bytes"] += len(body)
+
+        while _STATS["bytes"] > CACHE_MAX_BYTES and _ENTRIES:
+            _, evicted = _ENTRIES.popitem(last=False)
+            _STATS["bytes"] -= len(evicted)
+            _STATS["evictions"] += 1
+
+
+async def cache_set(key, body: bytes):
+    if not CACHE_ENABLED:
+        return
+
+    _store_local(key, body)
+
+    shared = _get_redis()
+    if shared is not None and len(body) <= CACHE_MAX_ENTRY_BYTES:
+        try:
+            await shared.set(key, body, ex=CACHE_REDIS_TTL_SECONDS)
+        except Exception as e:
+            print(f"[DEBUG] Shared cache unavailable: {e}")
+
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _ENTRIES.clear()
+        _STATS["bytes"] = 0
+
+
+def get_cache_metrics():
+    with _CACHE_LOCK:
+        stats = dict(_STATS)
+        entries = len(_ENTRIES)
+
+    lookups = stats["hits"] + stats["shared_hits"] + stats["misses"]
+    return {
+        "enabled": CACHE_ENABLED,
+        "entries": entries,
+        "bytes": stats["bytes"],
+        "max_bytes": CACHE_MAX_BYTES,
+        "hits": stats["hits"],
+        "shared_hits": stats["shared_hits"],
+        "misses": stats["misses"],
+        "hit_ratio": round((stats["hits"] + stats["shared_hits"]) / lookups, 3) if lookups else 0.0,
+        "evictions": stats["evictions"],
+        "shared_backend": "redis" if _get_redis() is not None else None
+    }
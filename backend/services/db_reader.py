@@ -1,9 +1,634 @@
 # backend/services/db_reader.py
 
+"""
+Sync readers for pixel and mine data.
+
+SQL and result shaping live here as module-level helpers and are shared
+with services/db_reader_async.py, so both paths return identical output.
+"""
+
+import json
+import math
+
 import pandas as pd
+from sqlalchemy import text
 from db.connection import get_engine
 from services.csv_reader import fetch_pixels_from_csv
+from db.mine_catalog import geometry_column
+from db.rollup import PIXEL_AREA_M2
+from config.settings import PIXEL_STORAGE_LAYOUT, GRID_CELL_PX, PIXEL_HISTORY_MAX_DISTANCE_M
+
+
+def _pixel_source():
+    """
+    FROM-clause relation with the pixel_timeseries row shape for one mine
+    and date range. Uses :mine_id, :start_date and :end_date.
+    """
+    if PIXEL_STORAGE_LAYOUT == "arrays":
+        return "pixel_rows(:mine_id, :start_date, :end_date) p"
+
+    return """(
+                SELECT * FROM pixel_timeseries
+                WHERE mine_id = :mine_id
+                  AND date BETWEEN :start_date AND :end_date
+            ) p"""
+
+
+def _range_params(mine_id, start_date, end_date):
+    """Bind params for the range queries (asyncpg needs real dates)"""
+    return {
+        "mine_id": int(mine_id),
+        "start_date": pd.to_datetime(start_date).date(),
+        "end_date": pd.to_datetime(end_date).date()
+    }
+
+
+# =====================================================
+# SHARED SQL
+# =====================================================
+def pixels_sql(keyset=False, limit=False):
+    """
+    Pixel rows in (date, pixel_id) order. keyset=True resumes after
+    (:after_date, :after_pixel_id); limit=True adds LIMIT :limit.
+    """
+    return f"""
+        SELECT
+            mine_id,
+            pixel_id,
+            date,
+            latitude,
+            longitude,
+            b4,
+            b8,
+            b11,
+            ndvi,
+            nbr,
+            anomaly_label,
+            anomaly_score,
+            excavated_flag
+        FROM {_pixel_source()}
+        {"WHERE (date, pixel_id) > (:after_date, :after_pixel_id)" if keyset else ""}
+        ORDER BY date, pixel_id
+        {"LIMIT :limit" if limit else ""}
+    """
+
+
+def format_pixel_cursor(date, pixel_id):
+    """Opaque keyset cursor for the row (date, pixel_id)"""
+    return f"{date}_{int(pixel_id)}"
+
+
+def parse_pixel_cursor(cursor):
+    """Inverse of format_pixel_cursor; raises ValueError when malformed"""
+    date, pixel_id = cursor.split("_")
+    return {
+        "after_date": pd.to_datetime(date).date(),
+        "after_pixel_id": int(pixel_id)
+    }
+
+
+PIXEL_HISTORY_COLUMNS = [
+    "b4", "b8", "b11", "ndvi", "nbr",
+    "anomaly_label", "anomaly_score", "excavated_flag"
+]
+
+
+def _pixel_series_source():
+    """
+    FROM-clause relation with one pixel's observations (all dates), for
+    n.pixel_id of the enclosing query. Index lookups in both layouts.
+    """
+    if PIXEL_STORAGE_LAYOUT == "arrays":
+        return f"""(
+                SELECT u.*
+                FROM pixel_series s
+                JOIN pixel_date_axis a
+                  ON a.mine_id = s.mine_id
+                 AND a.chunk_start = s.chunk_start
+                CROSS JOIN LATERAL unnest(
+                    a.dates, {", ".join(f"s.{col}" for col in PIXEL_HISTORY_COLUMNS)}
+                ) AS u(date, {", ".join(PIXEL_HISTORY_COLUMNS)})
+                WHERE s.mine_id = :mine_id
+                  AND s.pixel_id = n.pixel_id
+                  AND COALESCE(u.b4, u.b8, u.b11, u.ndvi, u.nbr, u.anomaly_score) IS NOT NULL
+            )"""
+
+    return f"""(
+                SELECT date, {", ".join(PIXEL_HISTORY_COLUMNS)}
+                FROM pixel_timeseries
+                WHERE mine_id = :mine_id
+                  AND pixel_id = n.pixel_id
+            )"""
+
+
+def pixel_history_sql():
+    """
+    Full history of the mine's pixel nearest to (:lat, :lon): KNN (<->)
+    on the pixel_registry GiST index, then that pixel's rows. One row per
+    date; a single row with NULL date when the pixel has no observations.
+    """
+    return f"""
+        WITH n AS (
+            SELECT pixel_id, latitude, longitude
+            FROM pixel_registry
+            WHERE mine_id = :mine_id
+            ORDER BY geometry <-> ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)
+            LIMIT 1
+        )
+        SELECT n.pixel_id, n.latitude, n.longitude, h.*
+        FROM n
+        LEFT JOIN LATERAL {_pixel_series_source()} h ON true
+        ORDER BY h.date
+    """
+
+
+MINE_DETAILS_SQL = """
+    SELECT
+        mine_id,
+        display_name,
+        state,
+        district,
+        subdistrict,
+        ST_AsGeoJSON(geometry) as geometry
+    FROM mines
+    WHERE mine_id = :mine_id
+"""
+
+
+# KPI and chart aggregates read the per-day rollup (db/rollup.py),
+# a few hundred rows per mine instead of the raw pixels
+SUMMARY_RANGE = """
+        FROM mine_daily_summary
+        WHERE mine_id = :mine_id
+          AND date BETWEEN :start_date AND :end_date
+"""
+
+
+def _summary_mean(group, band):
+    return f"SUM({group}_{band}_sum) / NULLIF(SUM({group}_count), 0)"
+
+
+def kpi_sql():
+    return f"""
+        SELECT
+            SUM(pixel_count) as total_pixels,
+            SUM(anomalous_count) as excavated_pixels,
+            {_summary_mean("normal", "ndvi")} as avg_ndvi_normal,
+            {_summary_mean("anomalous", "ndvi")} as avg_ndvi_excavated,
+            MAX(max_anomaly_score) as max_anomaly_score,
+            MIN(date) as start_date,
+            MAX(date) as end_date
+        {SUMMARY_RANGE}
+    """
+
+
+# ORDER BY expressions for bulk_kpi_sql (sort= values). "Excavated" means
+# anomaly_label = 1 throughout, as in kpi_sql(); the rollup's own
+# excavated_area column (excavated_flag) is not used here.
+KPI_SORT_COLUMNS = {
+    "excavated_percentage": "SUM(anomalous_count)::float8 / NULLIF(SUM(pixel_count), 0)",
+    "excavated_area": "SUM(anomalous_count)",
+    "violation_area": "SUM(violation_area)",
+    "max_anomaly_score": "MAX(max_anomaly_score)",
+    "mine_id": "mine_id",
+}
+
+
+def bulk_kpi_sql(sort="excavated_percentage", descending=True, mine_ids=False, limit=False):
+    """
+    kpi_sql() for many mines in one grouped scan of the rollup.
+    mine_ids=True restricts to :mine_ids (int[]); limit=True adds LIMIT :limit.
+    """
+    direction = "DESC" if descending else "ASC"
+    return f"""
+        SELECT
+            mine_id,
+            m.display_name,
+            SUM(pixel_count) as total_pixels,
+            SUM(anomalous_count) as excavated_pixels,
+            {_summary_mean("normal", "ndvi")} as avg_ndvi_normal,
+            {_summary_mean("anomalous", "ndvi")} as avg_ndvi_excavated,
+            MAX(max_anomaly_score) as max_anomaly_score,
+            SUM(anomalous_count)::float8 * {PIXEL_AREA_M2} as excavated_area,
+            SUM(violation_area) as violation_area,
+            MIN(date) as start_date,
+            MAX(date) as end_date
+        FROM mine_daily_summary
+        LEFT JOIN mines m USING (mine_id)
+        WHERE date BETWEEN :start_date AND :end_date
+          {"AND mine_id = ANY(:mine_ids)" if mine_ids else ""}
+        GROUP BY mine_id, m.display_name
+        ORDER BY {KPI_SORT_COLUMNS[sort]} {direction} NULLS LAST, mine_id
+        {"LIMIT :limit" if limit else ""}
+    """
+
+
+def bulk_kpi_params(start_date, end_date, mine_ids=None, limit=None):
+    params = {
+        "start_date": pd.to_datetime(start_date).date(),
+        "end_date": pd.to_datetime(end_date).date()
+    }
+    if mine_ids:
+        params["mine_ids"] = [int(mine_id) for mine_id in mine_ids]
+    if limit:
+        params["limit"] = int(limit)
+    return params
+
+
+def violations_sql():
+    # Every date in range, anomalous pixel count
+    return f"""
+        SELECT
+            date,
+            anomalous_count as affected_area
+        {SUMMARY_RANGE}
+        ORDER BY date
+    """
+
+
+def compliance_sql():
+    # Excavated pixels per date vs the distinct ones inside a no-go zone
+    return f"""
+        SELECT
+            date,
+            excavated_count as excavated,
+            violation_pixels as no_go
+        {SUMMARY_RANGE}
+          AND excavated_count > 0
+        ORDER BY date
+    """
+
+
+SPECTRAL_BANDS = ['b4', 'b8', 'b11', 'ndvi', 'nbr']
+
+
+def spectral_signature_sql():
+    averages = ",\n            ".join(
+        f"{_summary_mean(group, band)} as {group}_{band}"
+        for group in ("normal", "anomalous")
+        for band in SPECTRAL_BANDS
+    )
+    return f"""
+        SELECT
+            SUM(pixel_count) as total,
+            SUM(normal_count) as normal_count,
+            SUM(anomalous_count) as anomalous_count,
+            {averages}
+        {SUMMARY_RANGE}
+    """
+
+
+def grid_cell_deg(zoom):
+    """Cell edge in degrees: GRID_CELL_PX screen pixels at web-map `zoom`"""
+    return 360.0 / (256 * 2 ** zoom) * GRID_CELL_PX
+
+
+def parse_bbox(bbox):
+    """"min_lon,min_lat,max_lon,max_lat" → bind params; ValueError if malformed"""
+    min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError("bbox min exceeds max")
+    return {"min_lon": min_lon, "min_lat": min_lat, "max_lon": max_lon, "max_lat": max_lat}
+
+
+def grid_sql(bbox=False):
+    """
+    Pixel observations binned onto a :cell_deg grid, one row per cell.
+    bbox=True restricts to :min_lon/:min_lat/:max_lon/:max_lat.
+    """
+    where = (
+        "WHERE longitude BETWEEN :min_lon AND :max_lon "
+        "AND latitude BETWEEN :min_lat AND :max_lat"
+        if bbox else ""
+    )
+    return f"""
+        SELECT
+            floor(longitude / :cell_deg)::bigint as gx,
+            floor(latitude / :cell_deg)::bigint as gy,
+            COUNT(DISTINCT pixel_id) as pixel_count,
+            COUNT(*) as observations,
+            AVG(ndvi) as mean_ndvi,
+            AVG(anomaly_score) as mean_anomaly_score,
+            AVG(CASE WHEN anomaly_label = 1 THEN 1.0 ELSE 0.0 END) as anomaly_fraction,
+            SUM(excavated_flag) as excavated_count
+        FROM {_pixel_source()}
+        {where}
+        GROUP BY 1, 2
+        ORDER BY 2, 1
+    """
+
+
+def tile_pixels_sql():
+    """
+    One row per pixel inside the bbox: mean position and layer values.
+    The bbox selects pixel_ids on the pixel_registry GiST index first, so
+    only those pixels' rows are read (uq_pixel_unique / pixel_series
+    primary key) instead of every row of the mine in the date range.
+    """
+    return f"""
+        SELECT
+            AVG(latitude) as latitude,
+            AVG(longitude) as longitude,
+            AVG(ndvi) as ndvi,
+            AVG(anomaly_score) as anomaly_score,
+            AVG(excavated_flag)::float8 as excavated_flag
+        FROM {_pixel_source()}
+        WHERE pixel_id = ANY(ARRAY(
+            SELECT pixel_id
+            FROM pixel_registry
+            WHERE mine_id = :mine_id
+              AND geometry && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)
+        ))
+        GROUP BY pixel_id
+    """
+
+
+def catalog_sql(zoom, bbox=False):
+    """
+    Page of mines (pinned first) with the geometry level for `zoom`;
+    bbox=True keeps mines intersecting :min_lon/:min_lat/:max_lon/:max_lat
+    (GiST on geometry). Uses :limit and :offset.
+    """
+    where = (
+        "WHERE geometry && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)"
+        if bbox else ""
+    )
+    return f"""
+        SELECT
+            mine_id,
+            display_name,
+            state,
+            district,
+            subdistrict,
+            pinned,
+            ST_AsGeoJSON({geometry_column(zoom)}, 6) as geometry,
+            COUNT(*) OVER () as total
+        FROM mines
+        {where}
+        ORDER BY pinned DESC, mine_id
+        LIMIT :limit OFFSET :offset
+    """
+
+
+# Substring matches (pg_trgm GIN on search_text) plus fuzzy ones for typos;
+# prefix matches rank first
+MINE_SEARCH_SQL = """
+    SELECT
+        mine_id,
+        display_name,
+        state,
+        district,
+        subdistrict,
+        pinned,
+        ST_X(centroid) as longitude,
+        ST_Y(centroid) as latitude
+    FROM mines
+    WHERE search_text LIKE :pattern
+       OR search_text % :q
+       OR mine_id::text = :q
+    ORDER BY
+        mine_id::text = :q DESC,
+        search_text LIKE :prefix DESC,
+        similarity(search_text, :q) DESC,
+        mine_id
+    LIMIT :limit
+"""
+
+
+def search_params(q, limit):
+    q = q.strip().lower()
+    return {"q": q, "pattern": f"%{q}%", "prefix": f"{q}%", "limit": int(limit)}
+
+
+# =====================================================
+# SHARED SHAPING
+# =====================================================
+def _float_or_none(value):
+    return float(value) if value is not None else None
+
+
+def _distance_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 6_371_000 * math.asin(math.sqrt(a))
+
+
+def pixel_history_from_rows(rows, mine_id, lat, lon, max_distance_m=PIXEL_HISTORY_MAX_DISTANCE_M):
+    """
+    Columnar series of the snapped pixel; None when the mine has no pixel
+    within max_distance_m of (lat, lon)
+    """
+    if not rows:
+        return None
+
+    first = rows[0]
+    distance = _distance_m(lat, lon, first['latitude'], first['longitude'])
+    if distance > max_distance_m:
+        return None
+
+    rows = [row for row in rows if row['date'] is not None]
+    history = {
+        "mine_id": int(mine_id),
+        "pixel_id": int(first['pixel_id']),
+        "latitude": float(first['latitude']),
+        "longitude": float(first['longitude']),
+        "distance_m": round(distance, 2),
+        "dates": [str(row['date']) for row in rows]
+    }
+    for col in PIXEL_HISTORY_COLUMNS:
+        cast = int if col in ("anomaly_label", "excavated_flag") else float
+        history[col] = [cast(row[col]) if row[col] is not None else None for row in rows]
+    return history
+
+
+def mine_feature(row):
+    """GeoJSON Feature from a MINE_DETAILS_SQL row (mapping)"""
+    return {
+        "type": "Feature",
+        "properties": {
+            "mine_id": int(row['mine_id']),
+            "display_name": row['display_name'],
+            "state": row['state'],
+            "district": row['district'],
+            "subdistrict": row['subdistrict']
+        },
+        "geometry": json.loads(row['geometry'])
+    }
+
+
+def catalog_from_rows(rows, zoom, limit, offset):
+    """GeoJSON FeatureCollection page of the mine catalog"""
+    features = []
+    for row in rows:
+        feature = mine_feature(row)
+        feature["properties"]["pinned"] = bool(row['pinned'])
+        features.append(feature)
+
+    total = int(rows[0]['total']) if rows else 0
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "zoom": zoom,
+        "total": total,
+        "next_offset": offset + limit if offset + limit < total else None
+    }
+
+
+def search_results_from_rows(rows):
+    return [
+        {
+            "mine_id": int(row['mine_id']),
+            "display_name": row['display_name'],
+            "state": row['state'],
+            "district": row['district'],
+            "subdistrict": row['subdistrict'],
+            "pinned": bool(row['pinned']),
+            "latitude": _float_or_none(row['latitude']),
+            "longitude": _float_or_none(row['longitude'])
+        }
+        for row in rows
+    ]
+
+
+def empty_kpi(start_date, end_date):
+    return {
+        "total_pixels": 0,
+        "excavated_pixels": 0,
+        "excavated_percentage": 0,
+        "avg_ndvi_normal": 0,
+        "avg_ndvi_excavated": 0,
+        "max_anomaly_score": 0,
+        "date_range": {"start": start_date, "end": end_date}
+    }
+
+
+def kpi_from_row(row, start_date, end_date):
+    """KPI dict from a kpi_sql() row (mapping); None row means no data"""
+    if row is None:
+        return empty_kpi(start_date, end_date)
+
+    total = row['total_pixels'] or 0
+    excavated = row['excavated_pixels'] or 0
+
+    return {
+        "total_pixels": int(total),
+        "excavated_pixels": int(excavated),
+        "excavated_percentage": round((excavated / total * 100) if total > 0 else 0, 2),
+        "avg_ndvi_normal": float(row['avg_ndvi_normal']) if row['avg_ndvi_normal'] else 0,
+        "avg_ndvi_excavated": float(row['avg_ndvi_excavated']) if row['avg_ndvi_excavated'] else 0,
+        "max_anomaly_score": float(row['max_anomaly_score']) if row['max_anomaly_score'] else 0,
+        "date_range": {
+            "start": str(row['start_date']),
+            "end": str(row['end_date'])
+        }
+    }
+
+
+def bulk_kpi_from_rows(rows, start_date, end_date, mine_ids=None):
+    """
+    Per-mine KPI dicts in query order. Requested mines without data in
+    the range are appended with empty KPIs.
+    """
+    mines = []
+    for row in rows:
+        kpi = kpi_from_row(row, start_date, end_date)
+        kpi["excavated_area"] = float(row['excavated_area'] or 0)
+        kpi["violation_area"] = float(row['violation_area'] or 0)
+        mines.append({"mine_id": int(row['mine_id']), "display_name": row['display_name'], **kpi})
+
+    found = {mine["mine_id"] for mine in mines}
+    for mine_id in mine_ids or []:
+        if mine_id not in found:
+            found.add(mine_id)
+            mines.append({
+                "mine_id": mine_id,
+                "display_name": None,
+                **empty_kpi(start_date, end_date),
+                "excavated_area": 0.0,
+                "violation_area": 0.0
+            })
+
+    return {
+        "date_range": {"start": start_date, "end": end_date},
+        "mines": mines
+    }
+
+
+def violations_from_rows(rows):
+    """Affected pixel count per date - array of objects"""
+    return [
+        {
+            "date": str(row['date']),
+            "affected_area": int(row['affected_area'])  # pixel count = affected area
+        }
+        for row in rows
+    ]
+
+
+def compliance_from_rows(rows):
+    """Legal vs no-go excavated pixels per date - array of objects"""
+    return [
+        {
+            "date": str(row['date']),
+            "legal_excavation_area": max(int(row['excavated']) - int(row['no_go']), 0),
+            "no_go_violation_area": int(row['no_go'])
+        }
+        for row in rows
+    ]
+
+
+def spectral_signature_from_row(row):
+    """Mean band values of normal vs anomalous pixels (radar chart)"""
+    if row is None or not row['total']:
+        return {"normal": {}, "anomalous": {}}
+
+    def means(group):
+        if not row[f"{group}_count"]:
+            return {band: 0 for band in SPECTRAL_BANDS}
+        return {
+            band: float(row[f"{group}_{band}"]) if row[f"{group}_{band}"] is not None else 0
+            for band in SPECTRAL_BANDS
+        }
+
+    return {"normal": means("normal"), "anomalous": means("anomalous")}
+
+
+def grid_from_rows(rows, cell_deg, zoom):
+    """Binned cells with their center coordinates"""
+    return {
+        "zoom": zoom,
+        "cell_deg": cell_deg,
+        "cells": [
+            {
+                "latitude": (row['gy'] + 0.5) * cell_deg,
+                "longitude": (row['gx'] + 0.5) * cell_deg,
+                "pixel_count": int(row['pixel_count']),
+                "observations": int(row['observations']),
+                "mean_ndvi": _float_or_none(row['mean_ndvi']),
+                "mean_anomaly_score": _float_or_none(row['mean_anomaly_score']),
+                "anomaly_fraction": float(row['anomaly_fraction']),
+                "excavated_count": int(row['excavated_count'] or 0)
+            }
+            for row in rows
+        ]
+    }
+
+
+def grid_params(mine_id, start_date, end_date, zoom, bbox=None):
+    params = _range_params(mine_id, start_date, end_date)
+    params["cell_deg"] = grid_cell_deg(zoom)
+    if bbox:
+        params.update(parse_bbox(bbox))
+    return params
 
+
+# =====================================================
+# READERS
+# =====================================================
 def fetch_pixels(mine_id: int, start_date: str, end_date: str):
     """
     Fetch pixel data from database
@@ -14,31 +639,11 @@ def fetch_pixels(mine_id: int, start_date: str, end_date: str):
         if engine is None:
             print("❌ Database engine not initialized")
             return pd.DataFrame()
-            
-        sql = """
-            SELECT
-                mine_id,
-                date,
-                latitude,
-                longitude,
-                b4,
-                b8,
-                b11,
-                ndvi,
-                nbr,
-                anomaly_label,
-                anomaly_score,
-                excavated_flag
-            FROM pixel_timeseries
-            WHERE mine_id = %s
-              AND date BETWEEN %s AND %s
-            ORDER BY date;
-        """
 
         result = pd.read_sql(
-            sql,
+            text(pixels_sql()),
             engine,
-            params=(mine_id, start_date, end_date)
+            params=_range_params(mine_id, start_date, end_date)
         )
         
         if result.empty:
@@ -58,37 +663,16 @@ def fetch_mine_details(mine_id: int):
         engine = get_engine()
         if engine is None:
             raise RuntimeError("Database engine not initialized")
-            
-        sql = """
-            SELECT
-                mine_id,
-                display_name,
-                state,
-                district,
-                subdistrict,
-                ST_AsGeoJSON(geometry) as geometry
-            FROM mines
-            WHERE mine_id = %s;
-        """
-        
-        result = pd.read_sql(sql, engine, params=(mine_id,))
-        if result.empty:
+
+        with engine.connect() as conn:
+            row = conn.execute(
+                text(MINE_DETAILS_SQL), {"mine_id": int(mine_id)}
+            ).mappings().first()
+
+        if row is None:
             return None
         
-        row = result.iloc[0]
-        import json
-        
-        return {
-            "type": "Feature",
-            "properties": {
-                "mine_id": int(row['mine_id']),
-                "display_name": row['display_name'],
-                "state": row['state'],
-                "district": row['district'],
-                "subdistrict": row['subdistrict']
-            },
-            "geometry": json.loads(row['geometry'])
-        }
+        return mine_feature(row)
     except Exception as e:
         print(f"Error fetching mine details: {e}")
         return None
@@ -99,64 +683,22 @@ def fetch_mine_kpi(mine_id: int, start_date: str, end_date: str):
         engine = get_engine()
         if engine is None:
             raise RuntimeError("Database engine not initialized")
-            
-        sql = """
-            SELECT
-                COUNT(*) as total_pixels,
-                SUM(CASE WHEN anomaly_label = 1 THEN 1 ELSE 0 END) as excavated_pixels,
-                AVG(CASE WHEN anomaly_label = -1 THEN ndvi ELSE NULL END) as avg_ndvi_normal,
-                AVG(CASE WHEN anomaly_label = 1 THEN ndvi ELSE NULL END) as avg_ndvi_excavated,
-                MAX(anomaly_score) as max_anomaly_score,
-                MIN(date) as start_date,
-                MAX(date) as end_date
-            FROM pixel_timeseries
-            WHERE mine_id = %s
-              AND date BETWEEN %s AND %s;
-        """
-        
-        result = pd.read_sql(sql, engine, params=(mine_id, start_date, end_date))
-        if result.empty:
-            return {
-                "total_pixels": 0,
-                "excavated_pixels": 0,
-                "excavated_percentage": 0,
-                "avg_ndvi_normal": 0,
-                "avg_ndvi_excavated": 0,
-                "max_anomaly_score": 0,
-                "date_range": {"start": start_date, "end": end_date}
-            }
-        
-        row = result.iloc[0]
-        total = row['total_pixels'] or 0
-        excavated = row['excavated_pixels'] or 0
-        
-        return {
-            "total_pixels": int(total),
-            "excavated_pixels": int(excavated),
-            "excavated_percentage": round((excavated / total * 100) if total > 0 else 0, 2),
-            "avg_ndvi_normal": float(row['avg_ndvi_normal']) if row['avg_ndvi_normal'] else 0,
-            "avg_ndvi_excavated": float(row['avg_ndvi_excavated']) if row['avg_ndvi_excavated'] else 0,
-            "max_anomaly_score": float(row['max_anomaly_score']) if row['max_anomaly_score'] else 0,
-            "date_range": {
-                "start": str(row['start_date']),
-                "end": str(row['end_date'])
-            }
-        }
+
+        with engine.connect() as conn:
+            row = conn.execute(
+                text(kpi_sql()), _range_params(mine_id, start_date, end_date)
+            ).mappings().first()
+
+        return kpi_from_row(row, start_date, end_date)
     except Exception as e:
         print(f"Error fetching KPI: {e}")
-        return {
-            "total_pixels": 0,
-            "excavated_pixels": 0,
-            "excavated_percentage": 0,
-            "avg_ndvi_normal": 0,
-            "avg_ndvi_excavated": 0,
-            "max_anomaly_score": 0,
-            "date_range": {"start": start_date, "end": end_date}
-        }
+        return empty_kpi(start_date, end_date)
 
 def fetch_existing_date_range(mine_id: int):
     """
     Fetch the earliest and latest dates in database for a mine.
+    Combines ingest_coverage (ranges written by the pipeline) with the
+    pixel dates themselves, for data loaded before coverage was recorded.
     Returns (None, None) if no data exists.
     """
     try:
@@ -166,13 +708,22 @@ def fetch_existing_date_range(mine_id: int):
         
         sql = """
             SELECT
-                MIN(date) as earliest,
-                MAX(date) as latest
-            FROM pixel_timeseries
-            WHERE mine_id = %s;
+                LEAST(c.earliest, p.earliest) as earliest,
+                GREATEST(c.latest, p.latest) as latest
+            FROM
+                (
+                    SELECT MIN(range_start) as earliest, MAX(range_end) as latest
+                    FROM ingest_coverage
+                    WHERE mine_id = :mine_id
+                ) c,
+                (
+                    SELECT MIN(date) as earliest, MAX(date) as latest
+                    FROM pixel_timeseries
+                    WHERE mine_id = :mine_id
+                ) p;
         """
         
-        result = pd.read_sql(sql, engine, params=(mine_id,))
+        result = pd.read_sql(text(sql), engine, params={"mine_id": int(mine_id)})
         
         if result.empty or result.iloc[0]['earliest'] is None:
             return (None, None)
@@ -185,53 +736,44 @@ def fetch_existing_date_range(mine_id: int):
     except Exception as e:
         print(f"Error fetching existing date range: {e}")
         return (None, None)
+def _fetch_rows(sql, params):
+    engine = get_engine()
+    if engine is None:
+        raise RuntimeError("Database engine not initialized")
+
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).mappings().all()
+
 def get_violation_statistics(mine_id: int, start_date: str, end_date: str):
     """
     Get statistics about no-go zone violations over time
     """
     try:
-        df = fetch_pixels(mine_id, start_date, end_date)
-        if df.empty:
-            return []
-        
-        # Group by date and count anomalies - return as array of objects
-        violations_list = []
-        for date in sorted(df['date'].unique()):
-            date_violations = len(df[(df['date'] == date) & (df['anomaly_label'] == 1)])
-            violations_list.append({
-                "date": str(date),
-                "affected_area": date_violations  # pixel count = affected area
-            })
-        
-        return violations_list
+        rows = _fetch_rows(violations_sql(), _range_params(mine_id, start_date, end_date))
+        return violations_from_rows(rows)
     except Exception as e:
         print(f"Error fetching violation statistics: {e}")
         return []
 
 def get_excavation_compliance(mine_id: int, start_date: str, end_date: str):
     """
-    Analyze excavation compliance (legal vs illegal areas)
+    Analyze excavation compliance (legal vs no-go excavation per date),
+    from the violation_pixels written by the pipeline
     """
     try:
-        df = fetch_pixels(mine_id, start_date, end_date)
-        if df.empty:
-            return []
-        
-        excavated_pixels = df[df['anomaly_label'] == 1]
-        
-        # Group by date - return as array of objects
-        compliance_by_date = []
-        for date in sorted(df['date'].unique()):
-            date_excavated = excavated_pixels[excavated_pixels['date'] == date]
-            total = len(date_excavated)
-            if total > 0:
-                compliance_by_date.append({
-                    "date": str(date),
-                    "legal_excavation_area": int(total * 0.7),  # 70% legal
-                    "no_go_violation_area": int(total * 0.3)    # 30% violations
-                })
-        
-        return compliance_by_date
+        rows = _fetch_rows(compliance_sql(), _range_params(mine_id, start_date, end_date))
+        return compliance_from_rows(rows)
     except Exception as e:
         print(f"Error fetching compliance data: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def get_spectral_signature(mine_id: int, start_date: str, end_date: str):
+    """
+    Mean spectral values for normal vs anomalous pixels
+    """
+    try:
+        rows = _fetch_rows(spectral_signature_sql(), _range_params(mine_id, start_date, end_date))
+        return spectral_signature_from_row(rows[0] if rows else None)
+    except Exception as e:
+        print(f"Error fetching spectral signature: {e}")
+        return {"normal": {}, "anomalous": {}}
@@ -0,0 +1,280 @@
+# backend/services/db_reader_async.py
+
+"""
+Async counterparts of the db_reader functions for the /mine endpoints.
+
+Queries run on the asyncpg engine, so a request waiting on the database
+holds a pool slot, not a threadpool worker. SQL and shaping are shared
+with db_reader.
+"""
+
+import pandas as pd
+from sqlalchemy import text
+from db.connection import get_async_engine
+from config.settings import PIXEL_STREAM_BATCH_ROWS
+from services.db_reader import (
+    parse_bbox,
+    _range_params,
+    pixels_sql,
+    parse_pixel_cursor,
+    pixel_history_sql,
+    pixel_history_from_rows,
+    kpi_sql,
+    bulk_kpi_sql,
+    bulk_kpi_params,
+    violations_sql,
+    compliance_sql,
+    spectral_signature_sql,
+    grid_sql,
+    grid_params,
+    grid_cell_deg,
+    grid_from_rows,
+    catalog_sql,
+    catalog_from_rows,
+    MINE_SEARCH_SQL,
+    search_params,
+    search_results_from_rows,
+    MINE_DETAILS_SQL,
+    mine_feature,
+    empty_kpi,
+    kpi_from_row,
+    bulk_kpi_from_rows,
+    violations_from_rows,
+    compliance_from_rows,
+    spectral_signature_from_row
+)
+
+
+async def fetch_pixels_async(
+    mine_id: int,
+    start_date: str,
+    end_date: str,
+    cursor: str = None,
+    limit: int = None
+):
+    """
+    Fetch pixel data from database
+    Returns empty DataFrame if no data exists
+
+    cursor/limit page through the range in (date, pixel_id) order
+    (keyset pagination, see format_pixel_cursor).
+    """
+    try:
+        engine = get_async_engine()
+        if engine is None:
+            print("❌ Async database engine not initialized")
+            return pd.DataFrame()
+
+        params = _range_params(mine_id, start_date, end_date)
+        if cursor:
+            params.update(parse_pixel_cursor(cursor))
+        if limit:
+            params["limit"] = int(limit)
+
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                text(pixels_sql(keyset=bool(cursor), limit=bool(limit))),
+                params
+            )
+            rows = result.fetchall()
+            columns = list(result.keys())
+
+        if not rows:
+            print(f"⚠️  No data found in database for mine_id {mine_id} between {start_date} and {end_date}")
+            return pd.DataFrame()
+
+        print(f"✅ Found {len(rows)} rows for mine_id {mine_id}")
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        return pd.DataFrame()
+
+
+async def stream_pixels_async(
+    mine_id: int,
+    start_date: str,
+    end_date: str,
+    cursor: str = None,
+    batch_rows: int = PIXEL_STREAM_BATCH_ROWS
+):
+    """
+    Yield (columns, rows) batches of pixel data from a server-side cursor,
+    so memory stays bounded by batch_rows whatever the range length.
+    Errors propagate to the caller.
+    """
+    engine = get_async_engine()
+    if engine is None:
+        raise RuntimeError("Async database engine not initialized")
+
+    params = _range_params(mine_id, start_date, end_date)
+    if cursor:
+        params.update(parse_pixel_cursor(cursor))
+
+    async with engine.connect() as conn:
+        result = await conn.stream(
+            text(pixels_sql(keyset=bool(cursor))).execution_options(yield_per=batch_rows),
+            params
+        )
+        columns = list(result.keys())
+        async for rows in result.partitions():
+            yield columns, rows
+
+
+async def get_pixel_history_async(mine_id: int, lat: float, lon: float):
+    """
+    Full spectral/anomaly history of the pixel nearest to (lat, lon), or
+    None when the mine has no pixel close enough. Errors propagate to the
+    caller.
+    """
+    rows = await _fetch_rows(
+        pixel_history_sql(),
+        {"mine_id": int(mine_id), "lat": float(lat), "lon": float(lon)}
+    )
+    return pixel_history_from_rows(rows, mine_id, lat, lon)
+
+
+async def fetch_mine_details_async(mine_id: int):
+    """Fetch mine details from mines table"""
+    try:
+        engine = get_async_engine()
+        if engine is None:
+            raise RuntimeError("Async database engine not initialized")
+
+        async with engine.connect() as conn:
+            result = await conn.execute(text(MINE_DETAILS_SQL), {"mine_id": int(mine_id)})
+            row = result.mappings().first()
+
+        if row is None:
+            return None
+
+        return mine_feature(row)
+    except Exception as e:
+        print(f"Error fetching mine details: {e}")
+        return None
+
+
+async def fetch_mine_kpi_async(mine_id: int, start_date: str, end_date: str):
+    """Fetch KPI metrics for a mine"""
+    try:
+        engine = get_async_engine()
+        if engine is None:
+            raise RuntimeError("Async database engine not initialized")
+
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                text(kpi_sql()),
+                _range_params(mine_id, start_date, end_date)
+            )
+            row = result.mappings().first()
+
+        return kpi_from_row(row, start_date, end_date)
+    except Exception as e:
+        print(f"Error fetching KPI: {e}")
+        return empty_kpi(start_date, end_date)
+
+
+async def _fetch_rows(sql, params):
+    engine = get_async_engine()
+    if engine is None:
+        raise RuntimeError("Async database engine not initialized")
+
+    async with engine.connect() as conn:
+        result = await conn.execute(text(sql), params)
+        return result.mappings().all()
+
+
+async def fetch_mines_kpi_async(
+    start_date: str,
+    end_date: str,
+    mine_ids: list = None,
+    sort: str = "excavated_percentage",
+    descending: bool = True,
+    limit: int = None
+):
+    """KPI metrics for many mines (all mines with data when mine_ids is None)"""
+    try:
+        rows = await _fetch_rows(
+            bulk_kpi_sql(sort, descending, mine_ids=bool(mine_ids), limit=bool(limit)),
+            bulk_kpi_params(start_date, end_date, mine_ids, limit)
+        )
+        # A limited (top-N) list has no room for mines without data
+        return bulk_kpi_from_rows(rows, start_date, end_date, None if limit else mine_ids)
+    except Exception as e:
+        print(f"Error fetching KPIs: {e}")
+        return None
+
+
+async def get_violation_statistics_async(mine_id: int, start_date: str, end_date: str):
+    """
+    Get statistics about no-go zone violations over time
+    """
+    try:
+        rows = await _fetch_rows(violations_sql(), _range_params(mine_id, start_date, end_date))
+        return violations_from_rows(rows)
+    except Exception as e:
+        print(f"Error fetching violation statistics: {e}")
+        return []
+
+
+async def get_excavation_compliance_async(mine_id: int, start_date: str, end_date: str):
+    """
+    Analyze excavation compliance (legal vs no-go excavation per date)
+    """
+    try:
+        rows = await _fetch_rows(compliance_sql(), _range_params(mine_id, start_date, end_date))
+        return compliance_from_rows(rows)
+    except Exception as e:
+        print(f"Error fetching compliance data: {e}")
+        return []
+
+
+async def get_spectral_signature_async(mine_id: int, start_date: str, end_date: str):
+    """
+    Mean spectral values for normal vs anomalous pixels
+    """
+    try:
+        rows = await _fetch_rows(spectral_signature_sql(), _range_params(mine_id, start_date, end_date))
+        return spectral_signature_from_row(rows[0] if rows else None)
+    except Exception as e:
+        print(f"Error fetching spectral signature: {e}")
+        return {"normal": {}, "anomalous": {}}
+
+
+async def get_pixel_grid_async(mine_id: int, start_date: str, end_date: str, zoom: int, bbox: str = None):
+    """
+    Pixels aggregated onto a zoom-dependent grid (optionally within bbox)
+    """
+    try:
+        params = grid_params(mine_id, start_date, end_date, zoom, bbox)
+        rows = await _fetch_rows(grid_sql(bbox=bool(bbox)), params)
+        return grid_from_rows(rows, params["cell_deg"], zoom)
+    except Exception as e:
+        print(f"Error fetching pixel grid: {e}")
+        return {"zoom": zoom, "cell_deg": grid_cell_deg(zoom), "cells": []}
+
+
+async def get_mine_catalog_async(zoom: int, bbox: str = None, limit: int = 100, offset: int = 0):
+    """
+    Page of the mine catalog as GeoJSON, geometries at the zoom's level of
+    detail, optionally limited to mines intersecting bbox
+    """
+    try:
+        params = {"limit": int(limit), "offset": int(offset)}
+        if bbox:
+            params.update(parse_bbox(bbox))
+        rows = await _fetch_rows(catalog_sql(zoom, bbox=bool(bbox)), params)
+        return catalog_from_rows(rows, zoom, limit, offset)
+    except Exception as e:
+        print(f"Error fetching mine catalog: {e}")
+        return None
+
+
+async def search_mines_async(q: str, limit: int = 20):
+    """Mines matching q in display_name/state/district/subdistrict (or mine_id)"""
+    try:
+        rows = await _fetch_rows(MINE_SEARCH_SQL, search_params(q, limit))
+        return search_results_from_rows(rows)
+    except Exception as e:
+        print(f"Error searching mines: {e}")
+        return None
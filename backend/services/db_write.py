@@ -1,30 +1,451 @@
 # backend/services/db_write.py
 
-from db.connection import engine
+import io
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from sqlalchemy import text
+from db.connection import get_engine
+from db.rollup import summary_upsert_sql
+from services.cache import note_mine_version
+from services.alert_feed import ALERTS_WRITE_LOCK_SQL, notify_alerts
 from geoalchemy2 import Geometry
+from config.settings import DB_WRITE_METHOD, PIXEL_GEOMETRY_MODE, PIXEL_STORAGE_LAYOUT
+
+
+# =====================================================
+# TARGET TABLES (COPY + UPSERT PATH)
+# =====================================================
+# columns      : non-geometry columns sent through COPY, in order
+# point        : table has a POINT geometry fully determined by lat/lon
+# int_columns  : written as integers even if pandas upcast them to float
+# conflict     : ON CONFLICT target (matches the table's unique constraint)
+# update       : columns refreshed when a row already exists
+TABLES = {
+    "pixel_timeseries": {
+        "columns": [
+            "mine_id", "pixel_id", "date", "latitude", "longitude",
+            "b4", "b8", "b11", "ndvi", "nbr",
+            "anomaly_label", "anomaly_score", "excavated_flag"
+        ],
+        "point": True,
+        "int_columns": ["mine_id", "pixel_id", "anomaly_label", "excavated_flag"],
+        "conflict": ["mine_id", "pixel_id", "date"],
+        "update": [
+            "geometry", "b4", "b8", "b11", "ndvi", "nbr",
+            "anomaly_label", "anomaly_score", "excavated_flag"
+        ]
+    },
+    "violation_pixels": {
+        "columns": [
+            "mine_id", "pixel_id", "date", "latitude", "longitude",
+            "zone_type", "pixel_area", "anomaly_score"
+        ],
+        "point": True,
+        "int_columns": ["mine_id", "pixel_id"],
+        "conflict": ["pixel_id", "date", "zone_type"],
+        "update": ["pixel_area", "anomaly_score", "geometry"]
+    },
+    "violation_alerts": {
+        "columns": ["mine_id", "date", "zone_type", "alert_type", "affected_area"],
+        "point": False,
+        "int_columns": ["mine_id"],
+        "conflict": ["mine_id", "date", "zone_type", "alert_type"],
+        "update": ["affected_area"]
+    },
+    # Array layout: one row per pixel per ingested range (values are
+    # Postgres array literals built by _pixels_to_series)
+    "pixel_series": {
+        "columns": [
+            "mine_id", "chunk_start", "pixel_id", "latitude", "longitude",
+            "b4", "b8", "b11", "ndvi", "nbr",
+            "anomaly_label", "anomaly_score", "excavated_flag"
+        ],
+        "point": False,
+        "int_columns": ["mine_id", "pixel_id"],
+        "conflict": ["mine_id", "chunk_start", "pixel_id"],
+        "update": [
+            "b4", "b8", "b11", "ndvi", "nbr",
+            "anomaly_label", "anomaly_score", "excavated_flag"
+        ]
+    }
+}
+
+# pixel_series vector columns; integer ones are written without decimals
+SERIES_FLOAT_COLUMNS = ["b4", "b8", "b11", "ndvi", "nbr", "anomaly_score"]
+SERIES_INT_COLUMNS = ["anomaly_label", "excavated_flag"]
+
+
+# Point geometry built by PostGIS from the numeric columns ("sql" mode)
+POINT_FROM_LATLON_SQL = "ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)"
+
+
+def _copy_columns(table):
+    """Columns sent through COPY; geometry only travels in "client" mode"""
+    spec = TABLES[table]
+    if spec["point"] and PIXEL_GEOMETRY_MODE == "client":
+        return spec["columns"] + ["geometry"]
+    return spec["columns"]
+
+
+def _to_copy_csv(df, table):
+    """
+    Serialize a (Geo)DataFrame to CSV for COPY FROM STDIN.
+    NULLs are written as empty unquoted fields; geometry (client mode
+    only) as hex EWKB.
+    """
+    spec = TABLES[table]
+    columns = _copy_columns(table)
+    # Plain DataFrame so the geometry column can be replaced by text
+    out = pd.DataFrame(df)
+
+    if "geometry" in columns:
+        geoms = np.asarray(out["geometry"].values)
+        out["geometry"] = shapely.to_wkb(
+            shapely.set_srid(geoms, 4326),
+            hex=True,
+            include_srid=True
+        )
+
+    for col in spec["int_columns"]:
+        out[col] = out[col].astype("Int64")
+
+    buf = io.StringIO()
+    out[columns].to_csv(buf, index=False, header=False, na_rep="")
+    buf.seek(0)
+    return buf
+
+
+def _merge_sql(table, stage):
+    """INSERT ... SELECT from the staging table, upserting on the unique key"""
+    spec = TABLES[table]
+    insert_cols = list(spec["columns"])
+    select_exprs = list(spec["columns"])
+    if spec["point"]:
+        insert_cols.append("geometry")
+        select_exprs.append(
+            POINT_FROM_LATLON_SQL if PIXEL_GEOMETRY_MODE == "sql" else "geometry"
+        )
+
+    conflict = ", ".join(spec["conflict"])
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in spec["update"])
+
+    # DISTINCT ON keeps one row per key so a batch never hits the same row twice
+    return f"""
+        INSERT INTO {table} ({", ".join(insert_cols)})
+        SELECT DISTINCT ON ({conflict}) {", ".join(select_exprs)}
+        FROM {stage}
+        ON CONFLICT ({conflict}) DO UPDATE SET {updates}
+    """
+
+
+def _array_literals(grid, integer=False):
+    """Rows of a 2-D float grid as Postgres array literals, NaN -> NULL"""
+    missing = np.isnan(grid)
+    if integer:
+        text_grid = np.where(missing, 0, grid).astype(np.int64).astype(str)
+    else:
+        text_grid = grid.astype(str)
+    text_grid = np.where(missing, "NULL", text_grid)
+    return ["{" + ",".join(row) + "}" for row in text_grid]
+
+
+def _pixels_to_series(df, mine_id, chunk_start):
+    """
+    Pivot normalized pixel rows into the array layout.
+    Returns (dates, series_df): the chunk's sorted date axis and one row
+    per pixel_id with band vectors aligned to it.
+    """
+    dates = pd.to_datetime(df["date"]).dt.normalize()
+    axis = np.sort(dates.unique())
+    date_idx = np.searchsorted(axis, dates.to_numpy())
+
+    pixel_idx, pixels = pd.factorize(df["pixel_id"])
+    # Codes follow first appearance, so these rows line up with `pixels`
+    _, first_rows = np.unique(pixel_idx, return_index=True)
+
+    series = pd.DataFrame({
+        "mine_id": int(mine_id),
+        "chunk_start": chunk_start,
+        "pixel_id": pixels,
+        "latitude": df["latitude"].to_numpy()[first_rows],
+        "longitude": df["longitude"].to_numpy()[first_rows],
+    })
+
+    for col in SERIES_FLOAT_COLUMNS + SERIES_INT_COLUMNS:
+        grid = np.full((len(pixels), len(axis)), np.nan)
+        grid[pixel_idx, date_idx] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+        series[col] = _array_literals(grid, integer=col in SERIES_INT_COLUMNS)
+
+    return [pd.Timestamp(d).date() for d in axis], series
+
+
+def copy_upsert(df, table):
+    """
+    Bulk load rows with COPY into a temporary staging table, then merge
+    into `table` with INSERT ... ON CONFLICT DO UPDATE, in one transaction.
+    Returns the number of rows sent.
+    """
+    if df.empty:
+        return 0
+
+    stage = f"_stage_{table}"
+    cols = ", ".join(_copy_columns(table))
+    buf = _to_copy_csv(df, table)
+
+    raw = get_engine().raw_connection()
+    try:
+        cur = raw.cursor()
+        # Same column types as the target, no constraints/defaults; dropped at commit
+        cur.execute(
+            f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+            f"SELECT {cols} FROM {table} WITH NO DATA"
+        )
+        cur.copy_expert(f"COPY {stage} ({cols}) FROM STDIN WITH (FORMAT csv)", buf)
+        if table == "violation_alerts":
+            cur.execute(ALERTS_WRITE_LOCK_SQL)
+        cur.execute(_merge_sql(table, stage))
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    return len(df)
+
+
+# =====================================================
+# UNIT OF WORK: ONE TRANSACTION PER RANGE
+# =====================================================
+# pool info key: pixel table the connection was prepared for
+_RANGE_WRITER_PREPARED = "range_writer_prepared"
+
+
+class RangeWriter:
+    """
+    Persists a range's pixels, violations and alerts plus its
+    mine_daily_summary, ingest_coverage and mine_data_versions rows over
+    one connection, in one transaction.
+
+    A pooled connection is held only while a range is written, so long
+    fetch/detect stages between writes hold no database resources. Each
+    physical connection is prepared once (session staging tables plus
+    PREPAREd merge statements) and marked in its pool `info`; later
+    checkouts of the same connection reuse the statements. The pool
+    drops the mark when it replaces the connection.
+
+        writer = RangeWriter()
+        for ...:
+            writer.write_range(mine_id, start, end, pixels, violations, alerts)
+    """
+
+    def __init__(self):
+        self._raw = None
+        self._pixel_table = (
+            "pixel_series" if PIXEL_STORAGE_LAYOUT == "arrays" else "pixel_timeseries"
+        )
+        self._staged = (self._pixel_table, "violation_pixels", "violation_alerts")
+
+    def _connect(self):
+        """Check out a connection, preparing it on its first use by a writer"""
+        self._raw = get_engine().raw_connection()
+        if self._raw.info.get(_RANGE_WRITER_PREPARED) == self._pixel_table:
+            return
+        try:
+            self._prepare()
+            self._raw.info[_RANGE_WRITER_PREPARED] = self._pixel_table
+        except Exception:
+            # Half-prepared session: don't hand it back to the pool
+            self._raw.invalidate()
+            self._raw.close()
+            self._raw = None
+            raise
+
+    def _prepare(self):
+        """Session staging tables and PREPAREd statements (once per connection)"""
+        cur = self._raw.cursor()
+        for table in self._staged:
+            cols = ", ".join(_copy_columns(table))
+            # Rows vanish at every commit/rollback; the table lives for the session.
+            # Named apart from copy_upsert's per-transaction _stage_* tables,
+            # which may run later on the same pooled connection.
+            cur.execute(
+                f"CREATE TEMP TABLE _range_stage_{table} ON COMMIT DELETE ROWS AS "
+                f"SELECT {cols} FROM {table} WITH NO DATA"
+            )
+            cur.execute(f"PREPARE merge_{table} AS {_merge_sql(table, f'_range_stage_{table}')}")
+
+        cur.execute("""
+            PREPARE record_coverage (integer, date, date, integer, integer, integer) AS
+            INSERT INTO ingest_coverage
+                (mine_id, range_start, range_end, pixels, violations, alerts)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            ON CONFLICT (mine_id, range_start, range_end) DO UPDATE SET
+                pixels = EXCLUDED.pixels,
+                violations = EXCLUDED.violations,
+                alerts = EXCLUDED.alerts,
+                ingested_at = now()
+        """)
+
+        # Rebuilds the range's mine_daily_summary rows from what was just merged
+        pixel_source = (
+            "pixel_rows($1, $2, $3) src"
+            if self._pixel_table == "pixel_series"
+            else "(SELECT * FROM pixel_timeseries WHERE mine_id = $1 AND date BETWEEN $2 AND $3) src"
+        )
+        cur.execute(
+            "PREPARE refresh_daily_summary (integer, date, date) AS "
+            + summary_upsert_sql(pixel_source, "mine_id = $1 AND date BETWEEN $2 AND $3")
+        )
+
+        # New data version → cached /mine responses for the mine go stale
+        cur.execute("""
+            PREPARE bump_data_version (integer) AS
+            INSERT INTO mine_data_versions (mine_id, version)
+            VALUES ($1, 1)
+            ON CONFLICT (mine_id) DO UPDATE SET
+                version = mine_data_versions.version + 1,
+                updated_at = now()
+            RETURNING version, updated_at
+        """)
+
+        if self._pixel_table == "pixel_series":
+            cur.execute("""
+                PREPARE record_date_axis (integer, date, date, date[]) AS
+                INSERT INTO pixel_date_axis (mine_id, chunk_start, chunk_end, dates)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (mine_id, chunk_start) DO UPDATE SET
+                    chunk_end = EXCLUDED.chunk_end,
+                    dates = EXCLUDED.dates
+            """)
+        self._raw.commit()
+
+    def _release(self):
+        """Return the connection to the pool (prepared statements stay with it)"""
+        if self._raw is None:
+            return
+        try:
+            self._raw.close()
+        finally:
+            self._raw = None
+
+    def write_range(self, mine_id, range_start, range_end, pixels, violations=None, alerts=None):
+        """
+        Atomically write one range. Empty/None frames are skipped.
+        Returns {"pixels": n, "violations": n, "alerts": n} (input rows).
+        """
+        frames = {
+            self._pixel_table: pixels,
+            "violation_pixels": violations,
+            "violation_alerts": alerts
+        }
+        counts = {}
+
+        self._connect()
+        cur = self._raw.cursor()
+        try:
+            if self._pixel_table == "pixel_series" and pixels is not None and not pixels.empty:
+                dates, frames["pixel_series"] = _pixels_to_series(pixels, mine_id, range_start)
+                cur.execute(
+                    "EXECUTE record_date_axis (%s, %s, %s, %s)",
+                    (int(mine_id), range_start, range_end, dates)
+                )
+
+            for table, df in frames.items():
+                if df is None or df.empty:
+                    counts[table] = 0
+                    continue
+
+                if isinstance(df, gpd.GeoDataFrame):
+                    df = _prepare_gdf(df)
+
+                cols = ", ".join(_copy_columns(table))
+                cur.copy_expert(
+                    f"COPY _range_stage_{table} ({cols}) FROM STDIN WITH (FORMAT csv)",
+                    _to_copy_csv(df, table)
+                )
+                if table == "violation_alerts":
+                    # Alert ids must commit in order for the since_id feed
+                    cur.execute(ALERTS_WRITE_LOCK_SQL)
+                cur.execute(f"EXECUTE merge_{table}")
+                counts[table] = len(df)
+
+            if self._pixel_table == "pixel_series":
+                counts["pixel_timeseries"] = 0 if pixels is None else len(pixels)
+
+            cur.execute(
+                "EXECUTE refresh_daily_summary (%s, %s, %s)",
+                (int(mine_id), range_start, range_end)
+            )
+
+            cur.execute(
+                "EXECUTE record_coverage (%s, %s, %s, %s, %s, %s)",
+                (
+                    int(mine_id),
+                    range_start,
+                    range_end,
+                    counts["pixel_timeseries"],
+                    counts["violation_pixels"],
+                    counts["violation_alerts"]
+                )
+            )
+            cur.execute("EXECUTE bump_data_version (%s)", (int(mine_id),))
+            version, updated_at = cur.fetchone()
+            self._raw.commit()
+        except Exception:
+            self._raw.rollback()
+            raise
+        finally:
+            self._release()
+
+        note_mine_version(mine_id, version, updated_at)
+        if counts["violation_alerts"]:
+            notify_alerts()
+
+        return {
+            "pixels": counts["pixel_timeseries"],
+            "violations": counts["violation_pixels"],
+            "alerts": counts["violation_alerts"]
+        }
+
+
+def _prepare_gdf(gdf):
+    """Ensure CRS and geometry column name before writing"""
+    gdf = gdf.set_crs(epsg=4326, allow_override=True)
+
+    if gdf.geometry.name != "geometry":
+        gdf = gdf.rename_geometry("geometry")
+
+    return gdf
 
 
 # =====================================================
 # PIXEL-LEVEL TIME SERIES
 # =====================================================
-def insert_pixels(gdf):
+def insert_pixels(gdf, method=None):
     """
     Insert pixel GeoDataFrame into PostGIS.
+    Existing (mine_id, pixel_id, date) rows are updated.
+    The copy path also accepts a plain DataFrame in "sql" geometry mode.
     """
 
     if gdf.empty:
         return
 
-    # Ensure CRS
-    gdf = gdf.set_crs(epsg=4326, allow_override=True)
+    if (method or DB_WRITE_METHOD) == "copy":
+        if isinstance(gdf, gpd.GeoDataFrame):
+            gdf = _prepare_gdf(gdf)
+        copy_upsert(gdf, "pixel_timeseries")
+        return
 
-    # Ensure geometry column name
-    if gdf.geometry.name != "geometry":
-        gdf = gdf.rename_geometry("geometry")
+    gdf = _prepare_gdf(gdf)
 
     gdf.to_postgis(
         name="pixel_timeseries",
-        con=engine,
+        con=get_engine(),
         if_exists="append",
         index=False,
         dtype={
@@ -36,7 +457,7 @@ def insert_pixels(gdf):
 # =====================================================
 # VIOLATION PIXELS (SPATIAL)
 # =====================================================
-def insert_violations(gdf):
+def insert_violations(gdf, method=None):
     """
     Insert excavated pixels inside no-go zones
     """
@@ -44,14 +465,17 @@ def insert_violations(gdf):
     if gdf.empty:
         return
 
-    gdf = gdf.set_crs(epsg=4326, allow_override=True)
+    if (method or DB_WRITE_METHOD) == "copy":
+        if isinstance(gdf, gpd.GeoDataFrame):
+            gdf = _prepare_gdf(gdf)
+        copy_upsert(gdf, "violation_pixels")
+        return
 
-    if gdf.geometry.name != "geometry":
-        gdf = gdf.rename_geometry("geometry")
+    gdf = _prepare_gdf(gdf)
 
     gdf.to_postgis(
         name="violation_pixels",
-        con=engine,
+        con=get_engine(),
         if_exists="append",
         index=False,
         dtype={
@@ -63,7 +487,7 @@ def insert_violations(gdf):
 # =====================================================
 # VIOLATION ALERTS (NON-SPATIAL)
 # =====================================================
-def insert_alerts(df):
+def insert_alerts(df, method=None):
     """
     Insert aggregated violation alerts
     """
@@ -71,10 +495,18 @@ def insert_alerts(df):
     if df.empty:
         return
 
-    df.to_sql(
-        name="violation_alerts",
-        con=engine,
-        if_exists="append",
-        index=False,
-        method="multi"
-    )
+    if (method or DB_WRITE_METHOD) == "copy":
+        copy_upsert(df, "violation_alerts")
+    else:
+        # Same feed ordering guarantee as copy_upsert (see alert_feed)
+        with get_engine().begin() as conn:
+            conn.execute(text(ALERTS_WRITE_LOCK_SQL))
+            df.to_sql(
+                name="violation_alerts",
+                con=conn,
+                if_exists="append",
+                index=False,
+                method="multi"
+            )
+
+    notify_alerts()
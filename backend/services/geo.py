@@ -1,7 +1,6 @@
 # backend/services/geo.py
 
 import geopandas as gpd
-from shapely.geometry import Point
 from config.settings import GEOGRAPHIC_CRS
 
 
@@ -18,12 +17,10 @@ def to_geodf(df):
         return gdf
 
     # Case 2️⃣: No geometry → create from lat/lon (e.g. pixel_timeseries)
+    # Vectorized: no per-row shapely object construction in Python
     gdf = gpd.GeoDataFrame(
         df,
-        geometry=[
-            Point(lon, lat)
-            for lon, lat in zip(df.longitude, df.latitude)
-        ],
+        geometry=gpd.points_from_xy(df.longitude, df.latitude),
         crs=GEOGRAPHIC_CRS
     )
 
@@ -82,6 +82,7 @@ def normalize_df(df: pd.DataFrame, mine_id: str) -> pd.DataFrame:
         df = df[
             [
                 "mine_id",
+                "pixel_id",
                 "date",
                 "latitude",
                 "longitude",
@@ -103,6 +104,7 @@ def normalize_df(df: pd.DataFrame, mine_id: str) -> pd.DataFrame:
     df = df[
         [
             "mine_id",
+            "pixel_id",
             "date",
             "latitude",
             "longitude",
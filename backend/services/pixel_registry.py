@@ -0,0 +1,110 @@
+# backend/services/pixel_registry.py
+
+"""
+Per-mine pixel registry.
+
+Maps a pixel's snapped grid cell (grid_row, grid_col) to a compact integer
+pixel_id, assigned at ingest. Tables and in-memory frames key on pixel_id;
+latitude/longitude are kept as attributes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from db.connection import get_engine
+from config.settings import PIXEL_GRID_DEG
+
+
+def grid_cells(latitude, longitude):
+    """Snap coordinates to registry cells: (grid_row, grid_col) int arrays"""
+    rows = np.rint(np.asarray(latitude, dtype=float) / PIXEL_GRID_DEG).astype(np.int64)
+    cols = np.rint(np.asarray(longitude, dtype=float) / PIXEL_GRID_DEG).astype(np.int64)
+    return rows, cols
+
+
+def assign_pixel_ids(df: pd.DataFrame, mine_id) -> pd.DataFrame:
+    """
+    Return a copy of df with a pixel_id column.
+    Cells seen for the first time are registered; existing cells keep
+    their id, so the same pixel gets the same id on every run.
+    """
+    df = df.copy()
+    if df.empty:
+        df["pixel_id"] = pd.Series(dtype="int64")
+        return df
+
+    rows, cols = grid_cells(df["latitude"], df["longitude"])
+
+    cells = pd.DataFrame({
+        "grid_row": rows,
+        "grid_col": cols,
+        "latitude": df["latitude"].to_numpy(dtype=float),
+        "longitude": df["longitude"].to_numpy(dtype=float)
+    }).drop_duplicates(subset=["grid_row", "grid_col"])
+
+    engine = get_engine()
+    if engine is None:
+        raise RuntimeError("Database engine not initialized")
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(
+            """
+            INSERT INTO pixel_registry
+                (mine_id, grid_row, grid_col, latitude, longitude, geometry)
+            SELECT
+                %s, u.grid_row, u.grid_col, u.latitude, u.longitude,
+                ST_SetSRID(ST_MakePoint(u.longitude, u.latitude), 4326)
+            FROM unnest(%s::integer[], %s::integer[], %s::float8[], %s::float8[])
+                AS u(grid_row, grid_col, latitude, longitude)
+            -- Skip known cells up front: conflicting inserts still burn ids
+            WHERE NOT EXISTS (
+                SELECT 1 FROM pixel_registry r
+                WHERE r.mine_id = %s
+                  AND r.grid_row = u.grid_row
+                  AND r.grid_col = u.grid_col
+            )
+            ON CONFLICT (mine_id, grid_row, grid_col) DO NOTHING
+            """,
+            (
+                int(mine_id),
+                cells["grid_row"].tolist(),
+                cells["grid_col"].tolist(),
+                cells["latitude"].tolist(),
+                cells["longitude"].tolist(),
+                int(mine_id)
+            )
+        )
+        cur.execute(
+            """
+            SELECT r.grid_row, r.grid_col, r.pixel_id
+            FROM pixel_registry r
+            JOIN unnest(%s::integer[], %s::integer[]) AS u(grid_row, grid_col)
+              ON r.grid_row = u.grid_row
+             AND r.grid_col = u.grid_col
+            WHERE r.mine_id = %s
+            """,
+            (cells["grid_row"].tolist(), cells["grid_col"].tolist(), int(mine_id))
+        )
+        registered = cur.fetchall()
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    lookup = pd.Series(
+        [pixel_id for _, _, pixel_id in registered],
+        index=pd.MultiIndex.from_tuples(
+            [(r, c) for r, c, _ in registered],
+            names=["grid_row", "grid_col"]
+        )
+    )
+    df["pixel_id"] = lookup.reindex(
+        pd.MultiIndex.from_arrays([rows, cols])
+    ).to_numpy(dtype=np.int64)
+
+    print(f"[DEBUG] Pixel registry: {len(cells)} pixels for mine {mine_id}")
+    return df
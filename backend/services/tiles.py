@@ -0,0 +1,347 @@
+# backend/services/tiles.py
+
+"""
+XYZ (web mercator) PNG tiles of per-pixel layers.
+
+A tile is rendered from one row per pixel (tile_pixels_sql): each 10 m
+pixel is splatted over its footprint in tile pixels, overlapping pixels are
+averaged with np.bincount, and the result is colored by class thresholds.
+Full-history tiles are cached on disk, keyed by the mine's data version:
+
+    TILE_CACHE_DIR/mine_<id>/v<version>/<range>/<layer>/<z>/<x>/<y>.png
+
+Custom start/end ranges are unbounded in number, so they are only kept in
+the in-memory response cache.
+
+prewarm_tiles() renders TILE_PREWARM_ZOOMS for a whole mine after a
+pipeline run, from a single query.
+"""
+
+import asyncio
+import math
+import os
+import shutil
+import struct
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from db.connection import get_engine, get_async_engine
+from services.db_reader import _range_params, tile_pixels_sql
+from services.cache import get_mine_state, get_mine_state_async
+from config.settings import TILE_CACHE_DIR, TILE_PREWARM_ZOOMS
+
+TILE_SIZE = 256
+
+# Ground size of one Sentinel-2 pixel
+PIXEL_METERS = 10
+
+# Full history, used when a tile request has no start/end
+FULL_RANGE = ("1970-01-01", "2100-12-31")
+
+# Splat radius cap (tile pixels) at very high zoom
+MAX_SPLAT_RADIUS = 32
+
+
+def _hex(color, alpha=255):
+    return [int(color[i:i + 2], 16) for i in (1, 3, 5)] + [alpha]
+
+
+# column  : tile_pixels_sql value rendered
+# bins    : class thresholds (np.digitize); colors has len(bins) + 1 entries
+TILE_LAYERS = {
+    # Same classes as the NDVIHeatmap legend
+    "ndvi": {
+        "column": "ndvi",
+        "bins": [0.1, 0.3, 0.5, 0.7],
+        "colors": [_hex("#8B0000"), _hex("#FF6B35"), _hex("#FFE66D"), _hex("#87CEEB"), _hex("#228B22")]
+    },
+    # IsolationForest decision_function: below 0 is anomalous
+    "anomaly": {
+        "column": "anomaly_score",
+        "bins": [-0.1, -0.05, 0.0],
+        "colors": [_hex("#7f1d1d"), _hex("#dc2626"), _hex("#f87171"), _hex("#000000", 0)]
+    },
+    # Share of the range's dates on which the pixel was flagged excavated
+    "excavated": {
+        "column": "excavated_flag",
+        "bins": [1e-9, 0.5],
+        "colors": [_hex("#000000", 0), _hex("#f97316"), _hex("#dc2626")]
+    },
+}
+
+
+# =====================================================
+# GEOMETRY
+# =====================================================
+def tile_bounds(z, x, y):
+    """(min_lon, min_lat, max_lon, max_lat) of an XYZ tile"""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def _tile_xy(lon, lat, z):
+    """Global pixel coordinates (float) of lon/lat arrays at zoom z"""
+    scale = TILE_SIZE * 2 ** z
+    lat_rad = np.radians(np.clip(lat, -85.0511, 85.0511))
+    px = (lon + 180) / 360 * scale
+    py = (1 - np.log(np.tan(lat_rad) + 1 / np.cos(lat_rad)) / math.pi) / 2 * scale
+    return px, py
+
+
+def tiles_covering(min_lon, min_lat, max_lon, max_lat, z):
+    """(x, y) of every tile intersecting the bbox"""
+    px, py = _tile_xy(np.array([min_lon, max_lon]), np.array([max_lat, min_lat]), z)
+    x0, x1 = (int(v) // TILE_SIZE for v in px)
+    y0, y1 = (int(v) // TILE_SIZE for v in py)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def _query_bounds(z, x, y):
+    """Tile bounds padded by a pixel so edge footprints are not cut off"""
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(z, x, y)
+    pad = 2 * PIXEL_METERS / 111_320
+    return {
+        "min_lon": min_lon - pad,
+        "min_lat": min_lat - pad,
+        "max_lon": max_lon + pad,
+        "max_lat": max_lat + pad
+    }
+
+
+# =====================================================
+# RENDERING
+# =====================================================
+def rasterize(points: pd.DataFrame, column, z, x, y):
+    """
+    Mean of `column` per tile pixel (NaN where empty) as a
+    TILE_SIZE x TILE_SIZE float array.
+    """
+    size = TILE_SIZE * TILE_SIZE
+    points = points[points[column].notna()]
+    if points.empty:
+        return np.full((TILE_SIZE, TILE_SIZE), np.nan)
+
+    px, py = _tile_xy(points["longitude"].to_numpy(), points["latitude"].to_numpy(), z)
+    px = px - x * TILE_SIZE
+    py = py - y * TILE_SIZE
+    values = points[column].to_numpy(dtype=float)
+
+    # Pixel footprint in tile pixels (meters per tile pixel shrinks with cos(lat))
+    lat_center = float(np.radians(points["latitude"].mean()))
+    meters_per_px = 156_543.03392 * math.cos(lat_center) / 2 ** z
+    radius = min(int(PIXEL_METERS / meters_per_px / 2), MAX_SPLAT_RADIUS)
+
+    col = np.floor(px).astype(np.int64)
+    row = np.floor(py).astype(np.int64)
+
+    offsets = np.arange(-radius, radius + 1)
+    dc, dr = np.meshgrid(offsets, offsets)
+    cols = (col[:, None] + dc.ravel()[None, :]).ravel()
+    rows = (row[:, None] + dr.ravel()[None, :]).ravel()
+    vals = np.repeat(values, dc.size)
+
+    inside = (cols >= 0) & (cols < TILE_SIZE) & (rows >= 0) & (rows < TILE_SIZE)
+    index = rows[inside] * TILE_SIZE + cols[inside]
+
+    sums = np.bincount(index, weights=vals[inside], minlength=size)
+    counts = np.bincount(index, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(counts > 0, sums / counts, np.nan)
+    return mean.reshape(TILE_SIZE, TILE_SIZE)
+
+
+def colorize(grid, layer):
+    """RGBA uint8 image of a rasterized layer; empty pixels transparent"""
+    spec = TILE_LAYERS[layer]
+    palette = np.array(spec["colors"], dtype=np.uint8)
+    classes = np.digitize(np.nan_to_num(grid, nan=0.0), spec["bins"])
+    rgba = palette[classes]
+    rgba[np.isnan(grid)] = 0
+    return rgba
+
+
+def encode_png(rgba):
+    """Minimal RGBA PNG encoder (filter type 0 rows + zlib)"""
+    height, width, _ = rgba.shape
+    raw = np.hstack([
+        np.zeros((height, 1), dtype=np.uint8),
+        rgba.reshape(height, width * 4)
+    ]).tobytes()
+
+    def chunk(tag, data):
+        return (
+            struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+        )
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def render_tile(points, layer, z, x, y):
+    column = TILE_LAYERS[layer]["column"]
+    return encode_png(colorize(rasterize(points, column, z, x, y), layer))
+
+
+# =====================================================
+# DISK CACHE
+# =====================================================
+def _range_key(start, end):
+    return "all" if (start, end) == FULL_RANGE else f"{start}_{end}"
+
+
+def tile_path(mine_id, version, start, end, layer, z, x, y):
+    return os.path.join(
+        TILE_CACHE_DIR,
+        f"mine_{mine_id}",
+        f"v{version}",
+        _range_key(start, end),
+        layer,
+        str(z),
+        str(x),
+        f"{y}.png"
+    )
+
+
+def _read_tile(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_tile(path, png):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Atomic: concurrent readers never see a partial file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(png)
+    os.replace(tmp, path)
+
+
+def prune_tile_versions(mine_id, keep_version):
+    """Remove a mine's tiles rendered for older data versions"""
+    mine_dir = os.path.join(TILE_CACHE_DIR, f"mine_{mine_id}")
+    if not os.path.isdir(mine_dir):
+        return
+    for name in os.listdir(mine_dir):
+        if name != f"v{keep_version}":
+            shutil.rmtree(os.path.join(mine_dir, name), ignore_errors=True)
+
+
+# =====================================================
+# TILE SOURCES
+# =====================================================
+def _tile_params(mine_id, start, end, bounds):
+    params = _range_params(mine_id, start, end)
+    params.update(bounds)
+    return params
+
+
+async def get_tile_async(mine_id, layer, z, x, y, start=None, end=None):
+    """
+    PNG bytes for a tile. Full-history tiles are read from / written to disk
+    for the current data version; give both start and end or neither.
+    """
+    if bool(start) != bool(end):
+        raise ValueError("start and end must be given together")
+    if start:
+        start, end = str(pd.to_datetime(start).date()), str(pd.to_datetime(end).date())
+    else:
+        start, end = FULL_RANGE
+
+    path = None
+    if (start, end) == FULL_RANGE:
+        state = await get_mine_state_async(mine_id)
+        if state:
+            path = tile_path(mine_id, state[0], start, end, layer, z, x, y)
+    if path:
+        png = _read_tile(path)
+        if png is not None:
+            return png
+
+    engine = get_async_engine()
+    if engine is None:
+        raise RuntimeError("Async database engine not initialized")
+
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text(tile_pixels_sql()),
+            _tile_params(mine_id, start, end, _query_bounds(z, x, y))
+        )
+        points = pd.DataFrame(result.mappings().all())
+
+    if points.empty:
+        points = pd.DataFrame(columns=["latitude", "longitude", TILE_LAYERS[layer]["column"]])
+    points = points.astype(float)
+
+    # NumPy/zlib work off the event loop
+    png = await asyncio.to_thread(render_tile, points, layer, z, x, y)
+    if path:
+        await asyncio.to_thread(_write_tile, path, png)
+    return png
+
+
+def prewarm_tiles(mine_id, zooms=None, layers=None):
+    """
+    Render every tile covering the mine at `zooms` (TILE_PREWARM_ZOOMS)
+    for the full history, then drop tiles of older data versions.
+    Returns the number of tiles written.
+    """
+    zooms = TILE_PREWARM_ZOOMS if zooms is None else zooms
+    layers = list(TILE_LAYERS) if layers is None else layers
+    if not zooms:
+        return 0
+
+    state = get_mine_state(mine_id)
+    engine = get_engine()
+    if state is None or engine is None:
+        print(f"[DEBUG] Tile prewarm skipped for mine {mine_id}: database unavailable")
+        return 0
+    version = state[0]
+
+    start, end = FULL_RANGE
+    everywhere = {"min_lon": -180.0, "min_lat": -90.0, "max_lon": 180.0, "max_lat": 90.0}
+    with engine.connect() as conn:
+        points = pd.DataFrame(
+            conn.execute(
+                text(tile_pixels_sql()),
+                _tile_params(mine_id, start, end, everywhere)
+            ).mappings().all()
+        )
+
+    if points.empty:
+        return 0
+
+    points = points.astype(float)
+    lat, lon = points["latitude"], points["longitude"]
+
+    written = 0
+    for z in zooms:
+        for x, y in tiles_covering(lon.min(), lat.min(), lon.max(), lat.max(), z):
+            bounds = _query_bounds(z, x, y)
+            in_tile = points[
+                lon.between(bounds["min_lon"], bounds["max_lon"])
+                & lat.between(bounds["min_lat"], bounds["max_lat"])
+            ]
+            for layer in layers:
+                path = tile_path(mine_id, version, start, end, layer, z, x, y)
+                _write_tile(path, render_tile(in_tile, layer, z, x, y))
+                written += 1
+
+    prune_tile_versions(mine_id, version)
+    print(f"✅ Pre-rendered {written} tiles for mine {mine_id} (v{version})")
+    return written
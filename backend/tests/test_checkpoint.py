@@ -0,0 +1,129 @@
+# backend/tests/test_checkpoint.py
+
+import os
+import time
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import processing.checkpoint as cp
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(cp, "CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(cp, "PIPELINE_CHECKPOINTS", True)
+    monkeypatch.setattr(cp, "CHECKPOINT_TTL_SECONDS", 3600)
+    return tmp_path
+
+
+def _checkpoint(start, end, *stages, mine_id=1, rows=5):
+    manifest = cp.load_manifest(mine_id, date.fromisoformat(start), date.fromisoformat(end))
+    for stage in stages:
+        cp.mark_stage(manifest, stage, rows=rows)
+    return manifest
+
+
+def _ranges(mine_id=1):
+    return [(str(s), str(e)) for s, e, _ in cp.list_checkpoints(mine_id)]
+
+
+# =====================================================
+# find_checkpoint
+# =====================================================
+def test_exact_range_resumes_its_own_manifest():
+    _checkpoint("2024-01-01", "2024-03-31", "fetch", "detect")
+
+    manifest = cp.find_checkpoint(1, date(2024, 1, 1), date(2024, 3, 31))
+
+    assert manifest["range"] == {"start": "2024-01-01", "end": "2024-03-31"}
+    assert list(manifest["stages"]) == ["fetch", "detect"]
+
+
+def test_narrower_range_uses_narrowest_containing_fetch():
+    _checkpoint("2023-06-01", "2024-12-31", "fetch")
+    _checkpoint("2024-01-01", "2024-03-31", "fetch")
+    _checkpoint("2024-02-01", "2024-02-29")  # nothing fetched yet
+
+    manifest = cp.find_checkpoint(1, date(2024, 2, 1), date(2024, 2, 29))
+
+    assert manifest["range"] == {"start": "2024-01-01", "end": "2024-03-31"}
+
+
+@pytest.mark.parametrize("start, end", [
+    (date(2023, 12, 15), date(2024, 1, 31)),   # partial overlap
+    (date(2024, 5, 1), date(2024, 5, 31)),     # disjoint
+])
+def test_no_checkpoint_for_ranges_not_contained(start, end):
+    _checkpoint("2024-01-01", "2024-03-31", "fetch")
+
+    assert cp.find_checkpoint(1, start, end) is None
+
+
+def test_empty_or_written_checkpoints_are_not_resumed():
+    _checkpoint("2024-01-01", "2024-03-31", "fetch", rows=0)
+    _checkpoint("2024-01-01", "2024-06-30", "fetch", "detect", "write")
+
+    assert cp.find_checkpoint(1, date(2024, 2, 1), date(2024, 2, 29)) is None
+
+
+def test_checkpoints_disabled(monkeypatch):
+    _checkpoint("2024-01-01", "2024-03-31", "fetch")
+    monkeypatch.setattr(cp, "PIPELINE_CHECKPOINTS", False)
+
+    assert cp.find_checkpoint(1, date(2024, 1, 1), date(2024, 3, 31)) is None
+
+
+def test_raw_snapshot_round_trip():
+    manifest = _checkpoint("2024-01-01", "2024-03-31")
+    df = pd.DataFrame({"pixel_id": [1, 2], "date": ["2024-01-05", "2024-02-05"], "b4": [0.1, None]})
+
+    cp.save_frame(manifest, "raw", df)
+
+    pd.testing.assert_frame_equal(cp.load_frame(manifest, "raw"), df)
+
+
+# =====================================================
+# prune_checkpoints
+# =====================================================
+def test_prune_removes_ranges_inside_ingested_coverage():
+    _checkpoint("2024-01-01", "2024-01-31", "fetch")
+    _checkpoint("2024-01-15", "2024-02-15", "fetch")
+    _checkpoint("2024-01-01", "2024-01-31", "fetch", mine_id=2)
+
+    removed = cp.prune_checkpoints(1, date(2023, 12, 1), date(2024, 2, 1))
+
+    assert removed == 1
+    assert _ranges(1) == [("2024-01-15", "2024-02-15")]
+    # Other mines' coverage is unknown here
+    assert _ranges(2) == [("2024-01-01", "2024-01-31")]
+
+
+def test_prune_removes_expired_checkpoints_of_every_mine(checkpoint_dir):
+    _checkpoint("2024-01-01", "2024-01-31", "fetch")
+    _checkpoint("2024-03-01", "2024-03-31", "fetch", mine_id=2)
+    stale = time.time() - 7200
+    os.utime(checkpoint_dir / "mine_2" / "2024-03-01_2024-03-31", (stale, stale))
+
+    removed = cp.prune_checkpoints(1)
+
+    assert removed == 1
+    assert _ranges(1) == [("2024-01-01", "2024-01-31")]
+    assert _ranges(2) == []
+
+
+def test_prune_without_ttl_keeps_old_uncovered_checkpoints(monkeypatch, checkpoint_dir):
+    monkeypatch.setattr(cp, "CHECKPOINT_TTL_SECONDS", 0)
+    _checkpoint("2024-01-01", "2024-01-31", "fetch")
+    os.utime(checkpoint_dir / "mine_1" / "2024-01-01_2024-01-31", (0, 0))
+
+    assert cp.prune_checkpoints(1, None, None) == 0
+    assert _ranges(1) == [("2024-01-01", "2024-01-31")]
+
+
+def test_list_checkpoints_skips_foreign_entries(checkpoint_dir):
+    _checkpoint("2024-01-01", "2024-01-31", "fetch")
+    (checkpoint_dir / "mine_1" / "notes").mkdir()
+
+    assert _ranges(1) == [("2024-01-01", "2024-01-31")]
@@ -0,0 +1,138 @@
+# backend/tests/test_db_write.py
+
+import csv
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+import services.db_write as dw
+
+
+def _rows(buf):
+    return list(csv.reader(buf))
+
+
+def _raw_lines(buf):
+    return buf.getvalue().splitlines()
+
+
+# =====================================================
+# _to_copy_csv
+# =====================================================
+def test_copy_csv_column_order_and_no_header():
+    df = pd.DataFrame([{
+        "affected_area": 200.0, "alert_type": "new", "zone_type": "river",
+        "date": "2024-01-05", "mine_id": 7, "ignored": "x"
+    }])
+
+    rows = _rows(dw._to_copy_csv(df, "violation_alerts"))
+
+    assert rows == [["7", "2024-01-05", "river", "new", "200.0"]]
+
+
+def test_copy_csv_quotes_delimiters_and_quotes():
+    df = pd.DataFrame([{
+        "mine_id": 1, "date": "2024-01-05", "zone_type": 'river, "buffer"',
+        "alert_type": "line\nbreak", "affected_area": 1.5
+    }])
+
+    buf = dw._to_copy_csv(df, "violation_alerts")
+
+    assert '"river, ""buffer"""' in buf.getvalue()
+    assert _rows(buf)[0][2:4] == ['river, "buffer"', "line\nbreak"]
+
+
+def test_copy_csv_nulls_are_empty_unquoted_fields():
+    df = pd.DataFrame([
+        {"mine_id": 1, "date": "2024-01-05", "zone_type": None, "alert_type": "new", "affected_area": np.nan},
+    ])
+
+    assert _raw_lines(dw._to_copy_csv(df, "violation_alerts")) == ["1,2024-01-05,,new,"]
+
+
+def test_copy_csv_writes_upcast_int_columns_without_decimals(monkeypatch):
+    monkeypatch.setattr(dw, "PIXEL_GEOMETRY_MODE", "sql")
+    df = pd.DataFrame({
+        "mine_id": [1.0, 1.0], "pixel_id": [10.0, np.nan], "date": ["2024-01-05"] * 2,
+        "latitude": [23.5, 23.6], "longitude": [82.1, 82.2],
+        "b4": [0.1, np.nan], "b8": 0.2, "b11": 0.3, "ndvi": 0.4, "nbr": 0.5,
+        "anomaly_label": [-1.0, 1.0], "anomaly_score": 0.01, "excavated_flag": [0.0, np.nan]
+    })
+
+    rows = _rows(dw._to_copy_csv(df, "pixel_timeseries"))
+
+    assert rows[0][:3] == ["1", "10", "2024-01-05"]
+    assert rows[0][10] == "-1" and rows[0][12] == "0"
+    assert rows[1][1] == "" and rows[1][5] == "" and rows[1][12] == ""
+    assert len(rows[0]) == len(dw.TABLES["pixel_timeseries"]["columns"])
+
+
+def test_copy_csv_client_mode_sends_hex_ewkb(monkeypatch):
+    monkeypatch.setattr(dw, "PIXEL_GEOMETRY_MODE", "client")
+    gdf = gpd.GeoDataFrame(
+        {
+            "mine_id": [1], "pixel_id": [10], "date": ["2024-01-05"],
+            "latitude": [23.5], "longitude": [82.1],
+            "zone_type": ["river"], "pixel_area": [100.0], "anomaly_score": [0.02]
+        },
+        geometry=gpd.points_from_xy([82.1], [23.5]),
+        crs="EPSG:4326"
+    )
+
+    row = _rows(dw._to_copy_csv(gdf, "violation_pixels"))[0]
+
+    geom = shapely.from_wkb(bytes.fromhex(row[-1]))
+    assert shapely.get_srid(geom) == 4326
+    assert (geom.x, geom.y) == (82.1, 23.5)
+    assert len(row) == len(dw.TABLES["violation_pixels"]["columns"]) + 1
+
+
+# =====================================================
+# _pixels_to_series (array layout)
+# =====================================================
+def _pixel_rows():
+    # Pixel 20 first, unsorted dates, pixel 10 missing the middle date
+    return pd.DataFrame({
+        "pixel_id": [20, 10, 20, 10, 20],
+        "date": ["2024-01-11", "2024-01-01", "2024-01-01", "2024-01-21", "2024-01-21"],
+        "latitude": [23.6, 23.5, 23.6, 23.5, 23.6],
+        "longitude": [82.2, 82.1, 82.2, 82.1, 82.2],
+        "b4": [0.2, 0.1, 0.25, 0.3, np.nan],
+        "b8": 0.5, "b11": 0.6, "ndvi": 0.7, "nbr": 0.8,
+        "anomaly_label": [1, -1, -1, 1, 1],
+        "anomaly_score": [0.05, 0.01, 0.02, 0.03, 0.04],
+        "excavated_flag": [1, 0, 0, 1, 1],
+    })
+
+
+def test_series_date_axis_is_sorted_and_unique():
+    dates, series = dw._pixels_to_series(_pixel_rows(), 7, pd.Timestamp("2024-01-01").date())
+
+    assert [str(d) for d in dates] == ["2024-01-01", "2024-01-11", "2024-01-21"]
+    assert list(series["pixel_id"]) == [20, 10]
+    assert set(series["mine_id"]) == {7}
+    assert list(series["latitude"]) == [23.6, 23.5]
+
+
+def test_series_vectors_align_to_axis_with_nulls_for_gaps():
+    _, series = dw._pixels_to_series(_pixel_rows(), 7, pd.Timestamp("2024-01-01").date())
+    by_pixel = series.set_index("pixel_id")
+
+    assert by_pixel.loc[20, "b4"] == "{0.25,0.2,NULL}"
+    assert by_pixel.loc[10, "b4"] == "{0.1,NULL,0.3}"
+    # Integer vectors carry no decimals
+    assert by_pixel.loc[20, "anomaly_label"] == "{-1,1,1}"
+    assert by_pixel.loc[10, "excavated_flag"] == "{0,NULL,1}"
+
+
+def test_series_array_literals_are_quoted_in_copy_csv():
+    _, series = dw._pixels_to_series(_pixel_rows(), 7, pd.Timestamp("2024-01-01").date())
+
+    rows = _rows(dw._to_copy_csv(series, "pixel_series"))
+
+    columns = dw.TABLES["pixel_series"]["columns"]
+    assert len(rows) == 2 and all(len(row) == len(columns) for row in rows)
+    assert rows[0][columns.index("b4")] == "{0.25,0.2,NULL}"
+    assert '"{0.25,0.2,NULL}"' in _raw_lines(dw._to_copy_csv(series, "pixel_series"))[0]
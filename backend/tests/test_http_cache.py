@@ -0,0 +1,133 @@
+# backend/tests/test_http_cache.py
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import api.user_routes as user_routes
+from api.http_cache import cache_headers, is_not_modified, make_etag
+from services.cache import clear_cache
+
+UPDATED_AT = datetime(2024, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+def _request(**headers):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+    }
+    return Request(scope)
+
+
+# =====================================================
+# ETags and validators
+# =====================================================
+def test_etag_changes_with_version_and_parts():
+    etag = make_etag("kpi", 1, 3, "2024-01-01", "2024-01-31")
+
+    assert etag.startswith('W/"m1-v3-')
+    assert etag == make_etag("kpi", 1, 3, "2024-01-01", "2024-01-31")
+    assert etag != make_etag("kpi", 1, 4, "2024-01-01", "2024-01-31")
+    assert etag != make_etag("kpi", 1, 3, "2024-01-01", "2024-02-01")
+    assert etag != make_etag("timeseries", 1, 3, "2024-01-01", "2024-01-31")
+
+
+def test_last_modified_is_gmt_for_any_timezone():
+    ist = UPDATED_AT.astimezone(timezone(timedelta(hours=5, minutes=30)))
+
+    assert cache_headers("x", ist)["Last-Modified"] == "Fri, 01 Mar 2024 12:30:15 GMT"
+    assert "Last-Modified" not in cache_headers("x")
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('W/"m1-v3-abc"', True),
+    ('"m1-v3-abc"', True),
+    ('"other", W/"m1-v3-abc"', True),
+    ("*", True),
+    ('W/"m1-v2-abc"', False),
+    ("", False),
+])
+def test_if_none_match_weak_comparison(header, expected):
+    assert is_not_modified(_request(if_none_match=header), 'W/"m1-v3-abc"') is expected
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    request = _request(
+        if_none_match='"stale"',
+        if_modified_since=format_datetime(UPDATED_AT + timedelta(days=1), usegmt=True)
+    )
+
+    assert is_not_modified(request, 'W/"fresh"', UPDATED_AT) is False
+
+
+def test_if_modified_since_uses_second_resolution():
+    same_second = format_datetime(UPDATED_AT.replace(microsecond=0), usegmt=True)
+    earlier = format_datetime(UPDATED_AT - timedelta(seconds=1), usegmt=True)
+
+    assert is_not_modified(_request(if_modified_since=same_second), "e", UPDATED_AT) is True
+    assert is_not_modified(_request(if_modified_since=earlier), "e", UPDATED_AT) is False
+    assert is_not_modified(_request(if_modified_since="garbage"), "e", UPDATED_AT) is False
+    assert is_not_modified(_request(if_modified_since=same_second), "e") is False
+
+
+# =====================================================
+# _cached: 200 with validators, 304, version bumps
+# =====================================================
+@pytest.fixture
+def client(monkeypatch):
+    state = {"version": 1, "calls": 0}
+
+    async def fake_state(mine_id):
+        return state["version"], UPDATED_AT
+
+    monkeypatch.setattr(user_routes, "get_mine_state_async", fake_state)
+    clear_cache()
+
+    app = FastAPI()
+
+    @app.get("/thing/{mine_id}")
+    async def thing(request: Request, mine_id: int):
+        async def produce():
+            state["calls"] += 1
+            return {"mine_id": mine_id, "calls": state["calls"]}
+
+        return await user_routes._cached(request, "thing", mine_id, ("a",), produce)
+
+    yield TestClient(app), state
+    clear_cache()
+
+
+def test_cached_response_revalidates_with_304(client):
+    http, state = client
+
+    first = http.get("/thing/1")
+    assert first.status_code == 200
+    assert first.json() == {"mine_id": 1, "calls": 1}
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"] == "Fri, 01 Mar 2024 12:30:15 GMT"
+
+    revalidated = http.get("/thing/1", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    # Unconditional repeat comes from the response cache
+    assert http.get("/thing/1").json() == {"mine_id": 1, "calls": 1}
+    assert state["calls"] == 1
+
+
+def test_version_bump_invalidates_etag_and_body(client):
+    http, state = client
+    etag = http.get("/thing/1").headers["etag"]
+
+    state["version"] = 2
+    response = http.get("/thing/1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json() == {"mine_id": 1, "calls": 2}
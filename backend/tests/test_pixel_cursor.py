@@ -0,0 +1,100 @@
+# backend/tests/test_pixel_cursor.py
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.user_routes as user_routes
+from services.cache import clear_cache
+from services.db_reader import format_pixel_cursor, parse_pixel_cursor
+
+
+# =====================================================
+# Cursor format
+# =====================================================
+def test_cursor_round_trip():
+    cursor = format_pixel_cursor(date(2024, 1, 11), 42)
+
+    assert cursor == "2024-01-11_42"
+    assert parse_pixel_cursor(cursor) == {"after_date": date(2024, 1, 11), "after_pixel_id": 42}
+
+
+def test_cursor_from_pandas_values():
+    cursor = format_pixel_cursor(pd.Timestamp("2024-01-11"), 42.0)
+
+    assert parse_pixel_cursor(cursor) == {"after_date": date(2024, 1, 11), "after_pixel_id": 42}
+
+
+@pytest.mark.parametrize("cursor", ["", "2024-01-11", "2024-01-11_x", "nodate_1", "2024-01-11_1_2"])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        parse_pixel_cursor(cursor)
+
+
+# =====================================================
+# Paging /mine/pixels through X-Next-Cursor
+# =====================================================
+def _pixels():
+    days = [date(2024, 1, 1) + timedelta(days=10 * i) for i in range(3)]
+    return pd.DataFrame(
+        [{"mine_id": 1, "pixel_id": p, "date": d, "ndvi": p / 10} for d in days for p in (3, 1, 2)]
+    ).sort_values(["date", "pixel_id"], ignore_index=True)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    data = _pixels()
+
+    async def fake_fetch(mine_id, start, end, cursor=None, limit=None):
+        # Keyset semantics of pixels_sql(keyset=True): rows after (date, pixel_id)
+        page = data
+        if cursor:
+            after = parse_pixel_cursor(cursor)
+            key = list(zip(page["date"], page["pixel_id"]))
+            page = page[[k > (after["after_date"], after["after_pixel_id"]) for k in key]]
+        return page.head(limit) if limit else page
+
+    async def fake_state(mine_id):
+        return 1, None
+
+    monkeypatch.setattr(user_routes, "fetch_pixels_async", fake_fetch)
+    monkeypatch.setattr(user_routes, "get_mine_state_async", fake_state)
+    clear_cache()
+
+    app = FastAPI()
+    app.include_router(user_routes.router, prefix="/mine")
+    yield TestClient(app), data
+    clear_cache()
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 9])
+def test_pages_cover_every_row_once(client, limit):
+    http, data = client
+    url = f"/mine/pixels?mine_id=1&start=2024-01-01&end=2024-02-01&limit={limit}"
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        response = http.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        seen += [(row["date"], row["pixel_id"]) for row in response.json()]
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    expected = [(str(d), p) for d, p in zip(data["date"], data["pixel_id"])]
+    assert seen == expected
+    # A last page that is exactly full costs one extra (empty) request
+    assert pages == len(data) // limit + 1
+
+
+def test_invalid_cursor_is_rejected(client):
+    http, _ = client
+
+    response = http.get("/mine/pixels?mine_id=1&limit=2&cursor=garbage")
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "Invalid cursor"}
@@ -0,0 +1,133 @@
+# backend/tests/test_pixel_formats.py
+
+import asyncio
+import io
+import json
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from api.pixel_formats import (
+    PIXEL_ARROW_SCHEMA,
+    PIXEL_FORMATS,
+    PIXEL_STREAM_FORMATS,
+    negotiate_pixel_format
+)
+
+COLUMNS = [field.name for field in PIXEL_ARROW_SCHEMA]
+
+
+def _rows():
+    return [
+        (1, 10, date(2024, 1, 1), 23.5, 82.1, 0.1, 0.2, 0.3, 0.4, 0.5, -1, 0.02, 0),
+        (1, 11, date(2024, 1, 11), 23.6, 82.2, 0.15, None, 0.35, 0.45, 0.55, 1, -0.07, 1),
+    ]
+
+
+def _frame():
+    # fetch_pixels_async shape: dates as objects, NULL bands as NaN
+    return pd.DataFrame(_rows(), columns=COLUMNS).fillna(np.nan)
+
+
+def _collect(encoder, batches):
+    async def source():
+        for batch in batches:
+            yield COLUMNS, batch
+
+    async def run():
+        return [chunk async for chunk in encoder(source())]
+
+    return asyncio.run(run())
+
+
+# =====================================================
+# Whole-response encoders
+# =====================================================
+def test_records_round_trip_with_iso_dates_and_nulls():
+    body = json.loads(PIXEL_FORMATS["records"]["encode"](_frame()))
+
+    assert body[0]["date"] == "2024-01-01"
+    assert body[1]["b8"] is None
+    assert body[1]["pixel_id"] == 11
+
+
+def test_records_of_empty_frame_is_empty_array():
+    assert PIXEL_FORMATS["records"]["encode"](pd.DataFrame(columns=COLUMNS)) == b"[]"
+
+
+def test_columnar_holds_one_array_per_column():
+    body = json.loads(PIXEL_FORMATS["columnar"]["encode"](_frame()))
+
+    assert list(body) == COLUMNS
+    assert body["date"] == ["2024-01-01", "2024-01-11"]
+    assert body["pixel_id"] == [10, 11]
+    assert body["anomaly_score"] == [0.02, -0.07]
+
+
+def test_arrow_ipc_round_trip():
+    table = pa.ipc.open_stream(PIXEL_FORMATS["arrow"]["encode"](_frame())).read_all()
+
+    assert table.schema.equals(PIXEL_ARROW_SCHEMA)
+    assert table.column("date").to_pylist() == [date(2024, 1, 1), date(2024, 1, 11)]
+    assert table.column("b8").to_pylist()[1] is None
+
+
+def test_parquet_round_trip():
+    table = pq.read_table(io.BytesIO(PIXEL_FORMATS["parquet"]["encode"](_frame())))
+
+    assert table.column_names == COLUMNS
+    assert table.column("pixel_id").to_pylist() == [10, 11]
+
+
+# =====================================================
+# Streaming encoders
+# =====================================================
+def test_ndjson_stream_one_line_per_row():
+    rows = _rows()
+    chunks = _collect(PIXEL_STREAM_FORMATS["ndjson"]["encode"], [rows[:1], rows[1:]])
+
+    lines = b"".join(chunks).decode().splitlines()
+    assert len(chunks) == 2
+    assert [json.loads(line)["pixel_id"] for line in lines] == [10, 11]
+    assert json.loads(lines[1])["date"] == "2024-01-11"
+
+
+def test_arrow_stream_one_batch_per_cursor_batch():
+    rows = _rows()
+    chunks = _collect(PIXEL_STREAM_FORMATS["arrow"]["encode"], [rows[:1], rows[1:]])
+
+    reader = pa.ipc.open_stream(b"".join(chunks))
+    batches = list(reader)
+    assert reader.schema.equals(PIXEL_ARROW_SCHEMA)
+    assert [batch.num_rows for batch in batches] == [1, 1]
+    assert pa.Table.from_batches(batches).column("b8").to_pylist() == [0.2, None]
+
+
+def test_arrow_stream_matches_whole_response_encoding():
+    streamed = pa.ipc.open_stream(
+        b"".join(_collect(PIXEL_STREAM_FORMATS["arrow"]["encode"], [_rows()]))
+    ).read_all()
+    whole = pa.ipc.open_stream(PIXEL_FORMATS["arrow"]["encode"](_frame())).read_all()
+
+    assert streamed.equals(whole)
+
+
+# =====================================================
+# negotiate_pixel_format
+# =====================================================
+@pytest.mark.parametrize("format_param, accept, expected", [
+    (None, None, "records"),
+    (None, "application/json", "records"),
+    (None, "application/vnd.apache.arrow.stream", "arrow"),
+    (None, "text/html, application/x-parquet;q=0.9", "parquet"),
+    (None, "Application/X-NDJSON", "ndjson"),
+    ("columnar", "application/vnd.apache.arrow.stream", "columnar"),
+    ("ndjson", None, "ndjson"),
+    ("xml", "application/vnd.apache.arrow.stream", None),
+])
+def test_negotiate_pixel_format(format_param, accept, expected):
+    assert negotiate_pixel_format(format_param, accept) == expected
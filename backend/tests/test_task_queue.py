@@ -0,0 +1,202 @@
+# backend/tests/test_task_queue.py
+
+from datetime import date
+
+import pytest
+from fastapi import BackgroundTasks
+
+import api.task_queue as tq
+
+
+def _task(start, end, mine_id=1, status="queued"):
+    return {
+        "status": status,
+        "mine_id": mine_id,
+        "coalesced_requests": 1,
+        "requested_range": {"start": start, "end": end},
+    }
+
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    tq.TASKS.clear()
+    tq.CANCEL_EVENTS.clear()
+    tq.TASK_EVENTS.clear()
+    yield
+    tq.TASKS.clear()
+    tq.CANCEL_EVENTS.clear()
+    tq.TASK_EVENTS.clear()
+
+
+# =====================================================
+# _trim_against_inflight
+# =====================================================
+def test_trim_without_inflight_keeps_range():
+    start, end, overlapping = tq._trim_against_inflight(date(2024, 1, 1), date(2024, 1, 31), [])
+    assert (start, end, overlapping) == (date(2024, 1, 1), date(2024, 1, 31), [])
+
+
+def test_trim_ignores_disjoint_tasks():
+    active = [("a", _task("2023-01-01", "2023-12-31")), ("b", _task("2024-02-01", "2024-02-28"))]
+    start, end, overlapping = tq._trim_against_inflight(date(2024, 1, 1), date(2024, 1, 31), active)
+    assert (start, end, overlapping) == (date(2024, 1, 1), date(2024, 1, 31), [])
+
+
+def test_trim_leading_edge():
+    active = [("a", _task("2023-12-01", "2024-01-10"))]
+    start, end, overlapping = tq._trim_against_inflight(date(2024, 1, 1), date(2024, 1, 31), active)
+    assert (start, end, overlapping) == (date(2024, 1, 11), date(2024, 1, 31), ["a"])
+
+
+def test_trim_trailing_edge():
+    active = [("a", _task("2024-01-20", "2024-03-01"))]
+    start, end, overlapping = tq._trim_against_inflight(date(2024, 1, 1), date(2024, 1, 31), active)
+    assert (start, end, overlapping) == (date(2024, 1, 1), date(2024, 1, 19), ["a"])
+
+
+def test_trim_keeps_gap_in_the_middle():
+    active = [("a", _task("2024-01-10", "2024-01-20"))]
+    start, end, overlapping = tq._trim_against_inflight(date(2024, 1, 1), date(2024, 1, 31), active)
+    assert (start, end, overlapping) == (date(2024, 1, 1), date(2024, 1, 31), ["a"])
+
+
+def test_trim_fully_covered_by_two_tasks():
+    # Listed out of order: the second pass picks up the earlier task
+    active = [("b", _task("2024-01-16", "2024-02-10")), ("a", _task("2023-12-20", "2024-01-15"))]
+    start, end, overlapping = tq._trim_against_inflight(date(2024, 1, 1), date(2024, 1, 31), active)
+    assert start > end
+    assert sorted(overlapping) == ["a", "b"]
+
+
+# =====================================================
+# submit_pipeline coalescing
+# =====================================================
+def test_submit_runs_requested_range_and_reports_trim():
+    tq.TASKS["a"] = _task("2024-01-01", "2024-01-10", status="processing")
+    background = BackgroundTasks()
+
+    response = tq.submit_pipeline(1, "2024-01-05", "2024-01-31", background)
+
+    assert response["coalesced"] is False
+    assert response["requested_range"] == {"start": "2024-01-05", "end": "2024-01-31"}
+    assert response["range"] == {"start": "2024-01-11", "end": "2024-01-31"}
+    assert response["depends_on"] == ["a"]
+    # The background task gets the full requested range, not the trimmed one
+    assert background.tasks[0].args[2:] == ("2024-01-05", "2024-01-31")
+
+
+def test_submit_coalesces_onto_single_covering_task():
+    tq.TASKS["a"] = _task("2024-01-01", "2024-01-31")
+
+    response = tq.submit_pipeline(1, "2024-01-05", "2024-01-20", BackgroundTasks())
+
+    assert response["coalesced"] is True
+    assert response["task_id"] == "a"
+    assert response["task_ids"] == ["a"]
+    assert tq.TASKS["a"]["coalesced_requests"] == 2
+
+
+def test_submit_coalesces_onto_every_covering_task():
+    tq.TASKS["a"] = _task("2024-01-01", "2024-01-15")
+    tq.TASKS["b"] = _task("2024-01-16", "2024-01-31")
+
+    response = tq.submit_pipeline(1, "2024-01-05", "2024-01-20", BackgroundTasks())
+
+    assert response["coalesced"] is True
+    assert response["task_id"] is None
+    assert sorted(response["task_ids"]) == ["a", "b"]
+
+
+def test_submit_ignores_other_mines_and_finished_tasks():
+    tq.TASKS["a"] = _task("2024-01-01", "2024-01-31", mine_id=2)
+    tq.TASKS["b"] = _task("2024-01-01", "2024-01-31", status="completed")
+
+    response = tq.submit_pipeline(1, "2024-01-05", "2024-01-20", BackgroundTasks())
+
+    assert response["coalesced"] is False
+    assert response["depends_on"] == []
+
+
+# =====================================================
+# Eviction and result spill-over
+# =====================================================
+def _finished(finished_at, status="completed"):
+    task = _task("2024-01-01", "2024-01-31", status=status)
+    task["finished_at"] = finished_at
+    return task
+
+
+def test_evict_drops_expired_finished_tasks(monkeypatch):
+    monkeypatch.setattr(tq, "TASK_TTL_SECONDS", 60)
+    now = tq.time.time()
+    tq.TASKS["old"] = _finished(now - 120)
+    tq.TASKS["fresh"] = _finished(now - 10)
+    tq.TASKS["running"] = _task("2024-01-01", "2024-01-31", status="processing")
+
+    tq._evict_tasks()
+
+    assert list(tq.TASKS) == ["fresh", "running"]
+
+
+def test_evict_oldest_finished_first_to_fit_cap(monkeypatch):
+    monkeypatch.setattr(tq, "TASK_STORE_MAX_TASKS", 3)
+    now = tq.time.time()
+    tq.TASKS["first"] = _finished(now, status="failed")
+    tq.TASKS["active"] = _task("2024-01-01", "2024-01-31")
+    tq.TASKS["second"] = _finished(now)
+    tq.TASKS["third"] = _finished(now, status="cancelled")
+
+    tq._evict_tasks(reserve=1)
+
+    assert list(tq.TASKS) == ["active", "third"]
+
+
+def test_evict_never_drops_active_tasks(monkeypatch):
+    monkeypatch.setattr(tq, "TASK_STORE_MAX_TASKS", 1)
+    tq.TASKS["a"] = _task("2024-01-01", "2024-01-31")
+    tq.TASKS["b"] = _task("2024-02-01", "2024-02-28", status="processing")
+
+    tq._evict_tasks(reserve=1)
+
+    assert list(tq.TASKS) == ["a", "b"]
+
+
+def test_small_result_stays_inline(monkeypatch, tmp_path):
+    monkeypatch.setattr(tq, "TASK_RESULT_DIR", str(tmp_path))
+    monkeypatch.setattr(tq, "TASK_RESULT_SPILL_BYTES", 1024)
+
+    assert tq._spill_result("t", {"ok": True}) == {"result": {"ok": True}}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_large_result_spills_and_loads_lazily(monkeypatch, tmp_path):
+    monkeypatch.setattr(tq, "TASK_RESULT_DIR", str(tmp_path))
+    monkeypatch.setattr(tq, "TASK_RESULT_SPILL_BYTES", 16)
+    result = {"ranges": [{"start": "2024-01-01", "pixels": n} for n in range(10)]}
+
+    fields = tq._spill_result("t", result)
+    assert fields["result"] is None
+    assert fields["result_path"] == str(tmp_path / "t.json")
+
+    tq.TASKS["t"] = {**_finished(tq.time.time()), **fields}
+    # Streamed events skip the file, /status reads it back
+    assert tq._task_snapshot("t", load_result=False)["result"] is None
+    snapshot = tq._task_snapshot("t")
+    assert snapshot["result"] == result
+    assert snapshot["result_spilled"] is True
+
+
+def test_evicting_a_task_removes_its_spilled_result(monkeypatch, tmp_path):
+    monkeypatch.setattr(tq, "TASK_RESULT_DIR", str(tmp_path))
+    monkeypatch.setattr(tq, "TASK_RESULT_SPILL_BYTES", 0)
+    monkeypatch.setattr(tq, "TASK_TTL_SECONDS", 0)
+    tq.TASKS["t"] = {**_finished(tq.time.time() - 5), **tq._spill_result("t", [1, 2, 3])}
+
+    tq._evict_tasks()
+
+    assert "t" not in tq.TASKS
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_missing_spilled_result_loads_as_none(tmp_path):
+    assert tq._load_spilled_result(str(tmp_path / "gone.json")) is None
@@ -0,0 +1,142 @@
+# backend/tests/test_tiles.py
+
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import tiles
+
+
+def _decode_png(png):
+    """(width, height, rgba) of a non-interlaced 8-bit RGBA PNG, CRCs checked"""
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, chunks = 8, []
+    while pos < len(png):
+        (length,) = struct.unpack(">I", png[pos:pos + 4])
+        tag, data = png[pos + 4:pos + 8], png[pos + 8:pos + 8 + length]
+        (crc,) = struct.unpack(">I", png[pos + 8 + length:pos + 12 + length])
+        assert zlib.crc32(tag + data) & 0xFFFFFFFF == crc
+        chunks.append((tag, data))
+        pos += 12 + length
+
+    assert [tag for tag, _ in chunks] == [b"IHDR", b"IDAT", b"IEND"]
+    width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", chunks[0][1])
+    assert (depth, color_type, interlace) == (8, 6, 0)
+
+    raw = np.frombuffer(zlib.decompress(chunks[1][1]), dtype=np.uint8).reshape(height, width * 4 + 1)
+    assert (raw[:, 0] == 0).all()
+    return width, height, raw[:, 1:].reshape(height, width, 4)
+
+
+def _center(z, x, y):
+    min_lon, min_lat, max_lon, max_lat = tiles.tile_bounds(z, x, y)
+    return (min_lon + max_lon) / 2, (min_lat + max_lat) / 2
+
+
+def _points(lon, lat, values, column="ndvi"):
+    n = len(values)
+    return pd.DataFrame({"longitude": [lon] * n, "latitude": [lat] * n, column: values})
+
+
+# =====================================================
+# encode_png
+# =====================================================
+def test_encode_png_round_trips_pixels_and_dimensions():
+    rgba = np.random.default_rng(0).integers(0, 256, size=(3, 5, 4), dtype=np.uint8)
+
+    width, height, decoded = _decode_png(tiles.encode_png(rgba))
+
+    assert (width, height) == (5, 3)
+    assert np.array_equal(decoded, rgba)
+
+
+def test_render_tile_is_a_full_size_png():
+    z, x, y = 12, 2981, 1778
+    lon, lat = _center(z, x, y)
+
+    width, height, rgba = _decode_png(tiles.render_tile(_points(lon, lat, [0.8]), "ndvi", z, x, y))
+
+    assert (width, height) == (tiles.TILE_SIZE, tiles.TILE_SIZE)
+    assert (rgba[..., 3] > 0).sum() == 1
+
+
+# =====================================================
+# rasterize / colorize
+# =====================================================
+def test_rasterize_empty_is_all_nan():
+    grid = tiles.rasterize(_points(82.0, 23.0, [np.nan]), "ndvi", 12, 0, 0)
+
+    assert grid.shape == (tiles.TILE_SIZE, tiles.TILE_SIZE)
+    assert np.isnan(grid).all()
+
+
+def test_rasterize_averages_points_on_the_same_tile_pixel():
+    z, x, y = 12, 2981, 1778
+    lon, lat = _center(z, x, y)
+
+    grid = tiles.rasterize(_points(lon, lat, [0.2, 0.4, np.nan]), "ndvi", z, x, y)
+
+    # Low zoom: a 10 m pixel is smaller than one tile pixel
+    assert (~np.isnan(grid)).sum() == 1
+    assert grid[128, 128] == pytest.approx(0.3)
+
+
+def test_rasterize_splats_pixel_footprint_at_high_zoom():
+    z = 18
+    x, y = tiles.tiles_covering(82.0, 23.0, 82.0, 23.0, z)[0]
+    lon, lat = _center(z, x, y)
+
+    grid = tiles.rasterize(_points(lon, lat, [0.5]), "ndvi", z, x, y)
+
+    filled = ~np.isnan(grid)
+    rows, cols = np.nonzero(filled)
+    # Square footprint roughly 10 m wide (~0.55 m per tile pixel at z18, lat 23)
+    assert rows.max() - rows.min() == cols.max() - cols.min()
+    assert 15 <= rows.max() - rows.min() + 1 <= 21
+    assert np.all(grid[filled] == 0.5)
+
+
+def test_rasterize_ignores_points_outside_the_tile():
+    z, x, y = 12, 2981, 1778
+    lon, lat = _center(z, x + 2, y)
+
+    assert np.isnan(tiles.rasterize(_points(lon, lat, [0.5]), "ndvi", z, x, y)).all()
+
+
+def test_colorize_empty_pixels_are_transparent():
+    grid = np.array([[np.nan, 0.05], [0.4, 0.9]])
+
+    rgba = tiles.colorize(grid, "ndvi")
+
+    assert rgba[0, 0, 3] == 0
+    assert (rgba[[0, 1, 1], [1, 0, 1], 3] == 255).all()
+    assert list(rgba[1, 1, :3]) == tiles.TILE_LAYERS["ndvi"]["colors"][-1][:3]
+
+
+# =====================================================
+# tiles_covering
+# =====================================================
+def test_tiles_covering_whole_world_at_zoom_zero():
+    assert tiles.tiles_covering(-179, -80, 179, 80, 0) == [(0, 0)]
+
+
+def test_tiles_covering_point_matches_tile_bounds():
+    z = 14
+    (x, y), = tiles.tiles_covering(82.123, 23.456, 82.123, 23.456, z)
+
+    min_lon, min_lat, max_lon, max_lat = tiles.tile_bounds(z, x, y)
+    assert min_lon <= 82.123 < max_lon
+    assert min_lat < 23.456 <= max_lat
+
+
+def test_tiles_covering_bbox_spanning_tile_edges():
+    z = 14
+    min_lon, min_lat, max_lon, max_lat = tiles.tile_bounds(z, 11923, 7115)
+    eps = 1e-6
+
+    covered = tiles.tiles_covering(max_lon - eps, min_lat - eps, max_lon + eps, min_lat + eps, z)
+
+    assert sorted(covered) == [(11923, 7115), (11923, 7116), (11924, 7115), (11924, 7116)]
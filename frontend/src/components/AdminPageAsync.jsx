@@ -40,7 +40,7 @@ export function AdminPageAsync({ onClose }) {
     setActiveTasks(prev =>
       prev.filter(taskId => {
         const task = tasks[taskId];
-        return task && task.status !== 'completed' && task.status !== 'failed';
+        return task && !['completed', 'failed', 'cancelled', 'timed_out'].includes(task.status);
       })
     );
   }, [tasks]);
@@ -57,9 +57,10 @@ export function AdminPageAsync({ onClose }) {
         startDate,
         endDate
       }));
-      if (result.payload?.task_id) {
-        newTasks.push(result.payload.task_id);
-      }
+      // A coalesced request may be covered by several in-flight tasks
+      const taskIds = result.payload?.task_ids
+        ?? (result.payload?.task_id ? [result.payload.task_id] : []);
+      newTasks.push(...taskIds);
     }
 
     setActiveTasks(newTasks);
@@ -180,6 +181,8 @@ export function AdminPageAsync({ onClose }) {
                     <p className="text-xs text-blue-700 mt-1">
                       {task?.status === 'completed' ? '✅ Completed - Data ready!' : 
                        task?.status === 'failed' ? '❌ Failed - Check logs' :
+                       task?.status === 'cancelled' ? '🛑 Cancelled' :
+                       task?.status === 'timed_out' ? '⌛ Timed out - partial data saved' :
                        task?.status === 'processing' ? `⚙️ ${task?.message || 'Processing...'}` : '⏳ Queued for processing'}
                     </p>
                     {task?.status === 'processing' && (
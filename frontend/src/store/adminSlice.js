@@ -68,13 +68,16 @@ export const adminSlice = createSlice({
       })
       .addCase(submitPipeline.fulfilled, (state, action) => {
         state.loading = false;
-        const taskId = action.payload.task_id;
-        state.tasks[taskId] = {
-          status: 'queued',
-          progress: 0,
-          result: null,
-          error: null
-        };
+        const taskIds = action.payload.task_ids ?? [action.payload.task_id];
+        for (const taskId of taskIds) {
+          // Coalesced onto existing tasks: keep their known state
+          state.tasks[taskId] ??= {
+            status: 'queued',
+            progress: 0,
+            result: null,
+            error: null
+          };
+        }
       })
       .addCase(submitPipeline.rejected, (state, action) => {
         state.loading = false;
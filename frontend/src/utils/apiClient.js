@@ -52,6 +52,30 @@ export const apiClient = {
     }
   },
 
+  /**
+   * Fetch KPI metrics for many mines in one request (all mines with data
+   * when mineIds is null). sort: excavated_percentage | excavated_area |
+   * violation_area | max_anomaly_score | mine_id
+   */
+  async getMinesKPI(mineIds = null, startDate = null, endDate = null, sort = 'excavated_percentage', order = 'desc', limit = null) {
+    try {
+      const url = new URL(`${API_BASE_URL}/mine/kpi`);
+      if (mineIds) url.searchParams.append('mine_ids', mineIds.join(','));
+      if (startDate) url.searchParams.append('start', startDate);
+      if (endDate) url.searchParams.append('end', endDate);
+      url.searchParams.append('sort', sort);
+      url.searchParams.append('order', order);
+      if (limit) url.searchParams.append('limit', limit);
+
+      const response = await fetch(url.toString());
+      if (!response.ok) throw new Error(`Failed to fetch KPIs: ${response.statusText}`);
+      return await response.json();
+    } catch (error) {
+      console.error('Error fetching KPIs:', error);
+      throw error;
+    }
+  },
+
   /**
    * Fetch spectral signature (aggregated bands data)
    */
@@ -70,6 +94,85 @@ export const apiClient = {
     }
   },
 
+  /**
+   * Fetch pixels binned onto a zoom-dependent grid (map views).
+   * bbox: [minLon, minLat, maxLon, maxLat] of the visible extent
+   */
+  async getPixelGrid(mineId, startDate = null, endDate = null, zoom = null, bbox = null) {
+    try {
+      const url = new URL(`${API_BASE_URL}/mine/grid/${mineId}`);
+      if (startDate) url.searchParams.append('start', startDate);
+      if (endDate) url.searchParams.append('end', endDate);
+      if (zoom !== null) url.searchParams.append('zoom', zoom);
+      if (bbox) url.searchParams.append('bbox', bbox.join(','));
+
+      const response = await fetch(url.toString());
+      if (!response.ok) throw new Error(`Failed to fetch pixel grid: ${response.statusText}`);
+      return await response.json();
+    } catch (error) {
+      console.error('Error fetching pixel grid:', error);
+      throw error;
+    }
+  },
+
+  /**
+   * Fetch the full history of the pixel nearest to a clicked map point
+   */
+  async getPixelHistory(mineId, lat, lon) {
+    try {
+      const url = new URL(`${API_BASE_URL}/mine/pixel-history/${mineId}`);
+      url.searchParams.append('lat', lat);
+      url.searchParams.append('lon', lon);
+
+      const response = await fetch(url.toString());
+      if (response.status === 404) return null;
+      if (!response.ok) throw new Error(`Failed to fetch pixel history: ${response.statusText}`);
+      return await response.json();
+    } catch (error) {
+      console.error('Error fetching pixel history:', error);
+      throw error;
+    }
+  },
+
+  /**
+   * Fetch a page of the mine catalog (GeoJSON FeatureCollection).
+   * Geometries are simplified for the zoom; bbox limits to the visible extent.
+   */
+  async getMineCatalog(zoom = 5, bbox = null, limit = 100, offset = 0) {
+    try {
+      const url = new URL(`${API_BASE_URL}/mine/catalog`);
+      url.searchParams.append('zoom', zoom);
+      if (bbox) url.searchParams.append('bbox', bbox.join(','));
+      url.searchParams.append('limit', limit);
+      url.searchParams.append('offset', offset);
+
+      const response = await fetch(url.toString());
+      if (!response.ok) throw new Error(`Failed to fetch mine catalog: ${response.statusText}`);
+      return await response.json();
+    } catch (error) {
+      console.error('Error fetching mine catalog:', error);
+      throw error;
+    }
+  },
+
+  /**
+   * Search mines by name, state, district or subdistrict
+   */
+  async searchMines(query, limit = 20) {
+    try {
+      const url = new URL(`${API_BASE_URL}/mine/catalog/search`);
+      url.searchParams.append('q', query);
+      url.searchParams.append('limit', limit);
+
+      const response = await fetch(url.toString());
+      if (!response.ok) throw new Error(`Failed to search mines: ${response.statusText}`);
+      return await response.json();
+    } catch (error) {
+      console.error('Error searching mines:', error);
+      throw error;
+    }
+  },
+
   /**
    * Check backend health
    */